@@ -0,0 +1,139 @@
+"""
+Models, viewsets and a Pyramid application shared by the benchmarks, backed by a SQLite database of products.
+"""
+
+import os
+import tempfile
+
+from pyramid.config import Configurator
+
+from sqlalchemy import create_engine, Column, ForeignKey, Integer, String
+from sqlalchemy.orm import contains_eager, relationship, sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+
+from marshmallow import Schema, fields
+
+from pyramid_restful.expandables import ExpandableSchemaMixin, ExpandableViewMixin
+from pyramid_restful.filters import FieldFilter, SearchFilter, OrderFilter
+from pyramid_restful.pagination import PageNumberPagination, LinkHeaderPagination
+from pyramid_restful.routers import ViewSetRouter
+from pyramid_restful.viewsets import ModelCRUDViewSet
+
+Base = declarative_base()
+
+#: The number of suppliers products are spread over.
+SUPPLIERS = 100
+#: The number of distinct product categories.
+CATEGORIES = 20
+
+
+class Supplier(Base):
+    __tablename__ = 'supplier'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+class Product(Base):
+    __tablename__ = 'product'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    category = Column(String, index=True)
+    price = Column(Integer)
+    supplier_id = Column(Integer, ForeignKey('supplier.id'))
+    supplier = relationship(Supplier)
+
+
+class SupplierSchema(Schema):
+    id = fields.Integer()
+    name = fields.String()
+
+
+class ProductSchema(ExpandableSchemaMixin, Schema):
+    id = fields.Integer()
+    name = fields.String()
+    category = fields.String()
+    price = fields.Integer()
+    supplier_id = fields.Integer()
+
+    class Meta:
+        expandable_fields = {'supplier': fields.Nested(SupplierSchema)}
+
+
+class ProductPagination(PageNumberPagination):
+    page_size = 50
+
+
+class ProductLinkPagination(LinkHeaderPagination):
+    page_size = 50
+
+
+class ProductViewSet(ExpandableViewMixin, ModelCRUDViewSet):
+    model = Product
+    schema_class = ProductSchema
+    pagination_class = ProductPagination
+    filter_classes = (FieldFilter, SearchFilter, OrderFilter)
+    filter_fields = (Product.category,)
+    search_fields = (Product.name,)
+    order_fields = (Product.price,)
+    expandable_fields = {
+        'supplier': {'join': Product.supplier, 'options': [contains_eager(Product.supplier)]},
+    }
+
+
+class LinkProductViewSet(ProductViewSet):
+    pagination_class = ProductLinkPagination
+
+
+def make_engine(rows, url=None, **kwargs):
+    """
+    Returns the engine of a database of ``rows`` products. Defaults to a new SQLite database in a temporary file.
+    The tables of the database at ``url`` are created and filled if they are empty, otherwise they are used as is.
+    """
+
+    if url is None:
+        url = 'sqlite:///{}'.format(os.path.join(tempfile.mkdtemp(prefix='restful-bench-'), 'bench.sqlite'))
+
+    engine = create_engine(url, **kwargs)
+    Base.metadata.create_all(engine)
+
+    with engine.connect() as connection:
+        if connection.execute(Product.__table__.select().limit(1)).first() is not None:
+            return engine
+
+    with engine.begin() as connection:
+        connection.execute(Supplier.__table__.insert(), [
+            {'id': i, 'name': 'supplier {}'.format(i)} for i in range(1, SUPPLIERS + 1)
+        ])
+
+        for start in range(1, rows + 1, 10000):
+            connection.execute(Product.__table__.insert(), [{
+                'id': i,
+                'name': 'product {}'.format(i),
+                'category': 'c{}'.format(i % CATEGORIES),
+                'price': (i * 7919) % 100000,
+                'supplier_id': i % SUPPLIERS + 1,
+            } for i in range(start, min(start + 10000, rows + 1))])
+
+    return engine
+
+
+def make_app(get_dbsession):
+    """
+    Returns the WSGI application routing the product viewsets.
+
+    :param get_dbsession: Called with the request to get its ``dbsession``.
+    """
+
+    config = Configurator()
+    config.add_request_method(get_dbsession, 'dbsession', reify=True)
+    router = ViewSetRouter(config)
+    router.register('products', ProductViewSet, 'product')
+    router.register('link-products', LinkProductViewSet, 'link-product')
+
+    return config.make_wsgi_app()
+
+
+def make_session_factory(engine):
+    return sessionmaker(bind=engine)
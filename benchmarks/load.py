@@ -0,0 +1,192 @@
+"""
+Drives the benchmark application in-process from concurrent threads, and optionally processes, with a weighted mix of
+requests. Reports the throughput, the latency percentiles and the time spent waiting for database connections.
+
+Usage::
+
+    python -m benchmarks.load --threads 8 --duration 10
+    python -m benchmarks.load --processes 4 --threads 4 --mix list=6 retrieve=3 create=1
+    python -m benchmarks.load --url postgresql://localhost/bench --pool-size 10 --threads 16
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy.pool import QueuePool
+
+from webob import Request
+
+from .fixtures import make_app, make_engine, make_session_factory
+from .views import SCENARIOS
+
+#: The default weight of each scenario of ``benchmarks.views`` in the request mix.
+DEFAULT_MIX = {
+    'list': 3,
+    'list field filter': 2,
+    'list order filter': 1,
+    'list expand': 1,
+    'retrieve': 5,
+    'create': 1,
+}
+
+
+class TimedQueuePool(QueuePool):
+    """
+    Records the time each connection checkout waits for the pool.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = []
+
+    def _do_get(self):
+        start = time.perf_counter()
+
+        try:
+            return super()._do_get()
+        finally:
+            self.waits.append(time.perf_counter() - start)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+
+    values = sorted(values)
+
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def make_request(scenario):
+    name, method, url, body = scenario
+    request = Request.blank(url, method=method)
+
+    if body is not None:
+        request.json = body
+
+    return request
+
+
+def worker(app, mix, deadline, results):
+    scenarios = {scenario[0]: scenario for scenario in SCENARIOS}
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    rand = random.Random()
+
+    while time.perf_counter() < deadline:
+        name = rand.choices(names, weights)[0]
+        request = make_request(scenarios[name])
+        start = time.perf_counter()
+
+        try:
+            status = request.get_response(app).status_code
+        except Exception:
+            status = None
+
+        results.append((name, time.perf_counter() - start, status))
+
+
+def run(url, threads, duration, mix, pool_size):
+    """
+    Runs ``threads`` workers against the database at ``url`` for ``duration`` seconds.
+
+    :return: A tuple of the list of ``(scenario, seconds, status)`` of each request and the list of pool waits.
+    """
+
+    engine = make_engine(0, url, poolclass=TimedQueuePool, pool_size=pool_size, max_overflow=0, pool_timeout=60,
+                         connect_args={'check_same_thread': False} if url.startswith('sqlite') else {})
+    session_factory = make_session_factory(engine)
+
+    def get_dbsession(request):
+        dbsession = session_factory()
+        request.add_finished_callback(lambda request: dbsession.close())
+        return dbsession
+
+    app = make_app(get_dbsession)
+    results = []
+    deadline = time.perf_counter() + duration
+    workers = [threading.Thread(target=worker, args=(app, mix, deadline, results)) for _ in range(threads)]
+
+    for thread in workers:
+        thread.start()
+
+    for thread in workers:
+        thread.join()
+
+    waits = engine.pool.waits
+    engine.dispose()
+
+    return results, waits
+
+
+def report(results, waits, elapsed, pool_size):
+    latencies = [seconds for name, seconds, status in results]
+    errors = sum(1 for name, seconds, status in results if status is None or status >= 500)
+
+    print('requests:   {} in {:.1f} s, {} errors'.format(len(results), elapsed, errors))
+    print('throughput: {:.1f} req/s'.format(len(results) / elapsed))
+    print('latency:    p50 {:.2f} ms, p90 {:.2f} ms, p99 {:.2f} ms, max {:.2f} ms'.format(
+        *(percentile(latencies, fraction) * 1000 for fraction in (.5, .9, .99, 1))))
+    print()
+    print('{:<20} {:>8} {:>10} {:>10}'.format('scenario', 'requests', 'p50 ms', 'p99 ms'))
+
+    for name in sorted(set(name for name, seconds, status in results)):
+        timings = [seconds for scenario, seconds, status in results if scenario == name]
+        print('{:<20} {:>8} {:>10.2f} {:>10.2f}'.format(
+            name, len(timings), percentile(timings, .5) * 1000, percentile(timings, .99) * 1000))
+
+    waited = [wait for wait in waits if wait >= 0.001]
+    print()
+    print('pool:       {} connections per process, {} checkouts, {} waited over 1 ms ({:.1%})'.format(
+        pool_size, len(waits), len(waited), len(waited) / len(waits) if waits else 0))
+    print('pool wait:  total {:.1f} ms, p99 {:.2f} ms, max {:.2f} ms'.format(
+        sum(waits) * 1000, percentile(waits, .99) * 1000, max(waits or [0]) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='Database url, defaults to a new SQLite database.')
+    parser.add_argument('--rows', type=int, default=10000, help='Number of products in a new database.')
+    parser.add_argument('--threads', type=int, default=8, help='Number of threads per process.')
+    parser.add_argument('--processes', type=int, default=1, help='Number of processes.')
+    parser.add_argument('--duration', type=float, default=10, help='Number of seconds to run for.')
+    parser.add_argument('--pool-size', type=int, default=5, help='Number of database connections per process.')
+    parser.add_argument('--mix', nargs='+', metavar='SCENARIO=WEIGHT',
+                        help='Weights of the scenarios of benchmarks.views, defaults to a read heavy mix.')
+    args = parser.parse_args()
+
+    mix = DEFAULT_MIX
+
+    if args.mix:
+        mix = {name: float(weight) for name, weight in (item.rsplit('=', 1) for item in args.mix)}
+
+    # Create and fill the database once, before the workers share it.
+    engine = make_engine(args.rows, args.url)
+    url = args.url or str(engine.url)
+    engine.dispose()
+
+    print('workers:    {} processes x {} threads, pool size {}'.format(args.processes, args.threads, args.pool_size))
+    start = time.perf_counter()
+
+    if args.processes == 1:
+        results, waits = run(url, args.threads, args.duration, mix, args.pool_size)
+    else:
+        with ProcessPoolExecutor(args.processes) as executor:
+            futures = [executor.submit(run, url, args.threads, args.duration, mix, args.pool_size)
+                       for _ in range(args.processes)]
+            results, waits = [], []
+
+            for future in futures:
+                process_results, process_waits = future.result()
+                results.extend(process_results)
+                waits.extend(process_waits)
+
+    report(results, waits, time.perf_counter() - start, args.pool_size)
+
+
+if __name__ == '__main__':
+    main()
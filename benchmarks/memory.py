@@ -0,0 +1,101 @@
+"""
+Measures the memory of list requests with each pagination mode, traced with ``MemoryProfile``.
+
+Usage::
+
+    python -m benchmarks.memory --rows 1000 10000 100000
+"""
+
+import argparse
+import logging
+
+from webtest import TestApp
+
+from pyramid.config import Configurator
+
+from pyramid_restful.profiling import MemoryProfile
+from pyramid_restful.routers import ViewSetRouter
+
+from .fixtures import ProductViewSet, ProductPagination, ProductLinkPagination, make_engine, make_session_factory
+
+#: The pagination class of each measured mode.
+PAGINATION_MODES = [
+    ('none', None),
+    ('page number', ProductPagination),
+    ('link header', ProductLinkPagination),
+]
+
+
+class MemoryHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.reports = []
+
+    def emit(self, record):
+        if hasattr(record, 'restful_memory'):
+            self.reports.append(record.restful_memory)
+
+
+def measure(dbsession, pagination_class, rows):
+    """
+    Lists the products with ``pagination_class``.
+
+    :return: The memory report of ``MemoryProfile``.
+    """
+
+    viewset = type('MeasuredViewSet', (ProductViewSet,), {
+        'pagination_class': pagination_class,
+        'profile_class': MemoryProfile,
+    })
+
+    config = Configurator()
+    config.add_request_method(lambda request: dbsession, 'dbsession', reify=True)
+    ViewSetRouter(config).register('products', viewset, 'product')
+    app = TestApp(config.make_wsgi_app())
+
+    handler = MemoryHandler()
+    logger = logging.getLogger('restful_pyramid')
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    try:
+        app.get('/products/')
+    finally:
+        logger.removeHandler(handler)
+        dbsession.expunge_all()
+
+    return handler.reports[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help='Table sizes to measure.')
+    parser.add_argument('--sites', action='store_true', help='Show the largest allocation sites of each request.')
+    args = parser.parse_args()
+
+    print('{:>8}  {:<12} {:>10} {:>10} {:>10} {:>12} {:>10} {:>10}'.format(
+        'rows', 'pagination', 'peak KiB', 'B/row', 'orm KiB', 'schema KiB', 'json KiB', 'other KiB'))
+
+    for rows in args.rows:
+        engine = make_engine(rows)
+        dbsession = make_session_factory(engine)()
+
+        for name, pagination_class in PAGINATION_MODES:
+            report = measure(dbsession, pagination_class, rows)
+            categories = report['categories']
+
+            print('{:>8}  {:<12} {:>10.0f} {:>10.0f} {:>10.0f} {:>12.0f} {:>10.0f} {:>10.0f}'.format(
+                rows, name, report['peak'], report['peak'] * 1024 / rows, categories.get('orm', 0),
+                categories.get('marshmallow', 0), categories.get('json', 0) + categories.get('response', 0),
+                categories.get('other', 0)))
+
+            if args.sites:
+                for site in report['sites']:
+                    print('{:>24}{:>10.0f} KiB  {:<12} {}'.format('', site['size'], site['category'], site['site']))
+
+        dbsession.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Measures the time taken by ``ViewSetRouter`` to route a large number of viewsets, as happens when an application
+or a test suite starts.
+
+Usage::
+
+    python -m benchmarks.router_startup --viewsets 300 --repeat 5
+"""
+
+import argparse
+import time
+
+from pyramid.config import Configurator
+
+from pyramid_restful.decorators import detail_route, list_route
+from pyramid_restful.routers import ViewSetRouter
+from pyramid_restful.viewsets import ModelCRUDViewSet
+
+
+def make_viewsets(count):
+    """
+    Returns ``count`` distinct viewset classes, each with a decorated detail and list route.
+    """
+
+    viewsets = []
+
+    for i in range(count):
+        namespace = {
+            'lock': detail_route(methods=['post'])(lambda self, request, *args, **kwargs: None),
+            'recent': list_route()(lambda self, request, *args, **kwargs: None),
+        }
+
+        viewsets.append(type('ViewSet{}'.format(i), (ModelCRUDViewSet,), namespace))
+
+    return viewsets
+
+
+def run(count):
+    """
+    Routes ``count`` new viewsets with a real ``Configurator``.
+
+    :return: A tuple of the seconds spent in ``register()`` and in ``Configurator.commit()``.
+    """
+
+    viewsets = make_viewsets(count)
+    config = Configurator()
+    router = ViewSetRouter(config)
+
+    start = time.perf_counter()
+
+    for i, viewset in enumerate(viewsets):
+        router.register('resource{}'.format(i), viewset, 'resource{}'.format(i))
+
+    registered = time.perf_counter()
+    config.commit()
+    committed = time.perf_counter()
+
+    return registered - start, committed - registered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--viewsets', type=int, default=300, help='Number of viewsets to route.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs, the best run is reported.')
+    args = parser.parse_args()
+
+    results = [run(args.viewsets) for _ in range(args.repeat)]
+    register, commit = min(results, key=sum)
+
+    print('viewsets: {}'.format(args.viewsets))
+    print('register: {:.1f} ms'.format(register * 1000))
+    print('commit:   {:.1f} ms'.format(commit * 1000))
+    print('total:    {:.1f} ms'.format((register + commit) * 1000))
+
+
+if __name__ == '__main__':
+    main()
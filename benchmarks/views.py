@@ -0,0 +1,133 @@
+"""
+Measures the latency, memory allocations and SQL statements of the generic views for tables of increasing size.
+
+Usage::
+
+    python -m benchmarks.views --rows 1000 10000 100000 --repeat 20
+    python -m benchmarks.views --json before.json
+    python -m benchmarks.views --compare before.json
+"""
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+
+from webtest import TestApp
+
+from pyramid_restful.instrumentation import RequestProfile
+
+from .fixtures import make_app, make_engine, make_session_factory
+
+#: The name, method, url and body of each measured request.
+SCENARIOS = [
+    ('list', 'GET', '/products/', None),
+    ('list field filter', 'GET', '/products/?filter[category]=c3', None),
+    ('list search filter', 'GET', '/products/?search[name]=product 12', None),
+    ('list order filter', 'GET', '/products/?order[price]=desc', None),
+    ('list link header', 'GET', '/link-products/?page=2', None),
+    ('list expand', 'GET', '/products/?expand=supplier', None),
+    ('retrieve', 'GET', '/products/1/', None),
+    ('create', 'POST', '/products/', {'name': 'new', 'category': 'c1', 'price': 999, 'supplier_id': 1}),
+]
+
+
+def request(app, method, url, body):
+    if method == 'POST':
+        return app.post_json(url, body)
+
+    return app.get(url)
+
+
+def measure(app, dbsession, scenario, repeat):
+    """
+    Runs a scenario ``repeat`` times. Changes are rolled back after each request.
+
+    :return: A dictionary of the median and minimum latency in milliseconds, the peak memory allocated in KiB and
+             the number of SQL statements.
+    """
+
+    name, method, url, body = scenario
+    timings = []
+
+    request(app, method, url, body)  # Warm up
+    dbsession.rollback()
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        request(app, method, url, body)
+        timings.append(time.perf_counter() - start)
+        dbsession.rollback()
+
+    with RequestProfile(None, None) as profile:
+        tracemalloc.start()
+        request(app, method, url, body)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    dbsession.rollback()
+
+    return {
+        'median': statistics.median(timings) * 1000,
+        'min': min(timings) * 1000,
+        'peak': peak / 1024,
+        'queries': profile.sql_count,
+    }
+
+
+def run(rows, repeat, scenarios=SCENARIOS):
+    """
+    Builds a database of ``rows`` products and measures each scenario.
+
+    :return: A dictionary of scenario name to its measurements.
+    """
+
+    engine = make_engine(rows)
+    dbsession = make_session_factory(engine)()
+    app = TestApp(make_app(lambda request: dbsession))
+
+    try:
+        return {scenario[0]: measure(app, dbsession, scenario, repeat) for scenario in scenarios}
+    finally:
+        dbsession.close()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help='Table sizes to measure.')
+    parser.add_argument('--repeat', type=int, default=10, help='Number of timed requests per scenario.')
+    parser.add_argument('--scenario', action='append', help='Only run the scenarios with this name.')
+    parser.add_argument('--json', help='Write the results to this file.')
+    parser.add_argument('--compare', help='Show the change of the median latency from the results in this file.')
+    args = parser.parse_args()
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario[0] in args.scenario]
+    baseline = {}
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print('{:>8}  {:<20} {:>10} {:>10} {:>10} {:>8} {:>8}'.format(
+        'rows', 'scenario', 'median ms', 'min ms', 'peak KiB', 'queries', 'change'))
+
+    for rows in args.rows:
+        results[str(rows)] = run(rows, args.repeat, scenarios)
+
+        for name, result in results[str(rows)].items():
+            before = baseline.get(str(rows), {}).get(name)
+            change = '{:+.0%}'.format(result['median'] / before['median'] - 1) if before else ''
+
+            print('{:>8}  {:<20} {:>10.2f} {:>10.2f} {:>10.0f} {:>8} {:>8}'.format(
+                rows, name, result['median'], result['min'], result['peak'], result['queries'], change))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+import json
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pyramid.httpexceptions import HTTPBadRequest, HTTPException
+from pyramid.request import Request
+from pyramid.response import Response
+
+from .exceptions import ImproperlyConfigured
+from .views import APIView
+
+__all__ = ['BatchView']
+
+
+class BatchView(APIView):
+    """
+    Executes many API calls in a single HTTP request. The body is a JSON array of sub-requests, each an object with
+    a ``method``, a ``url`` relative to the application and optional ``headers`` and JSON ``body``. They are dispatched
+    to the application's views as Pyramid subrequests, in order, and the response is an array holding the ``status``,
+    ``headers`` and ``body`` of each.
+
+    Sub-requests share the batch request's ``dbsession`` and transaction, and its authentication headers. If
+    ``parallel`` is enabled and every sub-request is a ``GET`` or ``HEAD``, they run on a thread pool instead, each
+    with its own session from ``create_session()``, since sessions can not be shared between threads.
+
+    Errors raised as ``HTTPException`` are reported as the status and JSON body of their sub-request, as are
+    invalid items. Any other error fails the whole batch, so a failed write can not be committed along with the
+    others.
+
+    Register it with ``ViewSetRouter.register_batch()``.
+    """
+
+    #: The maximum number of sub-requests accepted in a batch.
+    max_requests = 50
+    #: The number of threads running read-only batches in parallel.
+    max_workers = 8
+    #: Run read-only batches in parallel, see ``create_session()``.
+    parallel = False
+    #: Headers of the batch request copied to every sub-request.
+    inherited_headers = ('Authorization', 'Cookie')
+    #: Methods that do not write and can run in parallel.
+    read_only_methods = ('GET', 'HEAD')
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def get_executor(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=cls.max_workers, thread_name_prefix='restful-batch')
+
+        return cls._executor
+
+    def post(self, request, *args, **kwargs):
+        items = request.json_body  # todo, hardcoded json here, need to implement parsers
+
+        if not isinstance(items, list):
+            raise HTTPBadRequest(detail='The body must be a JSON array of requests.')
+
+        if len(items) > self.max_requests:
+            raise HTTPBadRequest(detail='A batch can not hold more than {} requests.'.format(self.max_requests))
+
+        subrequests = [self.build_subrequest(item) for item in items]
+        read_only = all(isinstance(sub, Request) and sub.method in self.read_only_methods for sub in subrequests)
+
+        if read_only and self.parallel and len(subrequests) > 1:
+            results = list(self.get_executor().map(self.invoke_in_session, subrequests))
+        else:
+            results = [self.invoke(sub) if isinstance(sub, Request) else self.get_result(sub) for sub in subrequests]
+
+        return Response(json=results)  # todo, hardcoded json here, need to implement parsers
+
+    def build_subrequest(self, item):
+        """
+        Returns the ``Request`` described by a batch item, or the ``HTTPBadRequest`` reported for an invalid item.
+        """
+
+        try:
+            return self.get_subrequest(item)
+        except HTTPBadRequest as exc:
+            return exc
+
+    def get_subrequest(self, item):
+        """
+        Returns the ``Request`` described by a batch item.
+
+        :raises HTTPBadRequest: If the item is invalid.
+        """
+
+        if not isinstance(item, dict) or not isinstance(item.get('url'), str) or not item['url'].startswith('/'):
+            raise HTTPBadRequest(detail='Each request must be an object with a url relative to the application.')
+
+        if item['url'].split('?')[0] == self.request.path_info:
+            raise HTTPBadRequest(detail='Batches can not be nested.')
+
+        method = item.get('method', 'GET')
+        item_headers = item.get('headers') or {}
+
+        if not isinstance(method, str):
+            raise HTTPBadRequest(detail='The method of a request must be a string.')
+
+        if not isinstance(item_headers, dict) or not all(
+            isinstance(name, str) and isinstance(val, str) for name, val in item_headers.items()
+        ):
+            raise HTTPBadRequest(detail='The headers of a request must be an object of strings.')
+
+        if item.get('body') is not None and not isinstance(item['body'], (dict, list)):
+            raise HTTPBadRequest(detail='The body of a request must be a JSON object or array.')
+
+        headers = {name: val for name, val in self.request.headers.items() if name in self.inherited_headers}
+        headers.update(item_headers)
+        subrequest = Request.blank(item['url'], method=method.upper(), headers=headers,
+                                   base_url=self.request.application_url)
+
+        if item.get('body') is not None:
+            subrequest.body = json.dumps(item['body']).encode('utf-8')
+            subrequest.content_type = 'application/json'
+
+        return subrequest
+
+    def invoke(self, subrequest, dbsession=None):
+        """
+        Dispatches ``subrequest`` to the application and returns its result. The sub-request uses ``dbsession`` or
+        the batch request's session.
+        """
+
+        if dbsession is None:
+            dbsession = getattr(self.request, 'dbsession', None)
+
+        if dbsession is not None:
+            # Takes precedence over a ``dbsession`` request method added with ``reify=True``.
+            subrequest.dbsession = dbsession
+
+        try:
+            # Tweens are skipped, the batch request's transaction and error handling apply to every sub-request.
+            response = self.request.invoke_subrequest(subrequest, use_tweens=False)
+        except HTTPException as exc:
+            response = exc
+
+        return self.get_result(response)
+
+    def create_session(self):
+        """
+        Returns a new SQLAlchemy session for a sub-request run in parallel. It is closed once the sub-request
+        completes. Defaults to calling the ``dbsession_factory`` of the application's registry, as configured by the
+        Pyramid SQLAlchemy scaffold.
+        """
+
+        factory = self.request.registry.get('dbsession_factory')
+
+        if factory is None:
+            raise ImproperlyConfigured("'{}' should override `create_session()` to run batches in parallel."
+                                       .format(self.__class__.__name__))
+
+        return factory()
+
+    def invoke_in_session(self, subrequest):
+        dbsession = self.create_session()
+
+        try:
+            return self.invoke(subrequest, dbsession)
+        finally:
+            dbsession.close()
+
+    def get_result(self, response):
+        if isinstance(response, HTTPException):
+            # Exceptions render their body when called as an application, with the format the client accepts.
+            environ = dict(self.request.environ, HTTP_ACCEPT='application/json')
+            response.prepare(environ)
+
+        if response.content_type == 'application/json' and response.body:
+            body = json.loads(response.body.decode(response.charset or 'utf-8'))
+        else:
+            body = response.body.decode(response.charset or 'utf-8', 'replace') if response.body else None
+
+        return {
+            'status': response.status_code,
+            'headers': {name: val for name, val in response.headerlist if name != 'Content-Length'},
+            'body': body,
+        }
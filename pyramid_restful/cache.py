@@ -0,0 +1,277 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from collections import OrderedDict
+
+from pyramid.response import Response
+
+__all__ = ['LRUStore', 'SQLiteStore', 'StoredResponseMixin', 'QueryCache']
+
+
+class LRUStore:
+    """
+    A bounded, thread safe, in-process store. The least recently used entries are evicted once ``maxsize``
+    entries are held.
+
+    :param maxsize: The maximum number of entries held by the store.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return None
+
+            if expires is not None and expires < time.time():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires = time.time() + timeout if timeout is not None else None
+
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteStore:
+    """
+    A store backed by a local SQLite database. Useful for sharing entries between the worker processes of
+    a single host. Values must be JSON serializable.
+
+    :param path: Path to the SQLite database file.
+    :param table: The name of the table used to hold the entries. Created if it does not exist.
+    """
+
+    def __init__(self, path, table='prf_cache'):
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS {} (key TEXT PRIMARY KEY, value TEXT, expires REAL)'.format(self.table)
+        )
+
+    @property
+    def connection(self):
+        """
+        SQLite connections can not be shared between threads, so each thread opens its own.
+        """
+
+        if not hasattr(self._local, 'connection'):
+            self._local.connection = sqlite3.connect(self.path, isolation_level=None)
+
+        return self._local.connection
+
+    def get(self, key):
+        row = self.connection.execute(
+            'SELECT value, expires FROM {} WHERE key = ?'.format(self.table), (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        value, expires = row
+
+        if expires is not None and expires < time.time():
+            self.delete(key)
+            return None
+
+        return json.loads(value)
+
+    def set(self, key, value, timeout=None):
+        expires = time.time() + timeout if timeout is not None else None
+
+        self.connection.execute(
+            'INSERT OR REPLACE INTO {} (key, value, expires) VALUES (?, ?, ?)'.format(self.table),
+            (key, json.dumps(value), expires)
+        )
+
+    def delete(self, key):
+        self.connection.execute('DELETE FROM {} WHERE key = ?'.format(self.table), (key,))
+
+    def clear(self):
+        self.connection.execute('DELETE FROM {}'.format(self.table))
+
+
+class StoredResponseMixin:
+    """
+    Keys requests and converts responses to and from JSON serializable values, for the classes storing responses
+    between requests: ``QueryCache``, ``IdempotencyKeys`` and ``RequestCoalescer``. Requests are keyed by the view,
+    the request's path, the parts returned by ``get_key_parts()`` and the user making the request. Their stores are
+    class attributes so they are shared between requests, subclass them to configure the stores.
+    """
+
+    #: The response headers that are stored along with the body. ``None`` stores every header.
+    stored_headers = None
+
+    def get_user_scope(self, request):
+        """
+        Override this if responses vary by something other than the authenticated user.
+        """
+
+        return getattr(request, 'authenticated_userid', None)
+
+    def get_key_parts(self, request, view):
+        """
+        Returns the JSON serializable parts of the key of the request, other than its view, path and user. Defaults to
+        the request's normalized query string.
+        """
+
+        return [sorted(request.params.items())]
+
+    def get_key(self, request, view):
+        parts = [view.__class__.__module__, view.__class__.__name__, request.path]
+        parts.extend(self.get_key_parts(request, view))
+        parts.append(self.get_user_scope(request))
+
+        return hashlib.sha1(json.dumps(parts, default=str).encode('utf-8')).hexdigest()
+
+    def dump_response(self, response):
+        """
+        :return: A JSON serializable dictionary holding the status, the ``stored_headers`` and the body of ``response``.
+        """
+
+        if self.stored_headers is None:
+            headers = [(name, val) for name, val in response.headerlist]
+        else:
+            headers = [(name, response.headers[name]) for name in self.stored_headers if name in response.headers]
+
+        return {
+            'status': response.status_code,
+            'headers': headers,
+            'body': response.body.decode('latin-1'),
+        }
+
+    def load_response(self, value):
+        """
+        :return: A new ``Response`` from a value returned by ``dump_response()``.
+        """
+
+        headerlist = [(name, val) for name, val in value['headers']]
+
+        return Response(body=value['body'].encode('latin-1'), status=value['status'], headerlist=headerlist)
+
+
+class QueryCache(StoredResponseMixin):
+    """
+    Caches the rendered responses of list and retrieve requests. Entries are keyed by the view, the request's
+    path and normalized query string and the user making the request. Each model has a generation token that is
+    part of the key. Replacing the token, which happens whenever a write is performed through one of the model
+    mixins, invalidates every response cached for the model.
+
+    **Usage**::
+
+        class UserCache(QueryCache):
+            backend = SQLiteStore('/var/run/myapp/cache.sqlite')
+            timeout = 60
+
+        class UserViewSet(ModelCRUDViewSet):
+            model = User
+            schema_class = UserSchema
+            cache_class = UserCache
+    """
+
+    #: Bounded in-process store consulted before the ``backend``.
+    local = LRUStore(maxsize=1024)
+    #: Optional store shared between processes, for example a ``SQLiteStore``.
+    backend = None
+    #: Number of seconds a response remains cached. ``None`` caches responses until they are invalidated.
+    timeout = 300
+    #: The response headers that are stored along with the body.
+    stored_headers = ('Content-Type', 'Link', 'X-Total-Count', 'ETag', 'Last-Modified')
+
+    def get_generation(self, model):
+        """
+        Returns the generation token of ``model``, creating one if it does not exist yet or has been evicted.
+        """
+
+        key = 'generation:{}.{}'.format(model.__module__, model.__name__)
+        store = self.backend or self.local
+        generation = store.get(key)
+
+        if generation is None:
+            generation = uuid.uuid4().hex
+            store.set(key, generation)
+
+        return generation
+
+    def invalidate(self, model):
+        """
+        Invalidates every response cached for ``model``.
+        """
+
+        key = 'generation:{}.{}'.format(model.__module__, model.__name__)
+        (self.backend or self.local).set(key, uuid.uuid4().hex)
+
+    def get_key_parts(self, request, view):
+        parts = super().get_key_parts(request, view)
+        parts.append(self.get_generation(view.model) if view.model is not None else None)
+
+        return parts
+
+    def get(self, request, view, key=None):
+        """
+        :param key: The key of the request, as returned by ``get_key()``.
+        :return: The cached ``Response`` for the request or ``None``.
+        """
+
+        if key is None:
+            key = self.get_key(request, view)
+
+        value = self.local.get(key)
+
+        if value is None and self.backend is not None:
+            value = self.backend.get(key)
+
+            if value is not None:
+                self.local.set(key, value, self.timeout)
+
+        if value is None:
+            return None
+
+        return self.load_response(value)
+
+    def set(self, request, view, response, key=None):
+        """
+        :param key: The key computed when the request missed the cache. Pass it so a response built from rows loaded
+            before an invalidation is stored under the previous generation, where it is never read, rather than
+            under the current one.
+        """
+
+        if key is None:
+            key = self.get_key(request, view)
+
+        value = self.dump_response(response)
+
+        self.local.set(key, value, self.timeout)
+
+        if self.backend is not None:
+            self.backend.set(key, value, self.timeout)
@@ -0,0 +1,166 @@
+import os
+import tempfile
+import threading
+import time
+
+from .cache import SQLiteStore, StoredResponseMixin
+
+__all__ = ['RequestCoalescer', 'FileLockCoalescer']
+
+
+class Flight:
+    """
+    A request in flight, followed by the identical requests waiting for its response.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+class RequestCoalescer(StoredResponseMixin):
+    """
+    Coalesces identical list and retrieve requests running concurrently in a worker. The first request runs and the
+    requests arriving while it is in flight wait for its response instead of querying the database themselves.
+    Requests are identical when they share the view, the request's path and normalized query string and the user
+    making the request. A request waiting longer than ``timeout``, or whose leader failed, runs on its own.
+
+    **Usage**::
+
+        class ProductViewSet(ModelCRUDViewSet):
+            model = Product
+            schema_class = ProductSchema
+            coalesce_class = RequestCoalescer
+    """
+
+    #: Number of seconds a request waits for the identical request in flight before running on its own.
+    timeout = 10
+
+    _flights = {}
+    _flights_lock = threading.Lock()
+
+    def run(self, request, view, func):
+        """
+        :param func: Called without arguments to build the response of the request.
+        :return: The response of ``func``, or a copy of the response of the identical request in flight.
+        """
+
+        key = self.get_key(request, view)
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+
+            if leader:
+                flight = self._flights[key] = Flight()
+
+        if not leader:
+            if flight.done.wait(self.timeout) and flight.value is not None:
+                return self.load_response(flight.value)
+
+            return func()
+
+        try:
+            response = self.lead(key, func)
+
+            if response.status_code < 500:
+                flight.value = self.dump_response(response)
+
+            return response
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+
+            flight.done.set()
+
+    def lead(self, key, func):
+        """
+        Builds the response of the first of the identical requests in flight in the worker.
+        """
+
+        return func()
+
+
+class FileLockCoalescer(RequestCoalescer):
+    """
+    A ``RequestCoalescer`` that also coalesces identical requests between the worker processes of a host. Requests
+    are coalesced in each worker first, then the leaders of each worker take an exclusive file lock. The first to
+    hold it builds the response and stores it in a ``SQLiteStore``, the others wait for the lock and reuse the stored
+    response. Lock files are shared by the keys with the same remainder modulo ``lock_stripes``, so requests to
+    different urls occasionally wait for each other. Requires ``fcntl``, which is not available on Windows.
+
+    **Usage**::
+
+        class ProductCoalescer(FileLockCoalescer):
+            directory = '/var/run/myapp/coalescing'
+    """
+
+    #: The directory holding the lock files and the stored responses, shared by the workers of the host.
+    directory = os.path.join(tempfile.gettempdir(), 'restful-coalescing')
+    #: The number of lock files.
+    lock_stripes = 256
+    #: Number of seconds between attempts to take a lock held by another worker.
+    poll_interval = 0.01
+    #: Number of seconds a response is stored for the workers waiting for it.
+    result_timeout = 60
+
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    def get_store(self):
+        with self._stores_lock:
+            if self.directory not in self._stores:
+                os.makedirs(self.directory, exist_ok=True)
+                self._stores[self.directory] = SQLiteStore(os.path.join(self.directory, 'responses.sqlite'))
+
+        return self._stores[self.directory]
+
+    def acquire(self, lock):
+        """
+        Takes the exclusive lock on the open file ``lock``, waiting at most ``timeout`` seconds.
+
+        :return: Whether the lock is held.
+        """
+
+        import fcntl
+
+        deadline = time.time() + self.timeout
+
+        while True:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.time() >= deadline:
+                    return False
+
+                time.sleep(self.poll_interval)
+
+    def lead(self, key, func):
+        import fcntl
+
+        arrived = time.time()
+        store = self.get_store()
+        path = os.path.join(self.directory, '{}.lock'.format(int(key, 16) % self.lock_stripes))
+
+        with open(path, 'a') as lock:
+            if not self.acquire(lock):
+                return func()
+
+            try:
+                # A response stored after this request arrived was built while it waited for the lock.
+                value = store.get(key)
+
+                if value is not None and value['finished'] > arrived:
+                    return self.load_response(value)
+
+                response = func()
+
+                if response.status_code < 500:
+                    value = self.dump_response(response)
+                    value['finished'] = time.time()
+                    store.set(key, value, self.result_timeout)
+
+                return response
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
@@ -0,0 +1,83 @@
+import hashlib
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+__all__ = ['make_etag', 'http_date', 'is_not_modified']
+
+
+def make_etag(*parts, weak=True):
+    """
+    Build an entity tag from the given values.
+
+    :param parts: Values identifying the version of a representation. Must have a stable ``str()``.
+    :param weak: If ``True`` a weak validator is returned.
+    :return: A quoted entity tag suitable for the ``ETag`` header.
+    """
+
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return '{}"{}"'.format('W/' if weak else '', digest)
+
+
+def _as_utc(value):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+
+    return value.astimezone(timezone.utc)
+
+
+def http_date(value):
+    """
+    Format a datetime as an HTTP date. Naive datetimes are assumed to be in UTC.
+    """
+
+    return format_datetime(_as_utc(value), usegmt=True)
+
+
+def _parse_http_date(value):
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_etags(header):
+    return [tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip() for tag in header.split(',')]
+
+
+def is_not_modified(request, etag=None, last_modified=None):
+    """
+    Evaluate the ``If-None-Match`` and ``If-Modified-Since`` headers of a request against the validators of the
+    current representation. As required by RFC 7232, ``If-Modified-Since`` is ignored if ``If-None-Match``
+    is present.
+
+    :param request: The request being processed.
+    :param etag: The entity tag of the current representation.
+    :param last_modified: The last modification of the current representation as a datetime or an HTTP date.
+    :return: ``True`` if the client's copy is still current and a 304 can be sent.
+    """
+
+    if_none_match = request.headers.get('If-None-Match')
+
+    if if_none_match is not None:
+        if etag is None:
+            return False
+
+        tags = _parse_etags(if_none_match)
+        return '*' in tags or _parse_etags(etag)[0] in tags
+
+    if_modified_since = request.headers.get('If-Modified-Since')
+
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    since = _parse_http_date(if_modified_since)
+
+    if not isinstance(last_modified, datetime):
+        last_modified = _parse_http_date(last_modified)
+
+    if since is None or last_modified is None:
+        return False
+
+    # HTTP dates have a resolution of one second.
+    return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
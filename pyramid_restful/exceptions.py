@@ -4,3 +4,11 @@ class ImproperlyConfigured(Exception):
     """
 
     pass
+
+
+class NPlusOneError(Exception):
+    """
+    A request ran the same query once per serialized object
+    """
+
+    pass
@@ -141,3 +141,18 @@ class ExpandableViewMixin:
                             query = query.options(*options)
 
         return query
+
+    def get_query_shape(self):
+        """
+        Extends the query shape with the requested expansions as each one may alter the query's joins and options.
+        """
+
+        shape = super(ExpandableViewMixin, self).get_query_shape()
+
+        if shape is None or not self.expandable_fields:
+            return shape
+
+        requested_expands = parse_requested_expands(self.schema_class.QUERY_KEY, self.request)
+        expands = tuple(sorted(set(requested_expands) & set(self.expandable_fields.keys())))
+
+        return shape + (expands,)
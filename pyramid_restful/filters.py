@@ -1,4 +1,4 @@
-from sqlalchemy import or_, ARRAY, func
+from sqlalchemy import or_, ARRAY, func, bindparam
 
 
 class BaseFilter:
@@ -18,6 +18,18 @@ class BaseFilter:
 
         raise NotImplementedError('.filter_query() must be implemented.')  # pragma: no cover
 
+    def get_query_shape(self, request, view):
+        """
+        Override this if the filter can describe the structure of the SQL it adds to a query independently of the
+        values it binds. Used by ``GenericAPIView`` to reuse compiled statements across requests.
+
+        :param request: The request being processed.
+        :param view: The view the filter is being applied to.
+        :return: A hashable value, or ``None`` if the statements built by the filter can not be cached.
+        """
+
+        return None
+
 
 class AttributeBaseFilter(BaseFilter):
     """
@@ -74,6 +86,18 @@ class AttributeBaseFilter(BaseFilter):
 
         return self.apply_filter(query, filter_list)
 
+    def get_query_shape(self, request, view):
+        """
+        The query string keys handled by the filter along with the number of values provided for each key.
+        Values are sent to the database as bind parameters, so they do not change the shape of the query.
+        """
+
+        querystring_params = self.parse_query_string(request.params)
+
+        return tuple(sorted(
+            (key, None if val is None else len(val.split(','))) for key, val in querystring_params.items()
+        ))
+
     def build_filter_list(self, querystring_params, query, view):
         filterable_fields = getattr(view, self.view_attribute_name, None)
 
@@ -139,6 +163,15 @@ class AttributeBaseFilter(BaseFilter):
 
         raise NotImplementedError
 
+    def build_bindparam(self, field, value, index=0):
+        """
+        Wraps ``value`` in a bind parameter whose name is stable across requests, so statements compiled for one
+        request can be reused with the values of another.
+        """
+
+        name = '{}_{}_{}_{}'.format(self.query_string_lookup, field.parent.class_.__name__, field.name, index)
+        return bindparam(name, value)
+
 
 class FieldFilter(AttributeBaseFilter):
     """
@@ -164,7 +197,7 @@ class FieldFilter(AttributeBaseFilter):
         if value is None:
             return field == None
 
-        return or_(*[field == v for v in value.split(',')])
+        return or_(*[field == self.build_bindparam(field, v, i) for i, v in enumerate(value.split(','))])
 
 
 class SearchFilter(AttributeBaseFilter):
@@ -188,12 +221,19 @@ class SearchFilter(AttributeBaseFilter):
         if value is None:
             return field == None
 
+        values = enumerate(value.split(','))
+
         if issubclass(field.type.__class__, ARRAY):
-            return or_(*[field.any(v.lower()) for v in value.split(',')])
+            return or_(*[field.any(self.build_bindparam(field, v.lower(), i)) for i, v in values])
 
-        return or_(*[func.lower(field).like('%{}%'.format(v.lower())) for v in value.split(',')])
+        return or_(*[
+            func.lower(field).like(self.build_bindparam(field, '%{}%'.format(v.lower()), i)) for i, v in values
+        ])
 
     def apply_filter(self, query, filter_list):
+        if not filter_list:
+            return query
+
         return query.filter(or_(*filter_list))
 
 
@@ -213,6 +253,11 @@ class OrderFilter(AttributeBaseFilter):
     query_string_lookup = 'order'
     view_attribute_name = 'order_fields'
 
+    def get_query_shape(self, request, view):
+        querystring_params = self.parse_query_string(request.params)
+        # The order of the keys is significant, so unlike filters they are not sorted.
+        return tuple((key, val == 'desc') for key, val in querystring_params.items())
+
     def build_comparision(self, field, value):
         return field if value != 'desc' else field.desc()
 
@@ -1,12 +1,57 @@
-from pyramid.httpexceptions import HTTPNotFound
+import hashlib
 
+from datetime import datetime
+
+from pyramid.httpexceptions import HTTPNotFound, HTTPNotModified
+from pyramid.response import Response
+
+from sqlalchemy import bindparam, func, distinct, exists
+from sqlalchemy.ext import baked
 from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.sql import visitors
 
 from pyramid_restful.settings import api_settings
 
+from .conditional import make_etag, http_date, is_not_modified
+from .tasks import after_commit, on_commit
 from .views import APIView
 from . import mixins
 
+#: Compiled statements shared by all views, keyed by query shape.
+statement_cache = baked.bakery()
+
+
+def get_bind_params(query):
+    """
+    Collect the values of the bind parameters used by ``query``.
+
+    :param query: SQLAlchemy ``query``.
+    :return: Dictionary of bind parameter name to value or ``None`` if the query binds anonymous parameters,
+             or uses LIMIT/OFFSET, whose values can't be replaced once the statement has been compiled.
+    """
+
+    if query._limit is not None or query._offset is not None:
+        return None
+
+    params = dict(query._params)
+    anonymous = []
+
+    def visit_bindparam(bind):
+        if bind.unique:
+            anonymous.append(bind)
+        else:
+            params.setdefault(bind.key, bind.effective_value)
+
+    clauses = [query._criterion, query._having]
+    clauses += list(query._order_by or ()) + list(query._group_by or ()) + list(query._from_obj)
+    clauses += [getattr(entity, 'column', None) for entity in query._entities]
+
+    for clause in clauses:
+        if clause is not None:
+            visitors.traverse(clause, {}, {'bindparam': visit_bindparam})
+
+    return None if anonymous else params
+
 
 class GenericAPIView(APIView):
     """
@@ -31,6 +76,35 @@ class GenericAPIView(APIView):
     filter_classes = ()
     #: The name of the primary key field in the model used by the view.
     lookup_field = 'id'
+    #: Reuse compiled SQL statements for requests that produce queries of the same shape. See ``get_query_shape()``.
+    cache_statements = False
+    #: Optional ``QueryCache`` class used to cache the responses of list and retrieve requests.
+    cache_class = None
+    #: Optional ``RequestCoalescer`` class used to share the response of a list or retrieve request with the identical
+    #: requests arriving while it is in flight.
+    coalesce_class = None
+    #: The name of a model column that changes whenever an object is written, such as a version counter or an
+    #: ``updated_at`` timestamp. Enables ``ETag`` and ``Last-Modified`` headers and conditional requests.
+    etag_field = None
+    #: Generate ``ETag`` headers from a hash of the rendered body when ``etag_field`` is not set.
+    etag_from_body = False
+    #: Update and delete single objects with one ``UPDATE`` or ``DELETE`` statement instead of loading them first,
+    #: when the view has no object level permissions or custom ``perform_*`` hooks. See ``get_write_query()``.
+    load_free_writes = False
+    #: Answer create and update requests without a body, as if they sent ``Prefer: return=minimal``. Requests can
+    #: still ask for the body with ``Prefer: return=representation``.
+    return_minimal = False
+    #: Optional ``IdempotencyKeys`` class used to replay the responses of create requests retried with the same
+    #: ``Idempotency-Key`` header.
+    idempotency_class = None
+    #: Maps the url placeholders of parent routes to the columns of ``model`` referencing the parent, for example
+    #: ``{'user_id': Order.user_id}``. Used with ``NestedViewSetRouter`` to restrict ``get_query()`` to the parent's
+    #: children and to assign the parent to created objects.
+    parent_lookups = None
+    #: Respond with a 404 when the parent in the url does not exist, rather than an empty list.
+    verify_parent = False
+    #: The base name of the view's routes. Set by ``ViewSetRouter``, used to build ``Location`` headers.
+    basename = None
 
     def get_query(self):
         """
@@ -46,7 +120,58 @@ class GenericAPIView(APIView):
                 .format(self.__class__.__name__)
         )
 
-        return self.request.dbsession.query(self.model)
+        return self.filter_parent(self.request.dbsession.query(self.model))
+
+    def get_parent_lookups(self):
+        """
+        Returns a list of ``(column, value)`` for the ``parent_lookups`` present in the url.
+        """
+
+        url_kwargs = self.lookup_url_kwargs or {}
+
+        return [(column, url_kwargs[kwarg]) for kwarg, column in (self.parent_lookups or {}).items()
+                if kwarg in url_kwargs]
+
+    def filter_parent(self, query):
+        """
+        Restricts ``query`` to the children of the parents in the url.
+        """
+
+        for column, value in self.get_parent_lookups():
+            query = query.filter(column == bindparam('parent_{}'.format(column.key), value))
+
+        return query
+
+    def get_parent_values(self):
+        """
+        Returns the attributes assigning the parents in the url to a new object.
+        """
+
+        return {column.key: value for column, value in self.get_parent_lookups()}
+
+    def check_parent_exists(self):
+        """
+        Checks that the parents in the url exist when ``verify_parent`` is enabled. Only run when a query returns no
+        rows, or before objects are created, as the children of a parent prove it exists.
+
+        :raises HTTPNotFound: If a parent does not exist.
+        """
+
+        if not self.verify_parent:
+            return
+
+        for column, value in self.get_parent_lookups():
+            foreign_keys = column.property.columns[0].foreign_keys
+
+            assert foreign_keys, (
+                "'{}' `parent_lookups` column '{}' should have a foreign key to verify the parent."
+                    .format(self.__class__.__name__, column.key)
+            )
+
+            target = next(iter(foreign_keys)).column
+
+            if not self.request.dbsession.query(exists().where(target == value)).scalar():
+                raise HTTPNotFound()
 
     def get_object(self):
         """
@@ -57,7 +182,22 @@ class GenericAPIView(APIView):
         :return: An instance of the view's model.
         """
 
-        query = self.filter_query(self.get_query())
+        query = self.filter_query(self.get_query()).filter(self.get_lookup_clause())
+
+        try:
+            instance = self.bake_query(query, 'object').one()
+        except NoResultFound:
+            raise HTTPNotFound()
+
+        # May raise HTTPForbidden
+        self.check_object_permissions(self.request, instance)
+
+        return instance
+
+    def get_lookup_clause(self):
+        """
+        Returns the criterion used to look up the object the view is displaying.
+        """
 
         # If query joins more than one table and you need to base the lookup on something besides
         # an id field on the self.model, you can provide an alternative lookup as tuple of the model class
@@ -74,15 +214,196 @@ class GenericAPIView(APIView):
             lookup_col = getattr(self.lookup_field[0], self.lookup_field[1])
             lookup_val = self.lookup_url_kwargs[self.lookup_field[1]]
 
-        try:
-            instance = query.filter(lookup_col == lookup_val).one()
-        except NoResultFound:
+        return lookup_col == bindparam('lookup_{}'.format(lookup_col.key), lookup_val)
+
+    def get_write_query(self):
+        """
+        Returns a query matching only the object the view is displaying, so it can be written without being loaded.
+        Used when ``load_free_writes`` or ``allow_upsert`` is enabled. Returns ``None`` if the object has to be loaded
+        instead: when the view has object level permissions or the query joins other tables, which
+        ``Query.update()`` and ``Query.delete()`` do not support.
+        """
+
+        if self.has_object_permissions():
+            return None
+
+        query = self.filter_query(self.get_query())
+
+        if query._join_entities or query._from_obj:
+            return None
+
+        # False resets any ordering, update() and delete() refuse queries with an explicit order_by(None).
+        return query.filter(self.get_lookup_clause()).order_by(False)
+
+    def get_object_version(self):
+        """
+        Returns the value of ``etag_field`` for the object the view is displaying by selecting only that column.
+        Returns ``None`` if the request is neither conditional nor ``HEAD``, ``etag_field`` is not set or the view has
+        object level permissions, which require the object to be loaded.
+
+        :raises HTTPNotFound: If the object does not exist.
+        """
+
+        if not self.needs_version() or self.etag_field is None or self.has_object_permissions():
+            return None
+
+        query = self.filter_query(self.get_query()).filter(self.get_lookup_clause())
+        row = query.with_entities(getattr(self.model, self.etag_field)).first()
+
+        if row is None:
             raise HTTPNotFound()
 
-        # May raise HTTPForbidden
-        self.check_object_permissions(self.request, instance)
+        return row[0]
 
-        return instance
+    def get_list_version(self, query, data=None):
+        """
+        Returns a tuple of the greatest value of ``etag_field`` and the number of rows matched by ``query``. Together
+        they change whenever a row matched by the query is written, added or removed. When the rows are already
+        loaded pass them as ``data`` and the version is computed without querying the database. Otherwise a single
+        aggregate query is run, only if the request is conditional or ``HEAD``. Returns ``None`` if ``etag_field`` is
+        not set.
+
+        :param query: The filtered query of the list.
+        :param data: Optional, the rows returned by ``query``.
+        """
+
+        if self.etag_field is None:
+            return None
+
+        if data is not None:
+            values = [getattr(row, self.etag_field) for row in data]
+            values = [value for value in values if value is not None]
+
+            return max(values) if values else None, len(set(data))
+
+        if not self.needs_version():
+            return None
+
+        pk = self.model.__mapper__.primary_key[0]
+        columns = func.max(getattr(self.model, self.etag_field)), func.count(distinct(pk))
+        row = query.with_entities(*columns).order_by(None).one()
+
+        return row[0], row[1]
+
+    def get_list_count(self, query):
+        """
+        Returns the number of rows matched by ``query`` with a single count query.
+
+        :param query: The filtered query of the list.
+        """
+
+        pk = self.model.__mapper__.primary_key[0]
+
+        return query.with_entities(func.count(distinct(pk))).order_by(None).scalar()
+
+    def needs_version(self):
+        """
+        Returns ``True`` if the version of the represented objects is needed before they are loaded, to answer a
+        conditional request or a ``HEAD`` request, which only receives the headers.
+        """
+
+        if self.request.method == 'HEAD':
+            return True
+
+        return 'If-None-Match' in self.request.headers or 'If-Modified-Since' in self.request.headers
+
+    def get_validators(self, version=None, body=None):
+        """
+        Returns the ``ETag`` and ``Last-Modified`` headers of a representation. The entity tag is derived from
+        ``version`` when ``etag_field`` is set, otherwise from the rendered ``body`` if ``etag_from_body`` is set.
+
+        :param version: The value of ``etag_field`` for the represented object or the tuple returned by
+                        ``get_list_version()`` for lists.
+        :param body: The rendered body of the response.
+        :return: Dictionary of headers, empty if no validators are configured.
+        """
+
+        validators = {}
+
+        if self.etag_field is not None and version is not None:
+            parts = [self.__class__.__name__, self.request.path, sorted(self.request.params.items()), version]
+            validators['ETag'] = make_etag(*parts)
+            modified = version[0] if isinstance(version, tuple) else version
+
+            if isinstance(modified, datetime):
+                validators['Last-Modified'] = http_date(modified)
+        elif self.etag_from_body and body is not None:
+            validators['ETag'] = make_etag(hashlib.md5(body).hexdigest(), weak=False)
+
+        return validators
+
+    def get_not_modified_response(self, validators):
+        """
+        Returns a 304 response if the request's conditional headers match the given validators, otherwise `None`.
+        """
+
+        if not validators or self.request.method not in ('GET', 'HEAD'):
+            return None
+
+        if is_not_modified(self.request, validators.get('ETag'), validators.get('Last-Modified')):
+            return HTTPNotModified(headers=validators)
+
+        return None
+
+    def get_head_response(self, validators):
+        """
+        Returns the response to a ``HEAD`` request, with the given validators and no body. ``Content-Length`` is
+        omitted since the body is never rendered. Validators derived from the body with ``etag_from_body`` are not
+        available.
+        """
+
+        response = Response(content_type='application/json')
+        response.headers.update(validators)
+        response.content_length = None
+
+        return response
+
+    def prefers_minimal_return(self):
+        """
+        Returns ``True`` if create and update requests should be answered without serializing the written objects,
+        either because the request sent ``Prefer: return=minimal`` or because ``return_minimal`` is enabled and
+        the request did not send ``Prefer: return=representation``.
+        """
+
+        for preference in self.request.headers.get('Prefer', '').split(','):
+            token = preference.split(';')[0].replace(' ', '').lower()
+
+            if token == 'return=minimal':
+                return True
+            elif token == 'return=representation':
+                return False
+
+        return self.return_minimal
+
+    def get_minimal_response(self, status, instance=None):
+        """
+        Returns a response without a body for a write. Responses to creations include a ``Location`` header when
+        the view was registered by ``ViewSetRouter``.
+
+        :param status: The status code of the response, 201 or 204.
+        :param instance: Optional, the written instance or the dict of its written fields.
+        """
+
+        response = Response(status=status)
+        # The body is empty, so it has no content type.
+        response.content_type = None
+
+        if status == 201 and instance is not None and self.basename and isinstance(self.lookup_field, str):
+            if isinstance(instance, dict):
+                lookup_val = instance.get(self.lookup_field)
+            else:
+                lookup_val = getattr(instance, self.lookup_field, None)
+
+            if lookup_val is not None:
+                url_kwargs = {kwarg: val for kwarg, val in (self.lookup_url_kwargs or {}).items()
+                              if kwarg in (self.parent_lookups or {})}
+                url_kwargs[self.lookup_field] = lookup_val
+                response.location = self.request.route_url('{}-detail'.format(self.basename), **url_kwargs)
+
+        if 'return=minimal' in self.request.headers.get('Prefer', '').replace(' ', '').lower():
+            response.headers['Preference-Applied'] = 'return=minimal'
+
+        return response
 
     def get_schema_class(self):
         """
@@ -126,11 +447,58 @@ class GenericAPIView(APIView):
         Filter the given query using the filter classes specified on the view if any are specified.
         """
 
-        for filter_class in list(self.filter_classes):
-            query = filter_class().filter_query(self.request, query, self)
+        with self.timed('filter'):
+            for filter_class in list(self.filter_classes):
+                query = filter_class().filter_query(self.request, query, self)
 
         return query
 
+    def get_query_shape(self):
+        """
+        Returns a hashable fingerprint of the SQL structure built for the current request, or ``None`` if the
+        statement should not be cached. The default shape is made up of the view class, the ``parent_lookups``
+        present in the url and the shape reported by each of the view's filter classes. If ``get_query()`` builds
+        different SQL depending on the incoming request you must extend the shape with whatever drives those
+        differences.
+        """
+
+        url_kwargs = self.lookup_url_kwargs or {}
+        parents = tuple(sorted(kwarg for kwarg in (self.parent_lookups or {}) if kwarg in url_kwargs))
+        shape = [self.__class__, parents]
+
+        for filter_class in list(self.filter_classes):
+            filter_shape = filter_class().get_query_shape(self.request, self)
+
+            if filter_shape is None:
+                return None
+
+            shape.append((filter_class, filter_shape))
+
+        return tuple(shape)
+
+    def bake_query(self, query, *args):
+        """
+        When ``cache_statements`` is enabled, return a baked result for ``query`` that reuses the statement compiled
+        for the first query with the same shape, binding only the values of the current request. Otherwise the
+        query is returned untouched. Queries holding anonymous bind parameters are never cached, so values in your
+        own ``get_query()`` should be bound with ``sqlalchemy.bindparam`` to benefit from the cache.
+
+        :param query: SQLAlchemy ``query``.
+        :param args: Extra hashable values to distinguish statements built by the same view.
+        :return: An object supporting ``all()``, ``one()``, ``first()`` and ``count()``.
+        """
+
+        if not self.cache_statements:
+            return query
+
+        shape = self.get_query_shape()
+        params = get_bind_params(query)
+
+        if shape is None or params is None:
+            return query
+
+        return statement_cache(lambda session: query, shape + args)(self.request.dbsession).params(params)
+
     @property
     def paginator(self):
         """
@@ -145,6 +513,134 @@ class GenericAPIView(APIView):
 
         return self._paginator
 
+    @property
+    def cache(self):
+        """
+        The cache instance associated with the view, or `None`.
+        """
+
+        if not hasattr(self, '_cache'):
+            if self.cache_class is None:
+                self._cache = None
+            else:
+                self._cache = self.cache_class()
+
+        return self._cache
+
+    def get_cached_response(self):
+        """
+        Return the cached response for the request or `None` if caching is disabled or nothing is cached.
+        """
+
+        if self.cache is None or self.request.method != 'GET':
+            return None
+
+        # The key holds the model's generation when the rows are read, a write committed meanwhile invalidates it.
+        self._cache_key = self.cache.get_key(self.request, self)
+
+        return self.cache.get(self.request, self, self._cache_key)
+
+    def cache_response(self, response):
+        """
+        Store a successful response to a GET request in the cache, if caching is enabled.
+        """
+
+        if self.cache is not None and self.request.method == 'GET' and response.status_code == 200:
+            self.cache.set(self.request, self, response, getattr(self, '_cache_key', None))
+
+        return response
+
+    @property
+    def coalescer(self):
+        """
+        The request coalescer instance associated with the view, or `None`.
+        """
+
+        if not hasattr(self, '_coalescer'):
+            if self.coalesce_class is None:
+                self._coalescer = None
+            else:
+                self._coalescer = self.coalesce_class()
+
+        return self._coalescer
+
+    def coalesce(self, func):
+        """
+        Return the response built by ``func``. When coalescing is enabled, identical GET requests arriving while
+        ``func`` runs wait for its response rather than calling ``func`` themselves.
+        """
+
+        if self.coalescer is None or self.request.method != 'GET':
+            return func()
+
+        return self.coalescer.run(self.request, self, func)
+
+    @property
+    def idempotency(self):
+        """
+        The idempotency keys instance associated with the view, or `None`.
+        """
+
+        if not hasattr(self, '_idempotency'):
+            if self.idempotency_class is None:
+                self._idempotency = None
+            else:
+                self._idempotency = self.idempotency_class()
+
+        return self._idempotency
+
+    def get_idempotent_response(self):
+        """
+        Return the stored response of a previous request sent with the same ``Idempotency-Key`` or `None`, in which
+        case the key is reserved until the response is stored or the key released.
+        """
+
+        if self.idempotency is None:
+            return None
+
+        return self.idempotency.reserve(self.request, self)
+
+    def release_idempotency_key(self):
+        """
+        Release the ``Idempotency-Key`` reserved by a request that failed, if enabled.
+        """
+
+        if self.idempotency is not None:
+            self.idempotency.release(self.request, self)
+
+    def store_idempotent_response(self, response):
+        """
+        Store the response so it is replayed to requests sent with the same ``Idempotency-Key``, if enabled.
+        """
+
+        if self.idempotency is not None:
+            self.idempotency.set(self.request, self, response)
+
+        return response
+
+    def on_commit(self, func, *args, **kwargs):
+        """
+        Run ``func(*args, **kwargs)`` in the background once the request's transaction commits. Use it from the
+        ``perform_*`` hooks for work that does not need to delay the response, such as sending webhooks or
+        recomputing aggregates. See ``pyramid_restful.tasks.on_commit()``.
+        """
+
+        on_commit(self.request.dbsession, func, *args, **kwargs)
+
+    def invalidate_cache(self):
+        """
+        Invalidate every response cached for the view's model. Called by the model mixins after each write, and
+        once more when the request's transaction commits, as concurrent requests may cache the rows committed before
+        the write until then.
+        """
+
+        if self.cache is not None and self.model is not None:
+            self.cache.invalidate(self.model)
+
+            if not getattr(self, '_invalidate_on_commit', False):
+                after_commit(self.request.dbsession, self.cache.invalidate, self.model)
+                self._invalidate_on_commit = True
+
     def paginate_query(self, query):
         """
         Return single page of results or `None` if pagination is disabled.
@@ -153,7 +649,21 @@ class GenericAPIView(APIView):
         if self.paginator is None:
             return None
 
-        return self.paginator.paginate_query(query, self.request)
+        with self.timed('paginate'):
+            return self.paginator.paginate_query(query, self.request)
+
+    def get_pagination_headers(self, count):
+        """
+        Returns the headers the paginator would add to a response for a list of ``count`` rows, without fetching
+        them. Used to answer conditional requests for lists.
+        """
+
+        if self.paginator is None or self.paginate_query(range(count)) is None:
+            return {}
+
+        response = self.get_paginated_response([])
+
+        return {name: response.headers[name] for name in ('Link', 'X-Total-Count') if name in response.headers}
 
     def get_paginated_response(self, data):
         """
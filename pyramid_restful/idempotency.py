@@ -0,0 +1,289 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+from pyramid.httpexceptions import HTTPBadRequest, HTTPConflict, HTTPUnprocessableEntity
+from sqlalchemy import MetaData, Table, Column, String, Text, Float, select
+from sqlalchemy.exc import IntegrityError
+
+from .cache import LRUStore, StoredResponseMixin
+from .tasks import after_commit, after_rollback
+
+__all__ = ['MemoryStore', 'SQLStore', 'IdempotencyKeys']
+
+
+class MemoryStore:
+    """
+    Holds idempotency records in a bounded, in-process ``LRUStore``. Records are not shared between processes. They
+    are written once the request's transaction commits.
+
+    :param maxsize: The maximum number of records held by the store.
+    """
+
+    #: Whether records are written with the request's transaction.
+    transactional = False
+
+    def __init__(self, maxsize=10000):
+        self._store = LRUStore(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def get(self, key, request):
+        return self._store.get(key)
+
+    def add(self, key, value, request, timeout=None):
+        """
+        Set ``key`` unless it is already held.
+
+        :return: Whether ``key`` was set.
+        """
+
+        with self._lock:
+            if self._store.get(key) is not None:
+                return False
+
+            self._store.set(key, value, timeout)
+            return True
+
+    def set(self, key, value, request, timeout=None):
+        self._store.set(key, value, timeout)
+
+    def delete(self, key, request):
+        self._store.delete(key)
+
+
+class SQLStore:
+    """
+    Holds idempotency records in a table of the application's database. Records are written through
+    ``request.dbsession``, so a record is committed or rolled back together with the objects created by the request.
+    A concurrent request using the same key waits for the first request's transaction to end, on databases locking
+    the rows being inserted, instead of creating a duplicate.
+
+    :param table: The name of the table holding the records. Create it with ``create_table()``.
+    """
+
+    transactional = True
+
+    def __init__(self, table='prf_idempotency'):
+        self.table = Table(
+            table, MetaData(),
+            Column('key', String(40), primary_key=True),
+            Column('value', Text, nullable=False),
+            Column('expires', Float),
+        )
+
+    def create_table(self, bind):
+        """
+        Create the table if it does not exist.
+
+        :param bind: A SQLAlchemy engine or connection.
+        """
+
+        self.table.create(bind, checkfirst=True)
+
+    def get(self, key, request):
+        row = request.dbsession.execute(
+            select([self.table.c.value, self.table.c.expires]).where(self.table.c.key == key)
+        ).first()
+
+        if row is None:
+            return None
+
+        if row.expires is not None and row.expires < time.time():
+            request.dbsession.execute(self.table.delete().where(self.table.c.key == key))
+            return None
+
+        return json.loads(row.value)
+
+    def add(self, key, value, request, timeout=None):
+        now = time.time()
+        expires = now + timeout if timeout is not None else None
+        request.dbsession.execute(self.table.delete().where(self.table.c.key == key).where(self.table.c.expires < now))
+
+        try:
+            with request.dbsession.begin_nested():
+                request.dbsession.execute(self.table.insert().values(
+                    key=key, value=json.dumps(value), expires=expires
+                ))
+        except IntegrityError:
+            return False
+
+        return True
+
+    def set(self, key, value, request, timeout=None):
+        expires = time.time() + timeout if timeout is not None else None
+        request.dbsession.execute(self.table.delete().where(self.table.c.key == key))
+        request.dbsession.execute(self.table.insert().values(key=key, value=json.dumps(value), expires=expires))
+
+    def delete(self, key, request):
+        request.dbsession.execute(self.table.delete().where(self.table.c.key == key))
+
+
+class IdempotencyKeys(StoredResponseMixin):
+    """
+    Replays the stored response of a create request when a client retries it with the same ``Idempotency-Key``
+    header, without validating the body or touching the model again. Records are keyed by the view, the request's
+    path, the header's value and the user making the request. A retry whose body differs from the original request's
+    is answered with a 422.
+
+    The key is reserved before the object is created, a request reusing it while the first one is in flight is
+    answered with a 409. The response is stored once the request's transaction commits, or with the transaction for a
+    ``SQLStore``. The reservation is released if the request fails, if its transaction is rolled back or if the
+    request finishes before its transaction commits.
+
+    **Usage**::
+
+        class OrderIdempotencyKeys(IdempotencyKeys):
+            store = SQLStore()
+
+        class OrderViewSet(ModelCRUDViewSet):
+            model = Order
+            schema_class = OrderSchema
+            idempotency_class = OrderIdempotencyKeys
+    """
+
+    #: The store holding the records. A ``MemoryStore`` or a ``SQLStore``.
+    store = MemoryStore()
+    #: Number of seconds a record is kept. ``None`` keeps records until they are evicted.
+    timeout = 24 * 60 * 60
+    #: Number of seconds a key stays reserved by a request in flight, in case its transaction never ends.
+    reserve_timeout = 5 * 60
+    #: The request header holding the client's key.
+    header = 'Idempotency-Key'
+    #: The maximum length of a key.
+    max_key_length = 255
+    #: The response headers that are stored along with the body.
+    stored_headers = ('Content-Type', 'Location', 'Preference-Applied')
+
+    def get_key(self, request, view):
+        """
+        :return: The key of the request's record or ``None`` if the request did not send the header.
+        :raises HTTPBadRequest: If the header is longer than ``max_key_length``.
+        """
+
+        value = request.headers.get(self.header)
+
+        if not value:
+            return None
+
+        if len(value) > self.max_key_length:
+            raise HTTPBadRequest(detail='{} must not be longer than {} characters.'.format(
+                self.header, self.max_key_length
+            ))
+
+        return super().get_key(request, view)
+
+    def get_key_parts(self, request, view):
+        return [request.headers.get(self.header)]
+
+    def get_body_hash(self, request):
+        return hashlib.sha256(request.body or b'').hexdigest()
+
+    def get(self, request, view):
+        """
+        :return: The stored ``Response`` of a previous request with the same key or ``None``.
+        :raises HTTPUnprocessableEntity: If the key was used with a different body.
+        :raises HTTPConflict: If a request using the key is in flight.
+        """
+
+        key = self.get_key(request, view)
+
+        if key is None:
+            return None
+
+        value = self.store.get(key, request)
+
+        if value is None:
+            return None
+
+        if value['hash'] != self.get_body_hash(request):
+            raise HTTPUnprocessableEntity(detail='{} was already used with a different request body.'.format(
+                self.header
+            ))
+
+        if value.get('in_flight'):
+            raise HTTPConflict(detail='A request using the same {} is in progress.'.format(self.header))
+
+        response = self.load_response(value)
+        response.headers['Idempotent-Replayed'] = 'true'
+
+        return response
+
+    def reserve(self, request, view):
+        """
+        Reserve the request's key until its response is stored, or return the stored response of a previous
+        request with the same key.
+
+        :return: The stored ``Response`` or ``None`` if the key was reserved, or the request did not send the header.
+        :raises HTTPUnprocessableEntity: If the key was used with a different body.
+        :raises HTTPConflict: If a request using the key is in flight.
+        """
+
+        key = self.get_key(request, view)
+
+        if key is None:
+            return None
+
+        token = uuid.uuid4().hex
+        value = {'hash': self.get_body_hash(request), 'in_flight': True, 'token': token}
+
+        if self.store.add(key, value, request, self.reserve_timeout):
+            if not self.store.transactional:
+                # Released if the transaction is rolled back, or if the request finishes while it is still pending.
+                after_rollback(request.dbsession, self.release_reservation, key, token, request)
+                request.add_finished_callback(lambda request: self.release_reservation(key, token, request))
+
+            return None
+
+        response = self.get(request, view)
+
+        if response is None:
+            # The request holding the key just released it.
+            raise HTTPConflict(detail='A request using the same {} is in progress.'.format(self.header))
+
+        return response
+
+    def release_reservation(self, key, token, request):
+        """
+        Release the reservation ``token`` of ``key``, unless the response of the request holding it has been stored.
+        """
+
+        value = self.store.get(key, request)
+
+        if value is not None and value.get('token') == token:
+            self.store.delete(key, request)
+
+    def release(self, request, view):
+        """
+        Release the key reserved by a request that failed. Keys held by a ``SQLStore`` are released when the
+        request's transaction is rolled back.
+        """
+
+        key = self.get_key(request, view)
+
+        if key is not None and not self.store.transactional:
+            self.store.delete(key, request)
+
+    def set(self, request, view, response):
+        """
+        Store ``response`` as the response of every request using the same key, once the request's transaction
+        commits. The key is released instead for server errors so the request can be retried.
+        """
+
+        key = self.get_key(request, view)
+
+        if key is None:
+            return
+
+        if response.status_code >= 500:
+            self.store.delete(key, request)
+            return
+
+        value = self.dump_response(response)
+        value['hash'] = self.get_body_hash(request)
+
+        if self.store.transactional:
+            self.store.set(key, value, request, self.timeout)
+        else:
+            after_commit(request.dbsession, self.store.set, key, value, request, self.timeout)
@@ -0,0 +1,272 @@
+import logging
+import re
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .exceptions import NPlusOneError
+
+logger = logging.getLogger('restful_pyramid')
+
+__all__ = ['RequestProfile', 'NPlusOneDetector', 'get_current_profile', 'normalize_statement', 'null_phase']
+
+_local = threading.local()
+_in_list_re = re.compile(r'\bIN\s*\((?:[^()]|\([^()]*\))*\)', re.IGNORECASE)
+_literal_re = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_whitespace_re = re.compile(r'\s+')
+_install_lock = threading.Lock()
+_installed = False
+
+
+class NullPhase:
+    """
+    Context manager standing in for ``RequestProfile.phase()`` when a view is not profiled.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+null_phase = NullPhase()
+
+
+def get_current_profile():
+    """
+    Returns the ``RequestProfile`` active on the current thread or ``None``.
+    """
+
+    return getattr(_local, 'profile', None)
+
+
+def normalize_statement(statement):
+    """
+    Returns the shape of a SQL statement: its literals and the contents of ``IN`` lists are replaced, so statements
+    that only differ by their values have the same shape.
+    """
+
+    statement = _whitespace_re.sub(' ', statement).strip()
+    statement = _in_list_re.sub('IN (...)', statement)
+
+    return _literal_re.sub('?', statement)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if get_current_profile() is not None:
+        conn.info.setdefault('restful_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = get_current_profile()
+    started = conn.info.get('restful_query_started')
+
+    if profile is None or not started:
+        return
+
+    duration = time.perf_counter() - started.pop()
+
+    # Profiles enclosing the active one, such as ``assert_max_queries()`` around a profiled view, record it too.
+    while profile is not None:
+        profile.record_statement(statement, parameters, duration, executemany)
+        profile = profile._previous
+
+
+def install():
+    """
+    Listens to the cursor events of every SQLAlchemy engine. Statements are only timed on threads with an active
+    ``RequestProfile``. Called by the first profiled request.
+    """
+
+    global _installed
+
+    with _install_lock:
+        if not _installed:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            _installed = True
+
+
+class RequestProfile:
+    """
+    Times the phases of a request handled by a view and the SQL statements it runs. Enable it with the
+    ``profile_class`` attribute of a view. Statements are timed through SQLAlchemy engine events while the profile
+    is active on the request's thread. Statements run on other threads are not recorded.
+
+    Once the view returns its response, the timings are added to a ``Server-Timing`` header and logged to the
+    ``restful_pyramid`` logger, with the measurements in the ``restful_profile`` attribute of the log record.
+    """
+
+    #: Add the timings to responses in a ``Server-Timing`` header.
+    server_timing = True
+    #: The level of the log record reporting the timings, ``None`` disables logging.
+    log_level = logging.INFO
+
+    def __init__(self, request, view):
+        self.request = request
+        self.view = view
+        self.phases = OrderedDict()
+        self.statements = []
+        self.current_phase = None
+        self.rows = None
+        self.started = None
+        self.duration = None
+        self._previous = None
+
+    def __enter__(self):
+        install()
+        self._previous = get_current_profile()
+        _local.profile = self
+        self.started = time.perf_counter()
+
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration = time.perf_counter() - self.started
+        _local.profile = self._previous
+
+        return False
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Times the enclosed block as the phase ``name``. The durations of phases entered more than once are added.
+        Statements run within the block are attributed to the phase.
+        """
+
+        previous, self.current_phase = self.current_phase, name
+        started = time.perf_counter()
+
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - started
+            self.current_phase = previous
+
+    def record_statement(self, statement, parameters, duration, executemany=False):
+        self.statements.append({
+            'statement': statement,
+            'parameters': parameters,
+            'duration': duration,
+            'executemany': executemany,
+            'phase': self.current_phase,
+        })
+
+    @property
+    def sql_count(self):
+        return len(self.statements)
+
+    @property
+    def sql_duration(self):
+        return sum(statement['duration'] for statement in self.statements)
+
+    @property
+    def route_name(self):
+        route = getattr(self.request, 'matched_route', None)
+
+        return route.name if route is not None else None
+
+    def get_server_timing(self):
+        """
+        Returns the value of the ``Server-Timing`` header, durations are in milliseconds.
+        """
+
+        metrics = ['{};dur={:.2f}'.format(name, duration * 1000) for name, duration in self.phases.items()]
+        metrics.append('sql;dur={:.2f};desc="{} queries"'.format(self.sql_duration * 1000, self.sql_count))
+
+        if self.duration is not None:
+            metrics.append('total;dur={:.2f}'.format(self.duration * 1000))
+
+        return ', '.join(metrics)
+
+    def as_dict(self, response=None):
+        """
+        Returns the measurements of the request, durations are in milliseconds.
+        """
+
+        return {
+            'route': self.route_name,
+            'action': getattr(self.view, 'action', None),
+            'method': self.request.method,
+            'path': self.request.path,
+            'status': response.status_code if response is not None else None,
+            'duration': self.duration * 1000 if self.duration is not None else None,
+            'phases': {name: duration * 1000 for name, duration in self.phases.items()},
+            'sql_count': self.sql_count,
+            'sql_duration': self.sql_duration * 1000,
+            'rows': self.rows,
+        }
+
+    def report(self, response):
+        """
+        Adds the ``Server-Timing`` header to ``response`` and logs the measurements.
+        """
+
+        if self.server_timing:
+            response.headers['Server-Timing'] = self.get_server_timing()
+
+        if self.log_level is not None and logger.isEnabledFor(self.log_level):
+            data = self.as_dict(response)
+            logger.log(
+                self.log_level, 'Request profile %s %s: %.2fms, %d queries in %.2fms',
+                data['method'], data['path'], data['duration'], data['sql_count'], data['sql_duration'],
+                extra={'restful_profile': data}
+            )
+
+        return response
+
+
+class NPlusOneDetector(RequestProfile):
+    """
+    A ``RequestProfile`` reporting statements of the same shape run repeatedly while the response is serialized,
+    usually lazy loaded relationships or expanded fields loaded once per object. Set it as the ``profile_class`` of a
+    view during development, in tests with ``raise_errors`` enabled or in staging to log warnings. Load the
+    relationships with the view's query, with ``joinedload()`` or ``selectinload()``, to fix them.
+    """
+
+    server_timing = False
+    log_level = None
+    #: The number of times a statement must run while serializing to be reported.
+    threshold = 2
+    #: The phases in which repeated statements are reported.
+    detect_phases = ('serialize',)
+    #: Raise ``NPlusOneError`` instead of logging a warning.
+    raise_errors = False
+
+    def get_repeated_statements(self):
+        """
+        Returns a dictionary of the statement shapes run at least ``threshold`` times in ``detect_phases``, to the
+        number of times they ran.
+        """
+
+        counts = {}
+
+        for statement in self.statements:
+            if statement['phase'] in self.detect_phases:
+                shape = normalize_statement(statement['statement'])
+                counts[shape] = counts.get(shape, 0) + 1
+
+        return {shape: count for shape, count in counts.items() if count >= self.threshold}
+
+    def report(self, response):
+        response = super().report(response)
+        repeated = self.get_repeated_statements()
+
+        if repeated:
+            message = 'N+1 queries in {} {}:\n{}'.format(
+                self.request.method, self.request.path,
+                '\n'.join('{} times: {}'.format(count, shape) for shape, count in repeated.items())
+            )
+
+            if self.raise_errors:
+                raise NPlusOneError(message)
+
+            logger.warning(message, extra={'restful_repeated_statements': repeated})
+
+        return response
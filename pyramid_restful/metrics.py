@@ -0,0 +1,201 @@
+import threading
+
+from bisect import bisect_left
+
+from pyramid.httpexceptions import HTTPForbidden
+from pyramid.response import Response
+
+from .instrumentation import RequestProfile
+from .views import APIView
+
+__all__ = ['MetricsRegistry', 'MetricsProfile', 'MetricsView', 'registry']
+
+
+def format_labels(labels):
+    escaped = []
+
+    for name, val in labels:
+        val = str(val).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append('{}="{}"'.format(name, val))
+
+    return ','.join(escaped)
+
+
+def format_value(val):
+    return str(int(val)) if float(val).is_integer() else repr(float(val))
+
+
+class MetricsRegistry:
+    """
+    Keeps histograms of request measurements, labelled by route and action. Each thread records into its own
+    buckets, so observing never takes a lock. The buckets of all threads are merged when the metrics are collected.
+    """
+
+    #: The prefix of the exported metric names.
+    namespace = 'restful'
+    #: The upper bounds of the buckets of each histogram.
+    buckets = {
+        'request_duration_seconds': (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+        'request_queries': (0, 1, 2, 3, 5, 10, 20, 50, 100),
+        'response_rows': (0, 1, 10, 25, 50, 100, 250, 500, 1000, 10000),
+        'response_bytes': (100, 1000, 10000, 100000, 1000000, 10000000),
+    }
+    #: The description of each histogram.
+    descriptions = {
+        'request_duration_seconds': 'Time spent handling requests in the view.',
+        'request_queries': 'Number of SQL statements executed per request.',
+        'response_rows': 'Number of objects serialized per response.',
+        'response_bytes': 'Size of response bodies.',
+    }
+
+    def __init__(self):
+        self._local = threading.local()
+        self._stores = []
+        self._lock = threading.Lock()
+
+    def get_store(self):
+        """
+        Returns the buckets of the current thread, registering them the first time the thread observes a value.
+        """
+
+        store = getattr(self._local, 'store', None)
+
+        if store is None:
+            store = self._local.store = {}
+
+            with self._lock:
+                self._stores.append(store)
+
+        return store
+
+    def observe(self, name, value, labels=()):
+        """
+        Records ``value`` in the histogram ``name``.
+
+        :param name: A key of ``buckets``.
+        :param value: The measured value.
+        :param labels: Tuple of ``(label, value)`` pairs identifying the series.
+        """
+
+        bounds = self.buckets[name]
+        store = self.get_store()
+        series = store.get((name, labels))
+
+        if series is None:
+            # The count of each bucket, the count above the last bound and the sum of the observed values.
+            series = store[(name, labels)] = [0] * (len(bounds) + 2)
+
+        series[bisect_left(bounds, value)] += 1
+        series[-1] += value
+
+    def record(self, profile, response):
+        """
+        Records the measurements of a profiled request.
+        """
+
+        action = getattr(profile.view, 'action', None) or profile.request.method.lower()
+        labels = (('route', profile.route_name or ''), ('action', action))
+
+        self.observe('request_duration_seconds', profile.duration, labels)
+        self.observe('request_queries', profile.sql_count, labels)
+
+        if profile.rows is not None:
+            self.observe('response_rows', profile.rows, labels)
+
+        if response.content_length is not None:
+            self.observe('response_bytes', response.content_length, labels)
+
+    def collect(self):
+        """
+        Returns the series of every thread merged, as a dictionary of ``(name, labels)`` to the list of bucket counts,
+        the count above the last bound and the sum.
+        """
+
+        with self._lock:
+            stores = list(self._stores)
+
+        merged = {}
+
+        for store in stores:
+            for key, series in store.copy().items():
+                total = merged.setdefault(key, [0] * len(series))
+
+                for index, val in enumerate(list(series)):
+                    total[index] += val
+
+        return merged
+
+    def clear(self):
+        for store in list(self._stores):
+            store.clear()
+
+    def render(self):
+        """
+        Returns the histograms in the Prometheus text exposition format.
+        """
+
+        series_by_name = {}
+
+        for (name, labels), series in self.collect().items():
+            series_by_name.setdefault(name, []).append((labels, series))
+
+        lines = []
+
+        for name in sorted(series_by_name):
+            metric = '{}_{}'.format(self.namespace, name)
+            lines.append('# HELP {} {}'.format(metric, self.descriptions.get(name, name)))
+            lines.append('# TYPE {} histogram'.format(metric))
+
+            for labels, series in sorted(series_by_name[name]):
+                bounds = [format_value(bound) for bound in self.buckets[name]] + ['+Inf']
+                cumulative = 0
+
+                for bound, count in zip(bounds, series[:-1]):
+                    cumulative += count
+                    bucket_labels = format_labels(labels + (('le', bound),))
+                    lines.append('{}_bucket{{{}}} {}'.format(metric, bucket_labels, cumulative))
+
+                lines.append('{}_sum{{{}}} {}'.format(metric, format_labels(labels), format_value(series[-1])))
+                lines.append('{}_count{{{}}} {}'.format(metric, format_labels(labels), cumulative))
+
+        return '\n'.join(lines) + '\n'
+
+
+#: The registry used by default by ``MetricsProfile`` and ``MetricsView``.
+registry = MetricsRegistry()
+
+
+class MetricsProfile(RequestProfile):
+    """
+    A ``RequestProfile`` recording the measurements of each request in a ``MetricsRegistry`` instead of sending them
+    in headers and logs. Set it as the ``profile_class`` of the views to measure.
+    """
+
+    server_timing = False
+    log_level = None
+    #: The ``MetricsRegistry`` receiving the measurements.
+    registry = registry
+
+    def report(self, response):
+        response = super().report(response)
+        self.registry.record(self, response)
+
+        return response
+
+
+class MetricsView(APIView):
+    """
+    Exposes a ``MetricsRegistry`` in the Prometheus text format. Requests are only accepted from the addresses in
+    ``allowed_addresses``.
+    """
+
+    #: The registry exposed by the view.
+    registry = registry
+    #: The client addresses allowed to read the metrics, ``None`` allows any.
+    allowed_addresses = ('127.0.0.1', '::1')
+
+    def get(self, request, *args, **kwargs):
+        if self.allowed_addresses is not None and request.remote_addr not in self.allowed_addresses:
+            raise HTTPForbidden()
+
+        return Response(text=self.registry.render(), content_type='text/plain; version=0.0.4', charset='utf-8')
@@ -1,5 +1,10 @@
+from pyramid.httpexceptions import HTTPBadRequest, HTTPNotFound
 from pyramid.response import Response
 
+from sqlalchemy import literal_column, tuple_, UniqueConstraint
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
 import marshmallow as ma
 
 
@@ -9,17 +14,83 @@ class ListModelMixin:
     """
 
     def list(self, request, *args, **kwargs):
-        # Execute the query to ensure unnecessary executions are made by schema or pagination
-        data = self.filter_query(self.get_query()).all()
+        response = self.get_cached_response()
+
+        if response is None:
+            query = self.filter_query(self.get_query())
+            version = self.get_list_version(query)
+
+            if version is not None:
+                # Answer conditional requests from the aggregate version before fetching or serializing any rows.
+                not_modified = self.get_not_modified_response(self.get_validators(version))
+
+                if not_modified is not None:
+                    if not version[1]:
+                        self.check_parent_exists()
+
+                    not_modified.headers.update(self.get_pagination_headers(version[1]))
+                    return not_modified
+
+            if self.request.method == 'HEAD':
+                # Only the headers are sent, answer from the count and version without fetching or serializing rows.
+                count = version[1] if version is not None else self.get_list_count(query)
+
+                if not count:
+                    self.check_parent_exists()
+
+                response = self.get_head_response(self.get_validators(version))
+                response.headers.update(self.get_pagination_headers(count))
+
+                return response
+
+            response = self.coalesce(lambda: self.get_list_response(query))
+
+        return self.get_not_modified_response(response.headers) or response
+
+    def get_list_response(self, query):
+        """
+        Fetch, serialize and render the rows of ``query``, and cache the response.
+        """
+
+        page = None
+
+        if self.etag_field is None and getattr(self.paginator, 'parallel_count', False):
+            # The paginator fetches the page and counts the rows in the database, the other rows are never loaded.
+            with self.timed('query'):
+                page = data = self.paginate_query(query)
+
+        if page is None:
+            # Execute the query to ensure unnecessary executions are made by schema or pagination
+            with self.timed('query'):
+                data = self.bake_query(query, 'list').all()
+
+            if not data:
+                self.check_parent_exists()
+
+            page = self.paginate_query(data)
+        elif not page:
+            self.check_parent_exists()
+
         schema = self.get_schema()
-        page = self.paginate_query(data)
 
-        if page is not None:
-            content = schema.dump(page, many=True)[0]
-            return self.get_paginated_response(content)
+        rows = data if page is None else page
 
-        content = schema.dump(data, many=True)[0]
-        return Response(json=content)  # todo, hardcoded json here, need to implement parsers
+        if self.profile is not None:
+            self.profile.rows = len(rows)
+
+        with self.timed('serialize'):
+            content = schema.dump(rows, many=True)[0]
+
+        with self.timed('render'):
+            if page is not None:
+                response = self.get_paginated_response(content)
+            else:
+                response = Response(json=content)  # todo, hardcoded json here, need to implement parsers
+
+        for name, val in self.get_validators(self.get_list_version(query, data), response.body).items():
+            response.headers[name] = val
+
+        return self.cache_response(response)
 
 
 class RetrieveModelMixin:
@@ -28,11 +99,57 @@ class RetrieveModelMixin:
     """
 
     def retrieve(self, request, *args, **kwargs):
+        response = self.get_cached_response()
+
+        if response is None:
+            version = self.get_object_version()
+
+            if version is not None:
+                # Answer conditional requests from the version alone, before loading and serializing the object.
+                not_modified = self.get_not_modified_response(self.get_validators(version))
+
+                if not_modified is not None:
+                    return not_modified
+
+            if self.request.method == 'HEAD':
+                # The object only needs loading when its version could not be selected alone.
+                if version is None:
+                    instance = self.get_object()
+                    version = getattr(instance, self.etag_field) if self.etag_field else None
+
+                response = self.get_head_response(self.get_validators(version))
+
+                return self.get_not_modified_response(response.headers) or response
+
+            response = self.coalesce(self.get_retrieve_response)
+
+        return self.get_not_modified_response(response.headers) or response
+
+    def get_retrieve_response(self):
+        """
+        Load, serialize and render the object, and cache the response.
+        """
+
         schema = self.get_schema()
-        instance = self.get_object()
-        content = schema.dump(instance)[0]
 
-        return Response(json=content)
+        with self.timed('query'):
+            instance = self.get_object()
+
+        if self.profile is not None:
+            self.profile.rows = 1
+
+        with self.timed('serialize'):
+            content = schema.dump(instance)[0]
+
+        with self.timed('render'):
+            response = Response(json=content)  # todo, hardcoded json here, need to implement parsers
+
+        version = getattr(instance, self.etag_field) if self.etag_field else None
+
+        for name, val in self.get_validators(version, response.body).items():
+            response.headers[name] = val
+
+        return self.cache_response(response)
 
 
 class CreateModelMixin:
@@ -40,7 +157,33 @@ class CreateModelMixin:
     Create object from serialized data.
     """
 
+    #: Accept a JSON array of objects to create many instances in one request.
+    allow_bulk_create = False
+    #: The number of rows inserted per statement when creating many instances.
+    bulk_create_batch_size = 500
+
     def create(self, request, *args, **kwargs):
+        response = self.get_idempotent_response()
+
+        if response is not None:
+            return response
+
+        try:
+            if self.allow_bulk_create and isinstance(request.json_body, list):
+                response = self.bulk_create(request, *args, **kwargs)
+            else:
+                response = self.create_single(request, *args, **kwargs)
+        except Exception:
+            self.release_idempotency_key()
+            raise
+
+        return self.store_idempotent_response(response)
+
+    def create_single(self, request, *args, **kwargs):
+        """
+        Create an instance from a JSON object.
+        """
+
         schema = self.get_schema()
 
         try:
@@ -48,7 +191,14 @@ class CreateModelMixin:
         except ma.ValidationError as err:
             return Response(json=err.messages, status=400)  # todo, hardcoded json here, need to implement parsers
 
+        self.check_parent_exists()
+        data.update(self.get_parent_values())
         instance = self.perform_create(data)
+        self.invalidate_cache()
+
+        if self.prefers_minimal_return():
+            return self.get_minimal_response(201, instance)
+
         content = schema.dump(instance)[0]
 
         return Response(json=content, status=201)
@@ -64,13 +214,228 @@ class CreateModelMixin:
         self.request.dbsession.flush()
         return instance
 
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Create an instance for each object of a JSON array. Nothing is created unless every object is valid.
+        Validation errors are reported by the index of the invalid objects.
+        """
+
+        schema = self.get_schema()
+
+        try:
+            data, errors = schema.load(request.json_body,
+                                       many=True)  # todo, hardcoded json here, need to implement parsers
+        except ma.ValidationError as err:
+            return Response(json=err.messages, status=400)  # todo, hardcoded json here, need to implement parsers
+
+        self.check_parent_exists()
+        parent_values = self.get_parent_values()
+
+        for item in data:
+            item.update(parent_values)
+
+        instances = self.perform_bulk_create(data)
+        self.invalidate_cache()
+
+        if self.prefers_minimal_return():
+            # Minimal bulk responses still identify the created objects by their primary keys.
+            keys = self.get_primary_keys(instances)
+            response = self.get_minimal_response(201)
+            response.content_type = 'application/json'
+            response.json_body = keys  # todo, hardcoded json here, need to implement parsers
 
-class UpdateModelMixin:
+            return response
+
+        if all(isinstance(instance, dict) for instance in instances):
+            # Mappings only hold the input and the keys, the rows are loaded for the values set by defaults.
+            instances = self.get_created_instances(self.get_primary_keys(instances))
+
+        content = schema.dump(instances, many=True)[0]
+
+        return Response(json=content, status=201)
+
+    def perform_bulk_create(self, data):
+        """
+        Hook for controlling the creation of many model instances. Rows are inserted ``bulk_create_batch_size`` at
+        a time and returned as mappings holding their primary keys, which ``bulk_create`` loads again to render
+        them. A batch whose rows all carry their primary keys is inserted with a single executemany through
+        ``Session.bulk_insert_mappings``. Otherwise the generated keys are fetched with a multi-row
+        ``INSERT ... RETURNING`` where the database supports it, such as PostgreSQL, and with one ``INSERT`` per row
+        elsewhere, such as SQLite. If ``perform_create`` has been overridden it is called for each object instead,
+        so its logic is not skipped.
+        """
+
+        if type(self).perform_create is not CreateModelMixin.perform_create:
+            return [self.perform_create(item) for item in data]
+
+        keys = self.get_primary_key_names()
+
+        for start in range(0, len(data), self.bulk_create_batch_size):
+            batch = data[start:start + self.bulk_create_batch_size]
+
+            if all(item.get(key) is not None for item in batch for key in keys):
+                self.request.dbsession.bulk_insert_mappings(self.model, batch)
+            elif self.supports_insert_returning() and len(set(frozenset(item) for item in batch)) == 1:
+                self.insert_returning(batch, keys)
+            else:
+                self.request.dbsession.bulk_insert_mappings(self.model, batch, return_defaults=True)
+
+        return data
+
+    def get_primary_key_names(self):
+        """
+        Returns the names of the attributes of ``model`` mapped to its primary key.
+        """
+
+        mapper = self.model.__mapper__
+
+        return [mapper.get_property_by_column(column).key for column in mapper.primary_key]
+
+    def supports_insert_returning(self):
+        """
+        Returns ``True`` if the database can return the keys generated by a multi-row ``INSERT``.
+        """
+
+        mapper = self.model.__mapper__
+        dialect = self.request.dbsession.get_bind(mapper=mapper).dialect
+
+        return len(mapper.tables) == 1 and dialect.implicit_returning and dialect.supports_multivalues_insert
+
+    def get_unique_columns(self, names):
+        """
+        Returns the columns of a unique constraint or index of the model's table whose values are all given by
+        the attributes ``names``, or ``None``.
+        """
+
+        mapper = self.model.__mapper__
+        table = mapper.local_table
+        given = {mapper.get_property(name).columns[0] for name in names if name in mapper.column_attrs.keys()}
+        candidates = [constraint.columns for constraint in table.constraints
+                      if isinstance(constraint, UniqueConstraint)]
+        candidates.extend(index.columns for index in table.indexes if index.unique)
+
+        for columns in candidates:
+            if all(column in given for column in columns):
+                return list(columns)
+
+        return None
+
+    def insert_returning(self, batch, keys):
+        """
+        Inserts ``batch`` with a single multi-row ``INSERT ... RETURNING`` and assigns the generated primary keys to
+        its mappings. Returned rows are matched to the mappings by the values of a unique constraint when the batch
+        gives them. Otherwise they are matched in the order of the ``VALUES`` clause, the order PostgreSQL returns
+        them in for a plain ``INSERT ... VALUES`` although it does not guarantee it.
+        """
+
+        mapper = self.model.__mapper__
+        columns = {attr.key: attr.columns[0].key for attr in mapper.column_attrs}
+        rows = [{columns[key]: value for key, value in item.items() if key in columns} for item in batch]
+        unique = self.get_unique_columns(batch[0]) or []
+        statement = mapper.local_table.insert().values(rows).returning(*(list(mapper.primary_key) + unique))
+        result = list(self.request.dbsession.execute(statement))
+
+        if unique:
+            by_unique = {tuple(row[len(keys):]): row[:len(keys)] for row in result}
+            result = [by_unique[tuple(row[column.key] for column in unique)] for row in rows]
+
+        for item, row in zip(batch, result):
+            item.update(zip(keys, row))
+
+    def get_created_instances(self, keys):
+        """
+        Loads the instances created by a bulk create, in the order of ``keys``, with one ``IN`` query per
+        ``bulk_create_batch_size`` keys, so their representation holds the values set by column and server defaults.
+
+        :param keys: The primary keys of the instances, as returned by ``get_primary_keys()``.
+        """
+
+        names = self.get_primary_key_names()
+        columns = [getattr(self.model, name) for name in names]
+        identities = [tuple(key[name] for name in names) for key in keys]
+        instances = {}
+
+        for start in range(0, len(identities), self.bulk_create_batch_size):
+            batch = identities[start:start + self.bulk_create_batch_size]
+
+            if len(columns) == 1:
+                criterion = columns[0].in_([identity[0] for identity in batch])
+            else:
+                criterion = tuple_(*columns).in_(batch)
+
+            for instance in self.request.dbsession.query(self.model).filter(criterion):
+                instances[tuple(getattr(instance, name) for name in names)] = instance
+
+        return [instances[identity] for identity in identities]
+
+    def get_primary_keys(self, instances):
+        """
+        Returns the primary keys of created ``instances``, model instances or mappings, as a list of dicts.
+        """
+
+        keys = self.get_primary_key_names()
+
+        return [{key: instance[key] if isinstance(instance, dict) else getattr(instance, key) for key in keys}
+                for instance in instances]
+
+
+class UpdateWithoutLoadingMixin:
+    """
+    Shared behavior of the mixins that update a model instance with ``load_free_writes`` enabled.
+    """
+
+    def update_without_loading(self, request, query, partial=False):
+        """
+        Validates the request body and writes it with a single ``UPDATE`` statement. Nothing is loaded, so the
+        response contains the written fields and the lookup field rather than the whole reloaded instance.
+        Instances already held by the session are not refreshed.
+        """
+
+        schema = self.get_schema(context={'instance': None})
+
+        try:
+            data, errors = schema.load(request.json_body,
+                                       partial=partial)  # todo, hardcoded json here, need to implement parsers
+        except ma.ValidationError as err:
+            return Response(json=err.messages, status=400)  # todo, hardcoded json here, need to implement parsers
+
+        # Use the rowcount for the 404, an empty body still has to match a row.
+        count = query.update(data, synchronize_session=False) if data else query.count()
+
+        if not count:
+            raise HTTPNotFound()
+
+        self.invalidate_cache()
+
+        if self.prefers_minimal_return():
+            return self.get_minimal_response(204)
+
+        if isinstance(self.lookup_field, str):
+            data.setdefault(self.lookup_field, self.lookup_url_kwargs[self.lookup_field])
+
+        content = schema.dump(data)[0]
+
+        return Response(json=content)  # todo, hardcoded json here, need to implement parsers
+
+
+class UpdateModelMixin(UpdateWithoutLoadingMixin):
     """
     Update a model instance (PUT).
     """
 
+    #: Create the instance when a PUT targets a lookup that does not exist yet.
+    allow_upsert = False
+
     def update(self, request, *args, **kwargs):
+        if self.allow_upsert:
+            return self.upsert(request, *args, **kwargs)
+
+        if self.load_free_writes and type(self).perform_update is UpdateModelMixin.perform_update:
+            query = self.get_write_query()
+
+            if query is not None:
+                return self.update_without_loading(request, query)
+
         instance = self.get_object()
         schema = self.get_schema(context={'instance': instance})
 
@@ -80,6 +445,11 @@ class UpdateModelMixin:
             return Response(json_body=err.messages, status=400)  # todo, hardcoded json here, need to implement parsers
 
         self.perform_update(data, instance)
+        self.invalidate_cache()
+
+        if self.prefers_minimal_return():
+            return self.get_minimal_response(204)
+
         content = schema.dump(instance)[0]
 
         return Response(json=content)  # todo, hardcoded json here, need to implement parsers
@@ -93,13 +463,166 @@ class UpdateModelMixin:
         for key, val in data.items():
             setattr(instance, key, val)
 
+    def upsert(self, request, *args, **kwargs):
+        """
+        Create the instance identified by the url if it does not exist, otherwise update it. Responds with a 201
+        or a 200 respectively. The write is a single statement when possible, see ``perform_upsert()``. Views with
+        object level permissions, custom ``perform_update()`` or ``perform_create()`` hooks or a ``lookup_field``
+        on another model load the object first instead.
+        """
+
+        perform_create = getattr(type(self), 'perform_create', CreateModelMixin.perform_create)
+        custom_hook = type(self).perform_update is not UpdateModelMixin.perform_update or \
+            perform_create is not CreateModelMixin.perform_create
+        query = None
+
+        if not custom_hook and isinstance(self.lookup_field, str):
+            query = self.get_write_query()
+
+        instance = None
+
+        if query is None:
+            try:
+                instance = self.get_object()
+            except HTTPNotFound:
+                pass
+
+        schema = self.get_schema(context={'instance': instance})
+        body = request.json_body  # todo, hardcoded json here, need to implement parsers
+
+        if isinstance(self.lookup_field, str) and isinstance(body, dict):
+            # The url identifies the instance, a lookup value in the body is ignored.
+            body = dict(body, **{self.lookup_field: self.lookup_url_kwargs[self.lookup_field]})
+
+        try:
+            data, errors = schema.load(body)
+        except ma.ValidationError as err:
+            return Response(json=err.messages, status=400)  # todo, hardcoded json here, need to implement parsers
+
+        if isinstance(self.lookup_field, str):
+            data.setdefault(self.lookup_field, self.lookup_url_kwargs[self.lookup_field])
+
+        data.update(self.get_parent_values())
+
+        if query is not None:
+            created = self.perform_upsert(data, query)
+            # Nothing was loaded, respond with the written fields.
+            instance = data
+        elif instance is None:
+            created, instance = self.perform_loaded_upsert_create(data)
+
+            if not created:
+                self.perform_update(data, instance)
+        else:
+            created = False
+            self.perform_update(data, instance)
+
+        self.invalidate_cache()
+
+        if self.prefers_minimal_return():
+            return self.get_minimal_response(201 if created else 204, instance)
+
+        content = schema.dump(instance)[0]
+        status = 201 if created else 200
+
+        return Response(json=content, status=status)  # todo, hardcoded json here, need to implement parsers
+
+    def perform_upsert(self, data, query):
+        """
+        Hook for controlling an upsert that does not load the instance. On PostgreSQL a single
+        ``INSERT ... ON CONFLICT (lookup) DO UPDATE`` statement is run, which requires a unique constraint on the
+        lookup column. Elsewhere the row is updated and, if no row matched, inserted inside a savepoint. The update
+        is retried if the insert conflicts with a concurrent one.
+
+        :param data: The validated data, including the lookup field.
+        :param query: The query matching only the instance, as returned by ``get_write_query()``.
+        :return: ``True`` if the instance was created.
+        :raises HTTPNotFound: If the instance exists but is excluded by the view's query.
+        """
+
+        session = self.request.dbsession
+        mapper = self.model.__mapper__
+        table = mapper.local_table
+        values = {mapper.columns[key].key: val for key, val in data.items()}
+
+        if session.get_bind(mapper=mapper).dialect.name == 'postgresql':
+            lookup_key = mapper.columns[self.lookup_field].key
+            stmt = postgresql.insert(table).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c[lookup_key]],
+                set_={key: stmt.excluded[key] for key in values},
+                where=query.whereclause,  # Rows outside of the view's query are not updated, nor returned.
+            ).returning(literal_column('xmax = 0'))  # xmax is only set on rows that existed before
+            row = session.execute(stmt).first()
 
-class PartialUpdateMixin:
+            if row is None:
+                raise HTTPNotFound()
+
+            return row[0]
+
+        if query.update(data, synchronize_session=False):
+            return False
+
+        try:
+            with session.begin_nested():
+                session.execute(table.insert().values(**values))
+        except IntegrityError:
+            # Inserted concurrently, or the row exists but is excluded by the view's query.
+            if not query.update(data, synchronize_session=False):
+                raise HTTPNotFound()
+
+            return False
+
+        return True
+
+    def perform_loaded_upsert_create(self, data):
+        """
+        Creates the instance of an upsert that loads the instance and found none, inside a savepoint. If the insert
+        conflicts with an existing row, the instance is loaded again so a row inserted concurrently is updated,
+        while a row excluded by the view's query is answered with a 404, as when the instance is not loaded.
+
+        :return: Whether the instance was created, and the created or loaded instance.
+        :raises HTTPNotFound: If the instance exists but is excluded by the view's query.
+        """
+
+        session = self.request.dbsession
+
+        try:
+            with session.begin_nested():
+                instance = self.perform_upsert_create(data)
+                session.flush()
+        except IntegrityError:
+            return False, self.get_object()
+
+        return True, instance
+
+    def perform_upsert_create(self, data):
+        """
+        Hook for controlling the creation of an instance by an upsert that loads the instance. Uses
+        ``perform_create()`` if the view has one.
+        """
+
+        if hasattr(self, 'perform_create'):
+            return self.perform_create(data)
+
+        instance = self.model(**data)
+        self.request.dbsession.add(instance)
+        self.request.dbsession.flush()
+        return instance
+
+
+class PartialUpdateMixin(UpdateWithoutLoadingMixin):
     """
     Support for partially updating instance (PATCH).
     """
 
     def partial_update(self, request, *args, **kwargs):
+        if self.load_free_writes and type(self).perform_partial_update is PartialUpdateMixin.perform_partial_update:
+            query = self.get_write_query()
+
+            if query is not None:
+                return self.update_without_loading(request, query, partial=True)
+
         instance = self.get_object()
         schema = self.get_schema(context={'instance': instance})
 
@@ -110,6 +633,11 @@ class PartialUpdateMixin:
             return Response(json_body=err.messages, status=400)  # todo, hardcoded json here, need to implement parsers
 
         self.perform_partial_update(data, instance)
+        self.invalidate_cache()
+
+        if self.prefers_minimal_return():
+            return self.get_minimal_response(204)
+
         content = schema.dump(instance)[0]
 
         return Response(json=content)  # todo, hardcoded json here, need to implement parsers
@@ -130,8 +658,20 @@ class DestroyModelMixin:
     """
 
     def destroy(self, request, *args, **kwargs):
+        if self.load_free_writes and type(self).perform_destroy is DestroyModelMixin.perform_destroy:
+            query = self.get_write_query()
+
+            if query is not None:
+                # Use the rowcount for the 404 instead of selecting the instance first.
+                if not query.delete(synchronize_session=False):
+                    raise HTTPNotFound()
+
+                self.invalidate_cache()
+                return Response(status=204)
+
         instance = self.get_object()
         self.perform_destroy(instance)
+        self.invalidate_cache()
         return Response(status=204)
 
     def perform_destroy(self, instance):
@@ -142,6 +682,166 @@ class DestroyModelMixin:
         self.request.dbsession.delete(instance)
 
 
+class BulkModelMixin:
+    """
+    Shared behavior of the mixins that write every instance matched by the view's filters.
+    """
+
+    def get_bulk_query(self):
+        """
+        Returns the filtered query selecting the rows to write. Requests that do not filter the query are refused,
+        so a single request can not write every row of a table.
+        """
+
+        query = self.get_query()
+        filtered = self.filter_query(query)
+
+        # Filters may return a new criterion that adds nothing to the WHERE clause, so the compiled clauses are
+        # compared. Joins and ordering do not restrict the rows written.
+        if self.get_where_clause(filtered) == self.get_where_clause(query):
+            raise HTTPBadRequest(detail='Bulk operations require at least one filter.')
+
+        return filtered
+
+    def get_where_clause(self, query):
+        """
+        Returns the SQL of the WHERE clause of ``query``, an empty string if it has none.
+        """
+
+        if query.whereclause is None:
+            return ''
+
+        return str(query.whereclause)
+
+    def get_bulk_write_query(self, query):
+        """
+        ``Query.update()`` and ``Query.delete()`` can't be used on joined queries. For those the rows are matched
+        by a primary key subquery instead, which still runs as a single statement.
+        """
+
+        # False resets any ordering, update() and delete() refuse queries with an explicit order_by(None).
+        query = query.order_by(False)
+
+        if not query._join_entities and not query._from_obj:
+            return query
+
+        pk = self.model.__mapper__.primary_key[0]
+        return self.request.dbsession.query(self.model).filter(pk.in_(query.with_entities(pk).subquery()))
+
+    def get_bulk_instances(self, query):
+        """
+        Loads the instances matched by ``query``, checking the object level permissions of every instance before
+        any of them are written.
+        """
+
+        instances = query.all()
+
+        for instance in instances:
+            # May raise HTTPForbidden
+            self.check_object_permissions(self.request, instance)
+
+        return instances
+
+
+class BulkUpdateModelMixin(BulkModelMixin):
+    """
+    Partially update every instance matched by the view's filters (PATCH on the list route).
+    """
+
+    #: Enables the ``bulk_update`` action.
+    allow_bulk_update = False
+
+    def bulk_update(self, request, *args, **kwargs):
+        if not self.allow_bulk_update:
+            return self.http_method_not_allowed(request, *args, **kwargs)
+
+        schema = self.get_schema()
+
+        try:
+            data, errors = schema.load(request.json_body,
+                                       partial=True)  # todo, hardcoded json here, need to implement parsers
+        except ma.ValidationError as err:
+            return Response(json=err.messages, status=400)  # todo, hardcoded json here, need to implement parsers
+
+        count = self.perform_bulk_update(data, self.get_bulk_query())
+        self.invalidate_cache()
+
+        return Response(json={'count': count})  # todo, hardcoded json here, need to implement parsers
+
+    def perform_bulk_update(self, data, query):
+        """
+        Hook for controlling the update of many instances. The rows are updated with a single
+        ``UPDATE ... WHERE`` statement. If the view has object level permissions or overrides
+        ``perform_partial_update()`` or ``perform_update()``, each instance is loaded and updated individually
+        instead, with the partial update hook if it is overridden.
+
+        :return: The number of updated instances.
+        """
+
+        custom_hook = None
+
+        if getattr(type(self), 'perform_partial_update', None) not in (None, PartialUpdateMixin.perform_partial_update):
+            custom_hook = self.perform_partial_update
+        elif getattr(type(self), 'perform_update', None) not in (None, UpdateModelMixin.perform_update):
+            custom_hook = self.perform_update
+
+        if custom_hook is None and not self.has_object_permissions():
+            return self.get_bulk_write_query(query).update(data, synchronize_session=False)
+
+        instances = self.get_bulk_instances(query)
+
+        for instance in instances:
+            if custom_hook is not None:
+                custom_hook(data, instance)
+            else:
+                for key, val in data.items():
+                    setattr(instance, key, val)
+
+        return len(instances)
+
+
+class BulkDestroyModelMixin(BulkModelMixin):
+    """
+    Destroy every instance matched by the view's filters (DELETE on the list route).
+    """
+
+    #: Enables the ``bulk_destroy`` action.
+    allow_bulk_destroy = False
+
+    def bulk_destroy(self, request, *args, **kwargs):
+        if not self.allow_bulk_destroy:
+            return self.http_method_not_allowed(request, *args, **kwargs)
+
+        count = self.perform_bulk_destroy(self.get_bulk_query())
+        self.invalidate_cache()
+
+        return Response(json={'count': count})  # todo, hardcoded json here, need to implement parsers
+
+    def perform_bulk_destroy(self, query):
+        """
+        Hook for controlling the deletion of many instances. The rows are deleted with a single
+        ``DELETE ... WHERE`` statement. If the view has object level permissions or overrides ``perform_destroy()``,
+        each instance is loaded and deleted individually instead.
+
+        :return: The number of deleted instances.
+        """
+
+        custom_hook = getattr(type(self), 'perform_destroy', None) not in (None, DestroyModelMixin.perform_destroy)
+
+        if not custom_hook and not self.has_object_permissions():
+            return self.get_bulk_write_query(query).delete(synchronize_session=False)
+
+        instances = self.get_bulk_instances(query)
+
+        for instance in instances:
+            if custom_hook:
+                self.perform_destroy(instance)
+            else:
+                self.request.dbsession.delete(instance)
+
+        return len(instances)
+
+
 class ActionSchemaMixin:
     """
     Allows you to use different schema depending on the action being taken by the request.
@@ -1,10 +1,15 @@
+import sys
+import threading
 import warnings
 import six
 
 from math import ceil
 
 from collections import OrderedDict, Sequence
+from concurrent.futures import ThreadPoolExecutor
 
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm.query import Query
 
 from pyramid.exceptions import HTTPNotFound
@@ -252,9 +257,30 @@ class PageNumberPagination(BasePagination):
 
     invalid_page_message = 'Invalid page "{page_number}": {message}.'
 
+    #: Paginate queries in the database: fetch the page with ``LIMIT`` and ``OFFSET`` while the rows are counted
+    #: concurrently on another pooled connection, instead of loading every row. See ``paginate_in_database()``.
+    parallel_count = False
+
+    #: The number of threads running count queries, shared by the paginators with ``parallel_count``.
+    count_max_workers = 4
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def get_executor(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=cls.count_max_workers, thread_name_prefix='restful-count')
+
+        return cls._executor
+
     def paginate_query(self, query, request):
         self.request = request
 
+        if self.parallel_count and isinstance(query, Query):
+            return self.paginate_in_database(query, request)
+
         # Force the execution of the query, so we don't make unnecessary db calls
         data = query.all() if isinstance(query, Query) else query
         page_size = self.get_page_size(request)
@@ -278,6 +304,78 @@ class PageNumberPagination(BasePagination):
 
         return list(self.page)
 
+    def paginate_in_database(self, query, request):
+        """
+        Paginates ``query`` with two queries joined before returning the page: the rows of the page, fetched with
+        ``LIMIT`` and ``OFFSET`` by the session, and their count, run by the executor on another connection checked
+        out from the pool of the engine. The count does not see the changes the session has not committed. When the
+        session is bound to a connection rather than an engine, or the last page is requested, the rows are counted
+        first by the session.
+
+        :param query: SQLAlchemy ``query``.
+        :param request: The request from the view
+        :return: The rows of the page or ``None`` if pagination is disabled.
+        """
+
+        page_size = self.get_page_size(request)
+
+        if not page_size:
+            return None
+
+        page_number = request.params.get(self.page_query_param, 1)
+        bind = query.session.get_bind(clause=query.statement)
+
+        if page_number in self.last_page_strings or not isinstance(bind, Engine):
+            paginator = self.paginator_class(range(self.get_count(query)), page_size)
+
+            if page_number in self.last_page_strings:
+                page_number = paginator.num_pages
+
+            number = self.validate_page_number(paginator, page_number)
+            rows = self.get_page_rows(query, number, page_size)
+        else:
+            # The number of pages is not known before the count, only reject the numbers no paginator accepts.
+            number = self.validate_page_number(self.paginator_class(range(sys.maxsize), page_size), page_number)
+            future = self.get_executor().submit(self.get_count, query, bind)
+
+            try:
+                rows = self.get_page_rows(query, number, page_size)
+            finally:
+                count = future.result()
+
+            paginator = self.paginator_class(range(count), page_size)
+            self.validate_page_number(paginator, number)
+
+        self.page = paginator._get_page(rows, number, paginator)
+
+        return list(self.page)
+
+    def validate_page_number(self, paginator, page_number):
+        try:
+            return paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=six.text_type(exc)
+            )
+            raise HTTPNotFound(msg)
+
+    def get_page_rows(self, query, number, page_size):
+        return query.limit(page_size).offset((number - 1) * page_size).all()
+
+    def get_count(self, query, bind=None):
+        """
+        Counts the rows of ``query``, on a connection of its own checked out from ``bind`` if given, otherwise with
+        the session of the query.
+        """
+
+        statement = select([func.count()]).select_from(query.order_by(None).statement.alias())
+
+        if bind is None:
+            return query.session.execute(statement).scalar()
+
+        with bind.connect() as connection:
+            return connection.execute(statement).scalar()
+
     def get_paginated_response(self, data):
         return Response(json=OrderedDict([
             ('count', self.page.paginator.count),
@@ -0,0 +1,395 @@
+import cProfile
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from pyramid.httpexceptions import HTTPForbidden, HTTPNotFound
+from pyramid.response import Response
+
+from .instrumentation import RequestProfile
+from .views import APIView
+
+logger = logging.getLogger('restful_pyramid')
+
+__all__ = ['ProfileAggregates', 'SamplingProfile', 'ProfilerView', 'MemoryProfile', 'aggregates']
+
+_local = threading.local()
+_tracing_lock = threading.Lock()
+
+
+def get_frame_name(frame):
+    code = frame.f_code
+
+    return '{}:{}'.format(os.path.basename(code.co_filename), code.co_name)
+
+
+class ProfileAggregates:
+    """
+    Aggregates the profiles of sampled requests by route and action: the ``cProfile`` stats merged into one
+    ``pstats.Stats`` per route, and the stacks captured by the stack sampler counted per route.
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self.stacks = {}
+        self.lock = threading.Lock()
+
+    def add_profile(self, key, profiler):
+        with self.lock:
+            if key in self.stats:
+                self.stats[key].add(profiler)
+            else:
+                self.stats[key] = pstats.Stats(profiler)
+
+    def add_stack(self, key, stack):
+        stacks = self.stacks.setdefault(key, {})
+        stacks[stack] = stacks.get(stack, 0) + 1
+
+    def get_pstats(self, key):
+        """
+        Returns the merged stats of a route in the binary format read by ``pstats.Stats`` and tools such as
+        snakeviz, or ``None`` if none of its requests were profiled.
+        """
+
+        with self.lock:
+            stats = self.stats.get(key)
+
+            if stats is None:
+                return None
+
+            return marshal.dumps(stats.stats)
+
+    def get_summary(self, key, limit=30):
+        """
+        Returns the ``limit`` functions with the highest cumulative time for a route, as printed by ``pstats``.
+        """
+
+        stream = io.StringIO()
+
+        with self.lock:
+            stats = self.stats.get(key)
+
+            if stats is None:
+                return None
+
+            stats.stream = stream
+            stats.sort_stats('cumulative').print_stats(limit)
+
+        return stream.getvalue()
+
+    def get_collapsed(self):
+        """
+        Returns the sampled stacks in the collapsed format read by flame graph tools. Each line is a stack, starting
+        with the route and action, followed by the number of times it was sampled.
+        """
+
+        lines = []
+
+        for (route, action), stacks in sorted(self.stacks.copy().items(), key=lambda item: str(item[0])):
+            for stack, count in sorted(stacks.copy().items()):
+                lines.append('{};{};{} {}'.format(route, action, stack, count))
+
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def clear(self):
+        with self.lock:
+            self.stats.clear()
+            self.stacks.clear()
+
+
+#: The aggregates used by default by ``SamplingProfile`` and ``ProfilerView``.
+aggregates = ProfileAggregates()
+
+
+class StackSampler:
+    """
+    Captures the stack of the registered threads every ``interval`` seconds from a single daemon thread, started
+    when the first thread is registered.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.threads = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def add(self, thread_id, key, aggregates):
+        with self.lock:
+            self.threads[thread_id] = (key, aggregates)
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='restful-stack-sampler', daemon=True)
+                self.thread.start()
+
+    def remove(self, thread_id):
+        with self.lock:
+            self.threads.pop(thread_id, None)
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+
+            for thread_id, (key, aggregates) in list(self.threads.items()):
+                frame = frames.get(thread_id)
+                names = []
+
+                while frame is not None:
+                    names.append(get_frame_name(frame))
+                    frame = frame.f_back
+
+                if names:
+                    aggregates.add_stack(key, ';'.join(reversed(names)))
+
+
+_samplers = {}
+_samplers_lock = threading.Lock()
+
+
+def get_sampler(interval):
+    with _samplers_lock:
+        if interval not in _samplers:
+            _samplers[interval] = StackSampler(interval)
+
+        return _samplers[interval]
+
+
+class SamplingProfile(RequestProfile):
+    """
+    A ``RequestProfile`` profiling a random ``sample_rate`` fraction of requests, either with ``cProfile`` or with
+    a stack sampler, which has a lower overhead. Results are aggregated per route name and action in a
+    ``ProfileAggregates``, exposed by ``ProfilerView``. Requests nested in a profiled request, such as batch
+    sub-requests, are part of the outer profile.
+    """
+
+    server_timing = False
+    log_level = None
+    #: The fraction of requests profiled, between 0 and 1.
+    sample_rate = 0.01
+    #: ``'cprofile'`` to trace every function call or ``'stack'`` to sample the stack every ``interval`` seconds.
+    mode = 'cprofile'
+    #: The number of seconds between stack samples.
+    interval = 0.005
+    #: The ``ProfileAggregates`` receiving the profiles.
+    aggregates = aggregates
+
+    def __init__(self, request, view):
+        super().__init__(request, view)
+        self.profiler = None
+        self.sampled = False
+
+    def get_key(self):
+        action = getattr(self.view, 'action', None) or self.request.method.lower()
+
+        return self.route_name or '', action
+
+    def __enter__(self):
+        profile = super().__enter__()
+
+        if not getattr(_local, 'profiling', False) and random.random() < self.sample_rate:
+            _local.profiling = self.sampled = True
+
+            if self.mode == 'stack':
+                get_sampler(self.interval).add(threading.get_ident(), self.get_key(), self.aggregates)
+            else:
+                self.profiler = cProfile.Profile()
+                self.profiler.enable()
+
+        return profile
+
+    def __exit__(self, *exc_info):
+        if self.sampled:
+            _local.profiling = False
+
+            if self.profiler is not None:
+                self.profiler.disable()
+                self.aggregates.add_profile(self.get_key(), self.profiler)
+            else:
+                get_sampler(self.interval).remove(threading.get_ident())
+
+        return super().__exit__(*exc_info)
+
+
+class MemoryProfile(RequestProfile):
+    """
+    A ``RequestProfile`` tracing the memory allocated by requests with ``tracemalloc``, to find what makes workers
+    grow. Reports the peak memory of each request, the memory retained by each phase and the largest allocation
+    sites still alive when the response is rendered, categorized as ORM instances, marshmallow output or rendered
+    JSON. Reports are logged to the ``restful_pyramid`` logger, with the measurements in the ``restful_memory``
+    attribute of the log record.
+
+    ``tracemalloc`` traces the whole process and slows it down considerably. Only one request is traced at a time,
+    requests running concurrently are not traced, and allocations made by other threads are included. Use it in
+    diagnostics, ideally with a single threaded worker.
+    """
+
+    server_timing = False
+    log_level = None
+    #: The level of the log record reporting the memory.
+    memory_log_level = logging.INFO
+    #: The number of allocation sites reported.
+    max_sites = 10
+    #: The phase after which the allocation sites are captured.
+    snapshot_phase = 'render'
+    #: The category of allocation sites, by the package of the file allocating.
+    categories = (
+        (os.sep + 'sqlalchemy' + os.sep, 'orm'),
+        (os.sep + 'marshmallow' + os.sep, 'marshmallow'),
+        (os.sep + 'json' + os.sep, 'json'),
+        (os.sep + 'webob' + os.sep, 'response'),
+    )
+
+    def __init__(self, request, view):
+        super().__init__(request, view)
+        self.tracing = False
+        self.snapshot = None
+        self.peak = None
+        self.memory_phases = OrderedDict()
+
+    def __enter__(self):
+        profile = super().__enter__()
+
+        if not tracemalloc.is_tracing() and _tracing_lock.acquire(blocking=False):
+            self.tracing = True
+            tracemalloc.start()
+
+        return profile
+
+    def __exit__(self, *exc_info):
+        if self.tracing:
+            if self.snapshot is None:
+                self.snapshot = tracemalloc.take_snapshot()
+
+            self.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            _tracing_lock.release()
+
+        return super().__exit__(*exc_info)
+
+    @contextmanager
+    def phase(self, name):
+        before = tracemalloc.get_traced_memory()[0] if self.tracing else 0
+
+        with super().phase(name):
+            yield self
+
+        if self.tracing:
+            retained = tracemalloc.get_traced_memory()[0] - before
+            self.memory_phases[name] = self.memory_phases.get(name, 0) + retained
+
+            if name == self.snapshot_phase and self.snapshot is None:
+                self.snapshot = tracemalloc.take_snapshot()
+
+    def get_category(self, filename):
+        for pattern, category in self.categories:
+            if pattern in filename:
+                return category
+
+        return 'other'
+
+    def get_sites(self):
+        """
+        Returns the largest allocation sites of the snapshot, sizes are in KiB.
+        """
+
+        snapshot = self.snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        sites = []
+
+        for statistic in snapshot.statistics('lineno')[:self.max_sites]:
+            frame = statistic.traceback[0]
+            sites.append({
+                'site': '{}:{}'.format(frame.filename, frame.lineno),
+                'category': self.get_category(frame.filename),
+                'size': statistic.size / 1024,
+                'count': statistic.count,
+            })
+
+        return sites
+
+    def get_categories(self):
+        """
+        Returns the memory allocated in each category in the snapshot, in KiB.
+        """
+
+        sizes = {}
+
+        for statistic in self.snapshot.statistics('filename'):
+            category = self.get_category(statistic.traceback[0].filename)
+            sizes[category] = sizes.get(category, 0) + statistic.size / 1024
+
+        return sizes
+
+    def get_memory(self):
+        """
+        Returns the memory measurements of the request, in KiB, or ``None`` if it was not traced.
+        """
+
+        if not self.tracing:
+            return None
+
+        return {
+            'peak': self.peak / 1024,
+            'rows': self.rows,
+            'phases': {name: size / 1024 for name, size in self.memory_phases.items()},
+            'categories': self.get_categories(),
+            'sites': self.get_sites(),
+        }
+
+    def report(self, response):
+        response = super().report(response)
+        memory = self.get_memory()
+
+        if memory is not None and self.memory_log_level is not None:
+            logger.log(
+                self.memory_log_level, 'Request memory %s %s: peak %.1f KiB',
+                self.request.method, self.request.path, memory['peak'],
+                extra={'restful_memory': memory}
+            )
+
+        return response
+
+
+class ProfilerView(APIView):
+    """
+    Exposes the ``ProfileAggregates`` of ``SamplingProfile``. Returns the sampled stacks in the collapsed format by
+    default. With the ``route`` and ``action`` query parameters returns the ``cProfile`` stats of a route, as text or
+    with ``format=pstats`` as a file to load with ``pstats.Stats``. Requests are only accepted from the addresses in
+    ``allowed_addresses``.
+    """
+
+    #: The aggregates exposed by the view.
+    aggregates = aggregates
+    #: The client addresses allowed to read the profiles, ``None`` allows any.
+    allowed_addresses = ('127.0.0.1', '::1')
+
+    def get(self, request, *args, **kwargs):
+        if self.allowed_addresses is not None and request.remote_addr not in self.allowed_addresses:
+            raise HTTPForbidden()
+
+        if 'route' not in request.params:
+            return Response(text=self.aggregates.get_collapsed(), content_type='text/plain', charset='utf-8')
+
+        key = request.params['route'], request.params.get('action', 'get')
+
+        if request.params.get('format') == 'pstats':
+            body = self.aggregates.get_pstats(key)
+            content_type = 'application/octet-stream'
+        else:
+            body = self.aggregates.get_summary(key)
+            body = body.encode('utf-8') if body is not None else None
+            content_type = 'text/plain'
+
+        if body is None:
+            raise HTTPNotFound()
+
+        return Response(body=body, content_type=content_type)
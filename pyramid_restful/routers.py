@@ -1,10 +1,12 @@
 import itertools
+import traceback
+import weakref
 
 from collections import namedtuple
 
 from .exceptions import ImproperlyConfigured
 
-__all__ = ['ViewSetRouter']
+__all__ = ['ViewSetRouter', 'NestedViewSetRouter']
 
 Route = namedtuple('Route', ['url', 'mapping', 'name', 'initkwargs'])
 DynamicDetailRoute = namedtuple('DynamicDetailRoute', ['url', 'name', 'initkwargs'])
@@ -31,6 +33,42 @@ def flatten(list_of_lists):
     return itertools.chain(*list_of_lists)
 
 
+_decorated_methods = weakref.WeakKeyDictionary()
+
+
+def get_decorated_methods(viewset):
+    """
+    Returns a list of ``(methodname, method)`` for the methods of a viewset decorated with ``@detail_route`` or
+    ``@list_route``, sorted by name. Only the namespaces of the classes in the viewset's MRO are inspected, instead of
+    every attribute returned by ``dir()``, and the result is computed once per class. Attributes set on a viewset
+    instance are taken into account.
+    """
+
+    cls = viewset if isinstance(viewset, type) else type(viewset)
+
+    try:
+        methods = _decorated_methods[cls]
+    except KeyError:
+        namespace = {}
+
+        for klass in reversed(cls.__mro__):
+            namespace.update(vars(klass))
+
+        methods = {name: attr for name, attr in namespace.items() if getattr(attr, 'bind_to_methods', None)}
+        _decorated_methods[cls] = methods
+
+    if not isinstance(viewset, type) and vars(viewset):
+        methods = dict(methods)
+
+        for name, attr in vars(viewset).items():
+            if getattr(attr, 'bind_to_methods', None):
+                methods[name] = attr
+            else:
+                methods.pop(name, None)
+
+    return sorted(methods.items())
+
+
 class ViewSetRouter:
     """
     Automatically adds routes and associates views to the Pyramid ``Configurator`` for ViewSets, including
@@ -43,7 +81,9 @@ class ViewSetRouter:
             url=r'/{prefix}{trailing_slash}',
             mapping={
                 'get': 'list',
-                'post': 'create'
+                'post': 'create',
+                'patch': 'bulk_update',
+                'delete': 'bulk_destroy'
             },
             name='{basename}-list',
             initkwargs=dict()
@@ -98,6 +138,10 @@ class ViewSetRouter:
 
         lookup = self.get_lookup(viewset)
         routes = self.get_routes(viewset)
+        # Pyramid extracts the calling frame on every add_route() and add_view() to report configuration conflicts.
+        # Extract it once per viewset, so conflicts point at the line registering the viewset.
+        stack = traceback.extract_stack(limit=4)[:-1]
+        info = tuple(next((frame for frame in reversed(stack) if frame.filename != __file__), stack[0]))
 
         for route in routes:
             # Only actions which actually exist on the viewset will be bound
@@ -107,19 +151,43 @@ class ViewSetRouter:
                 continue  # empty viewset
 
             url = route.url.format(
-                prefix=prefix,
+                prefix=self.get_prefix(prefix),
                 lookup=lookup,
                 trailing_slash=self.trailing_slash
             )
-            view = viewset.as_view(mapping, **route.initkwargs)
+            view = viewset.as_view(mapping, basename=basename, **route.initkwargs)
             name = route.name.format(basename=basename)
 
             if factory:
-                self.configurator.add_route(name, url, factory=factory)
+                self.configurator.add_route(name, url, factory=factory, _info=info)
             else:
-                self.configurator.add_route(name, url)
+                self.configurator.add_route(name, url, _info=info)
 
-            self.configurator.add_view(view, route_name=name, permission=permission)
+            self.configurator.add_view(view, route_name=name, permission=permission, _info=info)
+
+    def register_batch(self, prefix='batch', view_class=None, name='batch', factory=None, permission=None):
+        """
+        Route a ``BatchView`` executing many requests to the application's views in a single **POST**.
+
+        :param prefix: the uri of the batch endpoint.
+        :param view_class: Optional, a ``BatchView`` subclass. Defaults to ``BatchView``.
+        :param name: The name of the route.
+        :param factory: Optional, root factory to be used as the context to the route.
+        :param permission: Optional, permission to assign the route.
+        """
+
+        if view_class is None:
+            from .batch import BatchView
+            view_class = BatchView
+
+        url = '/{}{}'.format(self.get_prefix(prefix), self.trailing_slash)
+
+        if factory:
+            self.configurator.add_route(name, url, factory=factory)
+        else:
+            self.configurator.add_route(name, url)
+
+        self.configurator.add_view(view_class.as_view(), route_name=name, request_method='POST', permission=permission)
 
     def get_routes(self, viewset):
         """
@@ -127,36 +195,30 @@ class ViewSetRouter:
         Returns a list of the Route namedtuple.
         """
 
-        known_actions = list(flatten([route.mapping.values() for route in self.routes if isinstance(route, Route)]))
+        known_actions = self.get_known_actions()
 
         # Determine any `@detail_route` or `@list_route` decorated methods on the viewset
         detail_routes = []
         list_routes = []
 
-        for methodname in dir(viewset):
-            attr = getattr(viewset, methodname)
-            httpmethods = getattr(attr, 'bind_to_methods', None)
-            detail = getattr(attr, 'detail', True)
+        for methodname, attr in get_decorated_methods(viewset):
+            # check against know actions list
+            if methodname in known_actions:
+                raise ImproperlyConfigured('Cannot use @detail_route or @list_route '
+                                           'decorators on method "{}" '
+                                           'as it is an existing route'.format(methodname))
 
-            if httpmethods:
-                # check against know actions list
-                if methodname in known_actions:
-                    raise ImproperlyConfigured('Cannot use @detail_route or @list_route '
-                                               'decorators on method "%s" '
-                                               'as it is an existing route'.format(methodname))
+            httpmethods = [method.lower() for method in attr.bind_to_methods]
 
-                httpmethods = [method.lower() for method in httpmethods]
-
-                if detail:
-                    detail_routes.append((httpmethods, methodname))
-                else:
-                    list_routes.append((httpmethods, methodname))
+            if getattr(attr, 'detail', True):
+                detail_routes.append((httpmethods, methodname, attr.kwargs))
+            else:
+                list_routes.append((httpmethods, methodname, attr.kwargs))
 
         def _get_dynamic_routes(route, dynamic_routes):
             ret = []
 
-            for httpmethods, methodname in dynamic_routes:
-                method_kwargs = getattr(viewset, methodname).kwargs
+            for httpmethods, methodname, method_kwargs in dynamic_routes:
                 initkwargs = route.initkwargs.copy()
                 initkwargs.update(method_kwargs)
                 url_path = initkwargs.pop("url_path", None) or methodname
@@ -185,6 +247,25 @@ class ViewSetRouter:
 
         return ret
 
+    def get_prefix(self, prefix):
+        """
+        Returns the full uri prefix of the routes registered with ``prefix``.
+        """
+
+        return prefix
+
+    def get_known_actions(self):
+        """
+        Returns the set of actions bound by the standard routes, computed once per router.
+        """
+
+        if not hasattr(self, '_known_actions'):
+            self._known_actions = set(flatten(
+                [route.mapping.values() for route in self.routes if isinstance(route, Route)]
+            ))
+
+        return self._known_actions
+
     def get_lookup(self, viewset):
         base_regex = '{%s}'
         lookup_field = getattr(viewset, 'lookup_field', 'id')
@@ -194,7 +275,7 @@ class ViewSetRouter:
             lookup_url_keys = list(lookup_url_kwargs)
 
             if len(lookup_url_keys) > 1:
-                raise ImproperlyConfigured('ViewSetRouter does not support nested routes.')
+                raise ImproperlyConfigured('ViewSetRouter does not support nested routes, use NestedViewSetRouter.')
 
             lookup_url_kwarg = lookup_url_keys[0]
         else:
@@ -205,13 +286,70 @@ class ViewSetRouter:
     def get_method_map(self, viewset, method_map):
         """
         Given a viewset, and a mapping of http methods to actions, return a new mapping which only
-        includes any mappings that are actually implemented by the viewset.
+        includes any mappings that are actually implemented by the viewset. Bulk updates and destroys are only
+        mapped when the viewset enables them with ``allow_bulk_update`` and ``allow_bulk_destroy``.
         """
 
         bound_methods = {}
 
         for method, action in method_map.items():
+            if action in ('bulk_update', 'bulk_destroy') and not getattr(viewset, 'allow_' + action, False):
+                continue
+
             if hasattr(viewset, action):
                 bound_methods[method] = action
 
         return bound_methods
+
+
+class NestedViewSetRouter(ViewSetRouter):
+    """
+    Routes viewsets under the detail route of a parent registered with another router, for example
+    ``/users/{user_id}/orders/{id}/``. The viewsets must declare the parent lookup in ``parent_lookups`` so their
+    queries are restricted to the parent's children.
+
+    Usage::
+
+        class OrderViewSet(ModelCRUDViewSet):
+            model = Order
+            schema_class = OrderSchema
+            parent_lookups = {'user_id': Order.user_id}
+
+        router = ViewSetRouter(config)
+        router.register('users', UserViewSet, 'user')
+
+        users_router = NestedViewSetRouter(router, 'users', 'user_id')
+        users_router.register('orders', OrderViewSet, 'user-order')
+    """
+
+    def __init__(self, parent_router, parent_prefix, parent_lookup_kwarg, trailing_slash=None):
+        """
+        :param parent_router: The router the parent viewset is registered with. May itself be nested.
+        :param parent_prefix: The uri prefix the parent viewset is registered with.
+        :param parent_lookup_kwarg: The name of the url placeholder holding the parent's lookup value.
+        :param trailing_slash: Defaults to the parent router's setting.
+        """
+
+        if trailing_slash is None:
+            trailing_slash = bool(parent_router.trailing_slash)
+
+        super().__init__(parent_router.configurator, trailing_slash=trailing_slash)
+
+        self.parent_router = parent_router
+        self.parent_lookup_kwarg = parent_lookup_kwarg
+        self.parent_prefix = '{}/{{{}}}'.format(parent_router.get_prefix(parent_prefix), parent_lookup_kwarg)
+
+    def get_prefix(self, prefix):
+        return '{}/{}'.format(self.parent_prefix, prefix)
+
+    def register(self, prefix, viewset, basename, factory=None, permission=None):
+        if self.parent_lookup_kwarg not in (getattr(viewset, 'parent_lookups', None) or {}):
+            raise ImproperlyConfigured("'{}' must declare '{}' in its `parent_lookups` attribute to be nested."
+                                       .format(getattr(viewset, '__name__', type(viewset).__name__),
+                                               self.parent_lookup_kwarg))
+
+        if self.get_lookup(viewset) == '{{{}}}'.format(self.parent_lookup_kwarg):
+            raise ImproperlyConfigured("The lookup of '{}' conflicts with the parent lookup '{}'."
+                                       .format(basename, self.parent_lookup_kwarg))
+
+        super().register(prefix, viewset, basename, factory=factory, permission=permission)
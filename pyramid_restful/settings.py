@@ -10,13 +10,25 @@ DEFAULTS = {
     # Pagination
     'page_size': None,
     # Permissions
-    'default_permission_classes': []
+    'default_permission_classes': [],
+    # Post-commit tasks
+    'post_commit_executor': None,
+    'post_commit_max_workers': 4,
+    # Profiling
+    'default_profile_class': None,
+    'slow_request_threshold': None,
+    'slow_request_file': None,
+    'slow_request_max_bytes': 10485760,
+    'slow_request_backup_count': 5,
+    'slow_request_explain': False,
 }
 
 # List of settings that may be in string import notation.
 IMPORT_STRINGS = (
     'default_pagination_class',
-    'default_permission_classes'
+    'default_permission_classes',
+    'post_commit_executor',
+    'default_profile_class',
 )
 
 
@@ -0,0 +1,138 @@
+import json
+import logging
+import threading
+
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from pyramid.settings import asbool
+
+from . import settings
+from .instrumentation import RequestProfile
+
+logger = logging.getLogger('restful_pyramid')
+#: Receives a JSON record for each slow request.
+record_logger = logging.getLogger('restful_pyramid.slow_requests')
+
+__all__ = ['SlowRequestProfile']
+
+_handlers = {}
+_handlers_lock = threading.Lock()
+
+
+def get_record_handler(filename):
+    """
+    Returns the ``RotatingFileHandler`` writing records to ``filename``, created on first use according to the
+    ``slow_request_max_bytes`` and ``slow_request_backup_count`` settings.
+    """
+
+    with _handlers_lock:
+        handler = _handlers.get(filename)
+
+        if handler is None:
+            handler = _handlers[filename] = RotatingFileHandler(
+                filename,
+                maxBytes=int(settings.api_settings.slow_request_max_bytes),
+                backupCount=int(settings.api_settings.slow_request_backup_count),
+                encoding='utf-8',
+                delay=True
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+
+    return handler
+
+
+class SlowRequestProfile(RequestProfile):
+    """
+    A ``RequestProfile`` recording requests slower than the ``slow_request_threshold`` setting, in milliseconds, to
+    be analyzed offline. Records hold the route, the sorted query parameters, the timings of each phase and the SQL
+    statements with their parameters. When ``slow_request_explain`` is enabled the query plans of the slowest
+    ``SELECT`` statements are added, by running them again with ``EXPLAIN``.
+
+    Records are written one JSON object per line to the ``slow_request_file`` setting, rotated once it reaches
+    ``slow_request_max_bytes``. Without a file they are logged to the ``restful_pyramid.slow_requests`` logger.
+    Enable it for every view with the ``default_profile_class`` setting.
+    """
+
+    server_timing = False
+    log_level = None
+    #: The maximum number of statements in a record.
+    max_statements = 100
+    #: The number of slowest ``SELECT`` statements explained.
+    max_explained = 3
+
+    def is_slow(self):
+        threshold = settings.api_settings.slow_request_threshold
+
+        return threshold is not None and self.duration * 1000 >= float(threshold)
+
+    def get_params(self):
+        """
+        Returns the query parameters of the request as sorted ``[name, value]`` pairs.
+        """
+
+        return sorted([name, val] for name, val in self.request.params.items())
+
+    def get_statements(self):
+        statements = [{
+            'statement': statement['statement'],
+            'parameters': statement['parameters'],
+            'duration': statement['duration'] * 1000,
+            'phase': statement['phase'],
+        } for statement in self.statements[:self.max_statements]]
+
+        if asbool(settings.api_settings.slow_request_explain):
+            selects = [statement for statement in statements
+                       if statement['statement'].lstrip().upper().startswith('SELECT')]
+            selects.sort(key=lambda statement: statement['duration'], reverse=True)
+
+            for statement in selects[:self.max_explained]:
+                statement['explain'] = self.explain(statement['statement'], statement['parameters'])
+
+        return statements
+
+    def explain(self, statement, parameters):
+        """
+        Returns the lines of the query plan of ``statement``, or ``None`` if it could not be explained.
+        """
+
+        try:
+            connection = self.request.dbsession.connection()
+            prefix = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+            rows = connection.execute(prefix + statement, parameters).fetchall()
+        except Exception:
+            logger.exception('Slow request statement could not be explained')
+            return None
+
+        return [' '.join(str(col) for col in row) for row in rows]
+
+    def get_record(self, response):
+        record = self.as_dict(response)
+        record.update({
+            'time': datetime.utcnow().isoformat() + 'Z',
+            'params': self.get_params(),
+            'statements': self.get_statements(),
+        })
+
+        return record
+
+    def report(self, response):
+        response = super().report(response)
+
+        if self.is_slow():
+            try:
+                self.write(self.get_record(response))
+            except Exception:
+                logger.exception('Slow request %s %s could not be recorded', self.request.method, self.request.path)
+
+        return response
+
+    def write(self, record):
+        line = json.dumps(record, default=str, sort_keys=True)
+        filename = settings.api_settings.slow_request_file
+
+        if filename:
+            handler = get_record_handler(filename)
+            handler.handle(logging.makeLogRecord({'name': record_logger.name, 'msg': line}))
+        else:
+            record_logger.warning(line)
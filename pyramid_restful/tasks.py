@@ -0,0 +1,159 @@
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+
+from . import settings
+
+logger = logging.getLogger('restful_pyramid')
+
+__all__ = ['on_commit', 'after_commit', 'after_rollback', 'get_executor']
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns the executor running post-commit tasks. This is the ``post_commit_executor`` setting if it is configured,
+    otherwise a ``ThreadPoolExecutor`` with ``post_commit_max_workers`` threads, shared by the process.
+    """
+
+    global _executor
+
+    executor = settings.api_settings.post_commit_executor
+
+    if executor is not None:
+        return executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(settings.api_settings.post_commit_max_workers),
+                thread_name_prefix='restful-post-commit'
+            )
+
+    return _executor
+
+
+def _run_task(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Post-commit task %r failed', func)
+
+
+def _is_within(transaction, ancestor):
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+
+        transaction = transaction.parent
+
+    return False
+
+
+def _after_commit(session):
+    # Released savepoints also fire ``after_commit``, their tasks wait for the outermost transaction.
+    if session.transaction is not None and session.transaction.parent is not None:
+        return
+
+    callbacks = session.info.pop('post_commit_callbacks', [])
+    tasks = session.info.pop('post_commit_tasks', [])
+    session.info.pop('post_rollback_callbacks', None)
+
+    for transaction, func, args, kwargs in callbacks:
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            logger.exception('Post-commit callback %r failed', func)
+
+    for transaction, func, args, kwargs in tasks:
+        try:
+            get_executor().submit(_run_task, func, args, kwargs)
+        except Exception:
+            logger.exception('Post-commit task %r could not be submitted', func)
+
+
+def _run_rollback_callbacks(session, transaction):
+    callbacks = session.info.get('post_rollback_callbacks', [])
+    session.info['post_rollback_callbacks'] = [entry for entry in callbacks if not _is_within(entry[0], transaction)]
+
+    for entry_transaction, func, args, kwargs in callbacks:
+        if _is_within(entry_transaction, transaction):
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                logger.exception('Post-rollback callback %r failed', func)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    # Rolling back a savepoint only discards what was queued since it began.
+    for name in ('post_commit_callbacks', 'post_commit_tasks'):
+        if previous_transaction.parent is None:
+            session.info.pop(name, None)
+        elif name in session.info:
+            session.info[name] = [entry for entry in session.info[name]
+                                  if not _is_within(entry[0], previous_transaction)]
+
+    _run_rollback_callbacks(session, previous_transaction)
+
+
+def _after_transaction_end(session, transaction):
+    # Closing the session ends the outermost transaction without emitting ``after_soft_rollback``.
+    if transaction.parent is None:
+        _run_rollback_callbacks(session, transaction)
+
+
+def _queue(session, name, func, args, kwargs):
+    if not session.info.get('post_commit_listening'):
+        event.listen(session, 'after_commit', _after_commit)
+        event.listen(session, 'after_soft_rollback', _after_soft_rollback)
+        event.listen(session, 'after_transaction_end', _after_transaction_end)
+        session.info['post_commit_listening'] = True
+
+    session.info.setdefault(name, []).append((session.transaction, func, args, kwargs))
+
+
+def on_commit(session, func, *args, **kwargs):
+    """
+    Run ``func(*args, **kwargs)`` on the post-commit executor once the session's outermost transaction commits. Tasks
+    are discarded if the transaction is rolled back, or if the savepoint they were queued in is rolled back. Failures
+    are logged, they never affect the request.
+
+    Tasks run on another thread, after the session's objects have been expired. Pass them identifiers or plain
+    values rather than model instances.
+
+    :param session: The SQLAlchemy session performing the writes, usually ``request.dbsession``.
+    :param func: The callable to run.
+    """
+
+    _queue(session, 'post_commit_tasks', func, args, kwargs)
+
+
+def after_commit(session, func, *args, **kwargs):
+    """
+    Like ``on_commit()``, but call ``func(*args, **kwargs)`` synchronously, in the thread committing the session,
+    before the tasks queued with ``on_commit()`` are submitted. Meant for short bookkeeping that must be done by the
+    time the commit returns, such as invalidating caches.
+
+    :param session: The SQLAlchemy session performing the writes, usually ``request.dbsession``.
+    :param func: The callable to call.
+    """
+
+    _queue(session, 'post_commit_callbacks', func, args, kwargs)
+
+
+def after_rollback(session, func, *args, **kwargs):
+    """
+    Call ``func(*args, **kwargs)`` synchronously if the session's transaction is rolled back or the session is closed
+    before it commits, or if the savepoint it was queued in is rolled back. Meant for releasing what a request holds
+    outside of the database, such as reservations.
+
+    :param session: The SQLAlchemy session performing the writes, usually ``request.dbsession``.
+    :param func: The callable to call.
+    """
+
+    _queue(session, 'post_rollback_callbacks', func, args, kwargs)
@@ -0,0 +1,29 @@
+from contextlib import contextmanager
+
+from .instrumentation import RequestProfile
+
+__all__ = ['assert_max_queries']
+
+
+@contextmanager
+def assert_max_queries(count):
+    """
+    Fails if the enclosed block runs more than ``count`` SQL statements on the current thread. Yields the
+    ``RequestProfile`` recording them, whose ``statements`` can be inspected.
+
+    Usage::
+
+        with assert_max_queries(2):
+            app.get('/users/')
+
+    :param count: The maximum number of statements.
+    :raises AssertionError: Listing the statements, if more than ``count`` ran.
+    """
+
+    with RequestProfile(None, None) as profile:
+        yield profile
+
+    if profile.sql_count > count:
+        statements = '\n'.join(statement['statement'] for statement in profile.statements)
+        message = '{} queries executed, expected at most {}:\n{}'.format(profile.sql_count, count, statements)
+        raise AssertionError(message)
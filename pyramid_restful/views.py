@@ -3,8 +3,12 @@ import logging
 from pyramid.httpexceptions import HTTPClientError, HTTPMethodNotAllowed, HTTPForbidden
 from pyramid.response import Response
 
+from pyramid_restful import settings
 from pyramid_restful.settings import api_settings
 
+from .instrumentation import null_phase
+from .permissions import BasePermission
+
 logger = logging.getLogger('restful_pyramid')
 
 __all__ = ['APIView']
@@ -21,6 +25,12 @@ class APIView:
     #: An iterable of permissions classes. Defaults to ``default_permission_classes`` from the pyramid_restful
     #: configuration. Override this attribute to provide view specific permissions.
     permission_classes = api_settings.default_permission_classes
+    #: Optional ``RequestProfile`` class. Times the phases of each request and the SQL statements it runs, and
+    #: reports them in a ``Server-Timing`` header and a log record. Defaults to ``default_profile_class`` from the
+    #: pyramid_restful configuration, see ``get_profile_class()``.
+    profile_class = None
+    #: The ``RequestProfile`` of the current request, if ``profile_class`` is set.
+    profile = None
 
     def __init__(self, **kwargs):
         for key, val in kwargs.items():
@@ -28,7 +38,14 @@ class APIView:
 
     @classmethod
     def as_view(cls, **initkwargs):
+        allow = ', '.join(cls.get_allowed_methods())
+        options = initkwargs.get('options', cls.options) is APIView.options
+
         def view(request):
+            if options and request.method == 'OPTIONS':
+                # The Allow header only depends on the view class, answer without instantiating or checking permissions.
+                return cls.get_options_response(allow)
+
             self = cls(**initkwargs)
             self.request = request
             self.lookup_url_kwargs = self.request.matchdict
@@ -37,6 +54,31 @@ class APIView:
 
         return view
 
+    @classmethod
+    def get_allowed_methods(cls, action_map=None):
+        """
+        Returns the HTTP methods the view responds to. ``HEAD`` is answered by the ``GET`` handler when the view
+        does not implement it.
+
+        :param action_map: Optional, the mapping of HTTP methods to actions of a viewset.
+        """
+
+        methods = set(action_map or ()) | {m for m in cls.http_method_names if hasattr(cls, m)}
+
+        if 'get' in methods:
+            methods.add('head')
+
+        return [m.upper() for m in cls.http_method_names if m in methods]
+
+    @staticmethod
+    def get_options_response(allow):
+        response = Response()
+
+        response.headers['Allow'] = allow
+        response.headers['Content-Length'] = '0'
+
+        return response
+
     def initial(self, request, *args, **kwargs):
         """
         Runs anything that needs to occur prior to calling the method handler.
@@ -44,12 +86,35 @@ class APIView:
 
         self.check_permissions(request)  # Ensure that the incoming request is permitted
 
+    def get_profile_class(self):
+        """
+        Returns the ``profile_class`` of the view, or the ``default_profile_class`` setting. The setting is read
+        when the request is dispatched, once the application's configuration has been loaded.
+        """
+
+        if self.profile_class is not None:
+            return self.profile_class
+
+        return settings.api_settings.default_profile_class
+
     def dispatch(self, request, *args, **kwargs):
+        profile_class = self.get_profile_class() if self.profile is None else None
+
+        if profile_class is not None:
+            with profile_class(request, self) as self.profile:
+                response = self.dispatch(request, *args, **kwargs)
+
+            return self.profile.report(response)
+
         try:
-            self.initial(request, *args, **kwargs)
+            with self.timed('initial'):
+                self.initial(request, *args, **kwargs)
 
             if request.method.lower() in self.http_method_names:
                 handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+
+                if request.method == 'HEAD' and handler == self.http_method_not_allowed:
+                    handler = getattr(self, 'get', handler)
             else:
                 handler = self.http_method_not_allowed
 
@@ -59,6 +124,19 @@ class APIView:
 
         return response
 
+    def timed(self, name):
+        """
+        Returns a context manager timing a phase of the request in the view's ``profile``. Does nothing if the view
+        is not profiled.
+
+        :param name: The name of the phase, reported in the ``Server-Timing`` header.
+        """
+
+        if self.profile is None:
+            return null_phase
+
+        return self.profile.phase(name)
+
     def handle_exception(self, exc):
         if isinstance(exc, HTTPClientError):
             # HTTPClientError, implement both Response and Exception
@@ -106,6 +184,18 @@ class APIView:
             if not permission.has_object_permission(request, self, obj):
                 self.permission_denied(request, message=getattr(permission, 'message', None))
 
+    def has_object_permissions(self):
+        """
+        Returns ``True`` if any of the view's permissions implements an object level check. Views without object
+        level checks may answer some requests without loading the object.
+        """
+
+        for permission in self.get_permissions():
+            if getattr(type(permission), 'has_object_permission', None) is not BasePermission.has_object_permission:
+                return True
+
+        return False
+
     def permission_denied(self, request, message):
         # Todo figure out how to determine if this is a authorization vs authentication error.
         raise HTTPForbidden(detail=message)
@@ -115,13 +205,10 @@ class APIView:
         Handles responding to requests for the OPTIONS HTTP verb.
         """
 
-        response = Response()
-
-        response.headers['Allow'] = ', '.join(self.allowed_methods)
-        response.headers['Content-Length'] = '0'
-
-        return response
+        return self.get_options_response(', '.join(self.allowed_methods))
 
     @property
     def allowed_methods(self):
-        return [m.upper() for m in self.http_method_names if hasattr(self, m)]
+        methods = [m for m in self.http_method_names if hasattr(self, m) or (m == 'head' and hasattr(self, 'get'))]
+
+        return [m.upper() for m in methods]
@@ -24,7 +24,16 @@ class ViewSetMixin:
         if not action_map:  # actions must not be empty
             raise TypeError("action_map is a required argument.")
 
+        if 'get' in action_map and 'head' not in action_map:
+            action_map = dict(action_map, head=action_map['get'])
+
+        allow = ', '.join(cls.get_allowed_methods(action_map))
+        options = 'options' not in action_map and initkwargs.get('options', cls.options) is APIView.options
+
         def view(request):
+            if options and request.method == 'OPTIONS':
+                return cls.get_options_response(allow)
+
             self = cls(**initkwargs)
             self.request = request
             self.lookup_url_kwargs = self.request.matchdict
@@ -73,9 +82,13 @@ class ModelCRUDViewSet(mixins.CreateModelMixin,
                        mixins.UpdateModelMixin,
                        mixins.DestroyModelMixin,
                        mixins.ListModelMixin,
+                       mixins.BulkUpdateModelMixin,
+                       mixins.BulkDestroyModelMixin,
                        GenericAPIViewSet):
     """
     A ViewSet that provides default ``create()``, ``retrieve()``, ``update()``, ``destroy()`` and ``list()`` actions.
+    The ``bulk_update()`` and ``bulk_destroy()`` actions are available once enabled with the ``allow_bulk_update``
+    and ``allow_bulk_destroy`` attributes.
     """
 
     pass
@@ -97,6 +97,7 @@ setup(
     packages=get_packages(package),
     package_data=get_package_data(package),
     install_requires=install_requires,
+    python_requires='>=3.6',
     setup_requires=['pytest-runner'],
     tests_require=tests_require,
     classifiers=[
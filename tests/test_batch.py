@@ -0,0 +1,140 @@
+import threading
+
+from unittest import TestCase
+
+from pyramid.config import Configurator
+
+from webtest import TestApp
+
+from sqlalchemy import create_engine, Column, String, Integer
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.declarative import declarative_base
+
+from marshmallow import Schema, fields
+
+from pyramid_restful.batch import BatchView
+from pyramid_restful.routers import ViewSetRouter
+from pyramid_restful.viewsets import ModelCRUDViewSet
+
+engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+Session = sessionmaker(bind=engine)
+Base = declarative_base()
+
+
+class Account(Base):
+    __tablename__ = 'account'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+class AccountSchema(Schema):
+    id = fields.Integer()
+    name = fields.String()
+
+
+class AccountViewSet(ModelCRUDViewSet):
+    model = Account
+    schema_class = AccountSchema
+    pagination_class = None
+
+
+class ParallelBatchView(BatchView):
+    parallel = True
+    threads = set()
+
+    def create_session(self):
+        self.threads.add(threading.current_thread().name)
+        return Session()
+
+
+def make_app(dbsession, view_class=None):
+    config = Configurator()
+    config.add_request_method(lambda request: dbsession, 'dbsession', reify=True)
+    router = ViewSetRouter(config)
+    router.register('accounts', AccountViewSet, 'account')
+    router.register_batch(view_class=view_class)
+    return TestApp(config.make_wsgi_app())
+
+
+class BatchViewTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        dbsession = Session()
+        dbsession.add(Account(id=1, name='testing'))
+        dbsession.add(Account(id=2, name='testing 2'))
+        dbsession.commit()
+        dbsession.close()
+
+    def setUp(self):
+        self.dbsession = Session()
+        self.app = make_app(self.dbsession)
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def test_batch(self):
+        response = self.app.post_json('/batch/', [
+            {'method': 'GET', 'url': '/accounts/1/'},
+            {'url': '/accounts/3/'},
+            {'url': '/missing/'},
+            {'method': 'GET', 'url': '/accounts/'},
+        ])
+
+        assert [result['status'] for result in response.json] == [200, 404, 404, 200]
+        assert response.json[0]['body'] == {'id': 1, 'name': 'testing'}
+        assert response.json[0]['headers']['Content-Type'] == 'application/json'
+        assert len(response.json[3]['body']) == 2
+        assert response.json[1]['body']['title'] == 'Not Found'
+
+    def test_writes_share_session(self):
+        response = self.app.post_json('/batch/', [
+            {'method': 'POST', 'url': '/accounts/', 'body': {'id': 3, 'name': 'created'}},
+            {'method': 'PUT', 'url': '/accounts/3/', 'body': {'name': 'updated'}},
+            {'method': 'POST', 'url': '/accounts/', 'body': {'name': 5}},
+        ])
+
+        assert [result['status'] for result in response.json] == [201, 200, 400]
+        assert self.dbsession.query(Account).get(3).name == 'updated'
+
+    def test_urls_use_batch_host(self):
+        response = self.app.post_json('/batch/', [
+            {'method': 'POST', 'url': '/accounts/', 'body': {'id': 4, 'name': 'created'},
+             'headers': {'Prefer': 'return=minimal'}},
+        ], extra_environ={'wsgi.url_scheme': 'https', 'HTTP_HOST': 'api.example.com'})
+
+        assert response.json[0]['headers']['Location'] == 'https://api.example.com/accounts/4/'
+
+    def test_invalid_requests(self):
+        response = self.app.post_json('/batch/', [
+            {'method': 'GET'},
+            {'url': 'http://example.com/'},
+            {'url': '/batch/'},
+            {'url': '/accounts/', 'headers': ['Accept']},
+            {'url': '/accounts/', 'headers': 'Accept'},
+            {'url': '/accounts/', 'method': 5},
+            {'url': '/accounts/', 'method': 'POST', 'body': 'name'},
+            {'url': '/accounts/'},
+        ])
+        assert [result['status'] for result in response.json] == [400] * 7 + [200]
+        assert 'nested' in response.json[2]['body']['message']
+        assert 'headers' in response.json[3]['body']['message']
+
+        self.app.post_json('/batch/', {'url': '/accounts/'}, status=400)
+        self.app.post_json('/batch/', [{'url': '/accounts/'}] * 51, status=400)
+        self.app.get('/batch/', status=404)
+
+    def test_parallel_reads(self):
+        app = make_app(self.dbsession, ParallelBatchView)
+        response = app.post_json('/batch/', [{'url': '/accounts/1/'}, {'url': '/accounts/2/'}, {'url': '/accounts/'}])
+
+        assert [result['body']['name'] for result in response.json[:2]] == ['testing', 'testing 2']
+        assert all(name.startswith('restful-batch') for name in ParallelBatchView.threads)
+
+    def test_mounted_under_script_name(self):
+        response = self.app.post_json('/batch/', [{'url': '/batch/'}, {'url': '/accounts/1/'}],
+                                      extra_environ={'SCRIPT_NAME': '/api'})
+        assert [result['status'] for result in response.json] == [400, 200]
@@ -0,0 +1,246 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase, mock
+
+from pyramid import testing
+from pyramid.response import Response
+
+from sqlalchemy import create_engine, Column, String, Integer
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+
+from marshmallow import Schema, fields
+
+from pyramid_restful import generics
+from pyramid_restful.cache import LRUStore, SQLiteStore, StoredResponseMixin, QueryCache
+
+engine = create_engine('sqlite://')
+Base = declarative_base()
+
+
+class Book(Base):
+    __tablename__ = 'book'
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String)
+
+
+class BookSchema(Schema):
+    id = fields.Integer()
+    title = fields.String()
+
+
+class BookCache(QueryCache):
+    local = LRUStore(maxsize=10)
+
+
+class BookView(generics.ListCreateAPIView):
+    model = Book
+    schema_class = BookSchema
+    pagination_class = None
+    cache_class = BookCache
+
+
+class LRUStoreTests(TestCase):
+
+    def test_get_set(self):
+        store = LRUStore()
+        store.set('key', {'val': 1})
+        assert store.get('key') == {'val': 1}
+        assert store.get('missing') is None
+
+    def test_eviction(self):
+        store = LRUStore(maxsize=2)
+        store.set('a', 1)
+        store.set('b', 2)
+        store.get('a')
+        store.set('c', 3)
+        assert store.get('a') == 1
+        assert store.get('b') is None
+        assert len(store) == 2
+
+    def test_timeout(self):
+        store = LRUStore()
+        store.set('key', 1, timeout=-1)
+        assert store.get('key') is None
+
+    def test_delete(self):
+        store = LRUStore()
+        store.set('key', 1)
+        store.delete('key')
+        assert store.get('key') is None
+
+
+class SQLiteStoreTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = SQLiteStore(os.path.join(self.directory, 'cache.sqlite'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_set(self):
+        self.store.set('key', {'val': 1})
+        assert self.store.get('key') == {'val': 1}
+        self.store.set('key', {'val': 2})
+        assert self.store.get('key') == {'val': 2}
+
+    def test_timeout(self):
+        self.store.set('key', 1, timeout=-1)
+        assert self.store.get('key') is None
+
+    def test_clear(self):
+        self.store.set('key', 1)
+        self.store.clear()
+        assert self.store.get('key') is None
+
+
+class StoredResponseMixinTests(TestCase):
+
+    def test_dump_load(self):
+        stored = StoredResponseMixin()
+        response = Response(json={'id': 1}, status=201)
+        response.headers['X-Total-Count'] = '1'
+        loaded = stored.load_response(stored.dump_response(response))
+        assert loaded.status_code == 201
+        assert loaded.json_body == {'id': 1}
+        assert loaded.headers['X-Total-Count'] == '1'
+        assert loaded is not response
+
+        stored.stored_headers = ('Content-Type',)
+        assert 'X-Total-Count' not in stored.load_response(stored.dump_response(response)).headers
+
+    def test_key_parts(self):
+        stored = StoredResponseMixin()
+        view = mock.Mock()
+        key = stored.get_key(testing.DummyRequest(path='/books/'), view)
+        assert key == stored.get_key(testing.DummyRequest(path='/books/'), view)
+        assert key != stored.get_key(testing.DummyRequest(path='/books/1/'), view)
+
+        with mock.patch.object(StoredResponseMixin, 'get_key_parts', return_value=['other']):
+            assert key != stored.get_key(testing.DummyRequest(path='/books/'), view)
+
+
+class QueryCacheTests(TestCase):
+
+    def setUp(self):
+        self.cache = BookCache()
+        self.view = mock.Mock(model=Book)
+        self.request = testing.DummyRequest(params={'filter[title]': 'a'})
+
+    def test_key_varies_by_params(self):
+        key = self.cache.get_key(self.request, self.view)
+        assert key == self.cache.get_key(testing.DummyRequest(params={'filter[title]': 'a'}), self.view)
+        assert key != self.cache.get_key(testing.DummyRequest(params={'filter[title]': 'b'}), self.view)
+
+    def test_key_varies_by_user(self):
+        key = self.cache.get_key(self.request, self.view)
+
+        with mock.patch.object(BookCache, 'get_user_scope', return_value=5):
+            assert key != self.cache.get_key(self.request, self.view)
+
+    def test_set_get(self):
+        response = Response(json={'id': 1})
+        response.headers['X-Total-Count'] = '1'
+        self.cache.set(self.request, self.view, response)
+        cached = self.cache.get(self.request, self.view)
+        assert cached.json_body == {'id': 1}
+        assert cached.headers['X-Total-Count'] == '1'
+        assert cached.content_type == 'application/json'
+
+    def test_invalidate(self):
+        self.cache.set(self.request, self.view, Response(json={'id': 1}))
+        self.cache.invalidate(Book)
+        assert self.cache.get(self.request, self.view) is None
+
+    def test_shared_backend(self):
+        directory = tempfile.mkdtemp()
+
+        class SharedCache(QueryCache):
+            local = LRUStore()
+            backend = SQLiteStore(os.path.join(directory, 'cache.sqlite'))
+
+        try:
+            SharedCache().set(self.request, self.view, Response(json={'id': 1}))
+            SharedCache.local.clear()
+            assert SharedCache().get(self.request, self.view).json_body == {'id': 1}
+        finally:
+            shutil.rmtree(directory)
+
+
+class CachedViewTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        cls.dbsession = sessionmaker(bind=engine)()
+        cls.dbsession.add(Book(id=1, title='testing'))
+        cls.dbsession.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.dbsession.close()
+
+    def get_view(self, method='GET'):
+        request = testing.DummyRequest()
+        request.method = method
+        request.dbsession = self.dbsession
+        view = BookView()
+        view.request = request
+        return view
+
+    def test_list_cached_until_write(self):
+        view = self.get_view()
+        assert view.list(view.request).json_body == [{'id': 1, 'title': 'testing'}]
+
+        self.dbsession.add(Book(id=2, title='written outside the api'))
+        self.dbsession.flush()
+        view = self.get_view()
+        assert len(view.list(view.request).json_body) == 1
+
+        view = self.get_view('POST')
+        view.request.json_body = {'id': 3, 'title': 'created'}
+        view.create(view.request)
+
+        view = self.get_view()
+        assert len(view.list(view.request).json_body) == 3
+        self.dbsession.rollback()
+
+    def test_invalidated_after_commit(self):
+        view = self.get_view('POST')
+        view.request.json_body = {'id': 4, 'title': 'created'}
+        view.create(view.request)
+
+        # A concurrent request caches the rows committed before the write, before this transaction commits.
+        view = self.get_view()
+        view.cache.set(view.request, view, Response(json=[{'id': 1, 'title': 'testing'}]))
+        assert len(view.list(view.request).json_body) == 1
+
+        try:
+            self.dbsession.commit()
+            view = self.get_view()
+            assert len(view.list(view.request).json_body) == 2
+        finally:
+            self.dbsession.query(Book).filter(Book.id == 4).delete()
+            self.dbsession.commit()
+            BookCache.local.clear()
+
+    def test_write_during_miss(self):
+        get_schema = BookView.get_schema
+
+        def invalidating_get_schema(view, *args, **kwargs):
+            # Another request commits a write once the rows are loaded, before the response is stored.
+            view.cache.invalidate(Book)
+            return get_schema(view, *args, **kwargs)
+
+        BookCache.local.clear()
+        view = self.get_view()
+
+        with mock.patch.object(BookView, 'get_schema', invalidating_get_schema):
+            assert view.list(view.request).json_body == [{'id': 1, 'title': 'testing'}]
+
+        view = self.get_view()
+        assert view.get_cached_response() is None
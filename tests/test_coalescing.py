@@ -0,0 +1,175 @@
+import shutil
+import tempfile
+import threading
+import time
+
+from unittest import TestCase, mock
+
+from pyramid import testing
+from pyramid.response import Response
+
+from pyramid_restful import generics
+from pyramid_restful.coalescing import RequestCoalescer, FileLockCoalescer
+
+
+class SlowResponse:
+    """
+    Builds a response once ``release`` is set, counting its calls.
+    """
+
+    def __init__(self, status=200):
+        self.status = status
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        response = Response(json={'calls': self.calls}, status=self.status)
+        response.headers['X-Total-Count'] = '1'
+        return response
+
+
+def run_concurrently(func, count):
+    results = [None] * count
+
+    def target(index):
+        results[index] = func()
+
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+
+    for thread in threads:
+        thread.start()
+
+    return threads, results
+
+
+class RequestCoalescerTests(TestCase):
+
+    def setUp(self):
+        self.coalescer = RequestCoalescer()
+        self.view = mock.Mock()
+        self.request = testing.DummyRequest(params={'filter[title]': 'a'})
+
+    def test_key_varies_by_params(self):
+        key = self.coalescer.get_key(self.request, self.view)
+        assert key == self.coalescer.get_key(testing.DummyRequest(params={'filter[title]': 'a'}), self.view)
+        assert key != self.coalescer.get_key(testing.DummyRequest(params={'filter[title]': 'b'}), self.view)
+
+    def test_key_varies_by_user(self):
+        key = self.coalescer.get_key(self.request, self.view)
+
+        with mock.patch.object(RequestCoalescer, 'get_user_scope', return_value=5):
+            assert key != self.coalescer.get_key(self.request, self.view)
+
+    def test_identical_requests_wait_for_the_first(self):
+        func = SlowResponse()
+        leader = threading.Thread(target=self.coalescer.run, args=(self.request, self.view, func))
+        leader.start()
+        func.started.wait(5)
+
+        threads, results = run_concurrently(lambda: self.coalescer.run(self.request, self.view, func), 3)
+        time.sleep(0.2)  # Let the identical requests start waiting
+        func.release.set()
+
+        for thread in threads + [leader]:
+            thread.join()
+
+        assert func.calls == 1
+        assert [response.json_body for response in results] == [{'calls': 1}] * 3
+        assert results[0].headers['X-Total-Count'] == '1'
+        assert results[0] is not results[1]
+
+    def test_requests_run_again_once_landed(self):
+        func = SlowResponse()
+        func.release.set()
+        self.coalescer.run(self.request, self.view, func)
+        assert self.coalescer.run(self.request, self.view, func).json_body == {'calls': 2}
+
+    def test_failed_leader(self):
+        func = SlowResponse(status=503)
+        leader = threading.Thread(target=self.coalescer.run, args=(self.request, self.view, func))
+        leader.start()
+        func.started.wait(5)
+
+        threads, results = run_concurrently(lambda: self.coalescer.run(self.request, self.view, func), 2)
+        func.release.set()
+
+        for thread in threads + [leader]:
+            thread.join()
+
+        assert func.calls == 3
+
+    def test_timeout(self):
+        func = SlowResponse()
+        leader = threading.Thread(target=self.coalescer.run, args=(self.request, self.view, func))
+        leader.start()
+        func.started.wait(5)
+
+        with mock.patch.object(RequestCoalescer, 'timeout', 0):
+            response = self.coalescer.run(self.request, self.view, lambda: Response(json={'own': True}))
+
+        func.release.set()
+        leader.join()
+        assert response.json_body == {'own': True}
+
+
+class FileLockCoalescerTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        class Coalescer(FileLockCoalescer):
+            directory = self.directory
+
+        self.coalescer = Coalescer()
+        self.key = self.coalescer.get_key(testing.DummyRequest(), mock.Mock())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_waiting_worker_reuses_the_response(self):
+        # Calling lead() directly stands for the leaders of two worker processes.
+        func = SlowResponse()
+        leader = threading.Thread(target=self.coalescer.lead, args=(self.key, func))
+        leader.start()
+        func.started.wait(5)
+
+        threads, results = run_concurrently(lambda: self.coalescer.lead(self.key, func), 1)
+        time.sleep(0.2)  # Let the other worker start waiting for the lock
+        func.release.set()
+
+        for thread in threads + [leader]:
+            thread.join()
+
+        assert func.calls == 1
+        assert results[0].json_body == {'calls': 1}
+
+    def test_stored_responses_are_not_reused_later(self):
+        func = SlowResponse()
+        func.release.set()
+        self.coalescer.lead(self.key, func)
+        assert self.coalescer.lead(self.key, func).json_body == {'calls': 2}
+
+
+class CoalescedViewTests(TestCase):
+
+    def get_view(self, method='GET'):
+        view = generics.GenericAPIView()
+        view.coalesce_class = RequestCoalescer
+        view.request = testing.DummyRequest()
+        view.request.method = method
+        return view
+
+    def test_coalesce(self):
+        with mock.patch.object(RequestCoalescer, 'run', return_value='coalesced') as run:
+            assert self.get_view().coalesce(lambda: 'response') == 'coalesced'
+            assert self.get_view('HEAD').coalesce(lambda: 'response') == 'response'
+            assert run.call_count == 1
+
+    def test_disabled(self):
+        view = self.get_view()
+        view.coalesce_class = None
+        assert view.coalesce(lambda: 'response') == 'response'
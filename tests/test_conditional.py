@@ -0,0 +1,206 @@
+from datetime import datetime
+from unittest import TestCase
+
+from pyramid import testing
+from pyramid.httpexceptions import HTTPNotFound
+
+from sqlalchemy import create_engine, Column, String, Integer, DateTime
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+
+from marshmallow import Schema, fields
+
+from pyramid_restful import generics
+from pyramid_restful.pagination import LinkHeaderPagination
+from pyramid_restful.conditional import make_etag, http_date, is_not_modified
+from pyramid_restful.permissions import BasePermission
+
+engine = create_engine('sqlite://')
+Base = declarative_base()
+
+
+class Article(Base):
+    __tablename__ = 'article'
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String)
+    updated_at = Column(DateTime)
+
+
+class ArticleSchema(Schema):
+    id = fields.Integer()
+    title = fields.String()
+
+
+class ArticleView(generics.RetrieveAPIView):
+    model = Article
+    schema_class = ArticleSchema
+    etag_field = 'updated_at'
+
+
+class ArticleBodyHashView(generics.RetrieveAPIView):
+    model = Article
+    schema_class = ArticleSchema
+    etag_from_body = True
+
+
+class ArticlePagination(LinkHeaderPagination):
+    page_size = 1
+
+
+class ArticleListView(generics.ListAPIView):
+    model = Article
+    schema_class = ArticleSchema
+    etag_field = 'updated_at'
+    pagination_class = ArticlePagination
+
+
+class OwnerPermission(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return True
+
+
+def add_articles(dbsession):
+    dbsession.merge(Article(id=1, title='testing', updated_at=datetime(2018, 1, 2, 3, 4, 5)))
+    dbsession.merge(Article(id=2, title='testing 2', updated_at=datetime(2018, 1, 1)))
+    dbsession.commit()
+
+
+class ConditionalFunctionTests(TestCase):
+
+    def test_make_etag(self):
+        assert make_etag(1, 'a') == make_etag(1, 'a')
+        assert make_etag(1, 'a') != make_etag(2, 'a')
+        assert make_etag(1).startswith('W/"')
+        assert make_etag(1, weak=False).startswith('"')
+
+    def test_http_date(self):
+        assert http_date(datetime(2018, 1, 2, 3, 4, 5)) == 'Tue, 02 Jan 2018 03:04:05 GMT'
+
+    def test_if_none_match(self):
+        etag = make_etag(1)
+        request = testing.DummyRequest(headers={'If-None-Match': '"other", {}'.format(etag)})
+        assert is_not_modified(request, etag)
+        assert not is_not_modified(request, make_etag(2))
+        assert is_not_modified(testing.DummyRequest(headers={'If-None-Match': '*'}), etag)
+        assert not is_not_modified(testing.DummyRequest(), etag)
+
+    def test_if_modified_since(self):
+        modified = datetime(2018, 1, 2, 3, 4, 5, 600)
+        request = testing.DummyRequest(headers={'If-Modified-Since': 'Tue, 02 Jan 2018 03:04:05 GMT'})
+        assert is_not_modified(request, last_modified=modified)
+        assert is_not_modified(request, last_modified=http_date(modified))
+        assert not is_not_modified(request, last_modified=datetime(2018, 1, 2, 3, 4, 6))
+        assert not is_not_modified(testing.DummyRequest(headers={'If-Modified-Since': 'junk'}), last_modified=modified)
+
+    def test_if_none_match_takes_precedence(self):
+        request = testing.DummyRequest(headers={
+            'If-None-Match': make_etag(1),
+            'If-Modified-Since': 'Tue, 02 Jan 2018 03:04:05 GMT'
+        })
+        assert not is_not_modified(request, make_etag(2), datetime(2018, 1, 1))
+
+
+class ConditionalRetrieveTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        cls.dbsession = sessionmaker(bind=engine)()
+        add_articles(cls.dbsession)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.dbsession.close()
+
+    def get_view(self, view_class=ArticleView, headers=None, id=1):
+        request = testing.DummyRequest(headers=headers or {})
+        request.dbsession = self.dbsession
+        view = view_class()
+        view.request = request
+        view.lookup_url_kwargs = {'id': id}
+        return view
+
+    def test_validators(self):
+        view = self.get_view()
+        response = view.retrieve(view.request)
+        assert response.status_code == 200
+        assert response.headers['ETag'].startswith('W/"')
+        assert response.headers['Last-Modified'] == 'Tue, 02 Jan 2018 03:04:05 GMT'
+
+    def test_not_modified_without_loading(self):
+        etag = self.get_view().retrieve(None).headers['ETag']
+        view = self.get_view(headers={'If-None-Match': etag})
+        view.get_object = None  # Must not be called
+        response = view.retrieve(view.request)
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+
+    def test_if_modified_since(self):
+        view = self.get_view(headers={'If-Modified-Since': 'Tue, 02 Jan 2018 03:04:05 GMT'})
+        assert view.retrieve(view.request).status_code == 304
+        view = self.get_view(headers={'If-Modified-Since': 'Mon, 01 Jan 2018 03:04:05 GMT'})
+        assert view.retrieve(view.request).status_code == 200
+
+    def test_get_object_version_not_found(self):
+        view = self.get_view(headers={'If-None-Match': '"a"'}, id=3)
+        self.assertRaises(HTTPNotFound, view.get_object_version)
+
+    def test_object_permissions_load_object(self):
+        view = self.get_view(headers={'If-None-Match': '"a"'})
+        view.permission_classes = [OwnerPermission]
+        assert view.get_object_version() is None
+
+    def test_body_hash(self):
+        response = self.get_view(ArticleBodyHashView).retrieve(None)
+        etag = response.headers['ETag']
+        assert etag.startswith('"')
+        view = self.get_view(ArticleBodyHashView, headers={'If-None-Match': etag})
+        assert view.retrieve(view.request).status_code == 304
+
+
+class ConditionalListTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        cls.dbsession = sessionmaker(bind=engine)()
+        add_articles(cls.dbsession)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.dbsession.close()
+
+    def get_view(self, headers=None):
+        request = testing.DummyRequest(headers=headers or {})
+        request.dbsession = self.dbsession
+        request.current_route_url = lambda: 'http://testserver/articles/'
+        view = ArticleListView()
+        view.request = request
+        return view
+
+    def test_validators(self):
+        response = self.get_view().list(None)
+        assert response.status_code == 200
+        assert response.headers['Last-Modified'] == 'Tue, 02 Jan 2018 03:04:05 GMT'
+        assert response.headers['ETag'].startswith('W/"')
+
+    def test_not_modified_without_fetching_rows(self):
+        etag = self.get_view().list(None).headers['ETag']
+        view = self.get_view(headers={'If-None-Match': etag})
+        view.bake_query = None  # Must not be called
+        response = view.list(view.request)
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert response.headers['X-Total-Count'] == '2'
+        assert 'rel="next"' in response.headers['Link']
+
+    def test_modified(self):
+        etag = self.get_view().list(None).headers['ETag']
+        self.dbsession.add(Article(id=5, title='added', updated_at=datetime(2017, 1, 1)))
+        self.dbsession.flush()
+        view = self.get_view(headers={'If-None-Match': etag})
+        response = view.list(view.request)
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        self.dbsession.rollback()
@@ -31,6 +31,9 @@ class AccountView:
     def get_query(self):
         return mock.Mock()
 
+    def get_query_shape(self):
+        return (AccountView,)
+
 
 class ExpandableAccountView(ExpandableViewMixin, AccountView):
     schema_class = AccountSchema
@@ -99,3 +102,10 @@ class ExpandableViewTests(TestCase):
         view.request = request
         query = view.get_query()
         assert query.options.called_once_with({'preselect': True})
+
+    def test_expandable_view_mixin_query_shape(self):
+        request = mock.Mock()
+        request.params = {'expand': 'owner,unknown'}
+        view = ExpandableAccountView()
+        view.request = request
+        assert view.get_query_shape() == (AccountView, ('owner',))
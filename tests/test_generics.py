@@ -37,6 +37,10 @@ class UserAPIView(generics.GenericAPIView):
     filter_fields = (User.name,)
 
 
+class UserCachedView(UserAPIView):
+    cache_statements = True
+
+
 class UserOverrideView(generics.GenericAPIView):
     model = User
     lookup_column = (User, 'id')
@@ -165,6 +169,95 @@ class GenericAPIViewTests(TestCase):
         view.get_paginated_response({})
         assert view.paginator.get_paginated_response.call_count == 1
 
+    def test_bake_query_disabled(self):
+        view = UserAPIView()
+        view.request = self.request
+        query = view.get_query()
+        assert view.bake_query(query) is query
+
+    def test_get_query_shape(self):
+        view = UserCachedView()
+        view.request = self.request
+        self.request.params = {'filter[name]': 'testing'}
+        shape = view.get_query_shape()
+        self.request.params = {'filter[name]': 'testing 2'}
+        assert view.get_query_shape() == shape
+        self.request.params = {'filter[name]': 'testing,testing 2'}
+        assert view.get_query_shape() != shape
+
+    def test_get_bind_params(self):
+        view = UserCachedView()
+        view.request = self.request
+        self.request.params = {'filter[name]': 'testing,testing 2'}
+        query = view.filter_query(view.get_query())
+        assert generics.get_bind_params(query) == {'filter_User_name_0': 'testing', 'filter_User_name_1': 'testing 2'}
+        assert generics.get_bind_params(query.filter(User.id == 1)) is None
+        assert generics.get_bind_params(query.limit(1)) is None
+
+    def test_cached_statements(self):
+        view = UserCachedView()
+        view.request = self.request
+        generics.statement_cache.cache.clear()
+
+        self.request.params = {'filter[name]': 'testing'}
+        results = view.bake_query(view.filter_query(view.get_query()), 'list').all()
+        assert [user.id for user in results] == [1]
+        cache_size = len(generics.statement_cache.cache)
+
+        self.request.params = {'filter[name]': 'testing 2'}
+        results = view.bake_query(view.filter_query(view.get_query()), 'list').all()
+        assert [user.id for user in results] == [2]
+        assert len(generics.statement_cache.cache) == cache_size
+
+    def test_get_object_cached(self):
+        view = UserCachedView()
+        view.request = self.request
+        view.lookup_url_kwargs = {'id': 1}
+        assert view.get_object().name == 'testing'
+        view.lookup_url_kwargs = {'id': 2}
+        assert view.get_object().name == 'testing 2'
+        view.lookup_url_kwargs = {'id': 3}
+        self.assertRaises(HTTPNotFound, view.get_object)
+
+
+class MinimalReturnTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp()
+        self.config.add_route('user-detail', '/users/{id}/')
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def get_view(self, prefer=None, **initkwargs):
+        view = UserAPIView(**initkwargs)
+        view.request = testing.DummyRequest(headers={'Prefer': prefer} if prefer else {})
+        return view
+
+    def test_prefers_minimal_return(self):
+        assert not self.get_view().prefers_minimal_return()
+        assert self.get_view('respond-async, return=minimal').prefers_minimal_return()
+        assert self.get_view('return=minimal; foo="bar"').prefers_minimal_return()
+        assert self.get_view(return_minimal=True).prefers_minimal_return()
+        assert not self.get_view('return=representation', return_minimal=True).prefers_minimal_return()
+
+    def test_minimal_response(self):
+        view = self.get_view('return=minimal', basename='user')
+        response = view.get_minimal_response(201, User(id=5, name='created'))
+        assert response.status_code == 201
+        assert response.location == 'http://example.com/users/5/'
+        assert response.headers['Preference-Applied'] == 'return=minimal'
+        assert response.body == b''
+        assert 'Content-Type' not in response.headers
+        assert 'Content-Type' not in view.get_minimal_response(204).headers
+
+    def test_minimal_response_defaults(self):
+        view = self.get_view(return_minimal=True)
+        response = view.get_minimal_response(201, {'id': 5})
+        assert response.location is None
+        assert 'Preference-Applied' not in response.headers
+        assert self.get_view(basename='user').get_minimal_response(204, {'id': 5}).location is None
+
 
 class ConcreteGenericAPIViewsTest(TestCase):
 
@@ -0,0 +1,241 @@
+from unittest import TestCase, mock
+
+from pyramid import testing
+from pyramid.httpexceptions import HTTPBadRequest, HTTPConflict, HTTPUnprocessableEntity
+from pyramid.response import Response
+
+from sqlalchemy import create_engine, Column, String, Integer
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+
+from marshmallow import Schema, fields
+
+from pyramid_restful import generics
+from pyramid_restful.idempotency import MemoryStore, SQLStore, IdempotencyKeys
+
+engine = create_engine('sqlite://')
+Base = declarative_base()
+
+
+class Order(Base):
+    __tablename__ = 'order'
+
+    id = Column(Integer, primary_key=True)
+    item = Column(String)
+
+
+class OrderSchema(Schema):
+    id = fields.Integer()
+    item = fields.String()
+
+
+class OrderIdempotencyKeys(IdempotencyKeys):
+    store = MemoryStore(maxsize=10)
+
+
+class OrderView(generics.ListCreateAPIView):
+    model = Order
+    schema_class = OrderSchema
+    idempotency_class = OrderIdempotencyKeys
+
+
+def get_request(body, key='abc', **kwargs):
+    request = testing.DummyRequest(headers={'Idempotency-Key': key} if key else {}, **kwargs)
+    request.method = 'POST'
+    request.body = body.encode('utf-8')
+    return request
+
+
+class MemoryStoreTests(TestCase):
+
+    def test_get_set(self):
+        store = MemoryStore()
+        store.set('key', {'val': 1}, None)
+        assert store.get('key', None) == {'val': 1}
+        assert store.get('missing', None) is None
+
+    def test_add(self):
+        store = MemoryStore()
+        assert store.add('key', {'val': 1}, None)
+        assert not store.add('key', {'val': 2}, None)
+        store.delete('key', None)
+        assert store.add('key', {'val': 3}, None, timeout=-1)
+        assert store.add('key', {'val': 4}, None)
+        assert store.get('key', None) == {'val': 4}
+
+
+class SQLStoreTests(TestCase):
+
+    def setUp(self):
+        self.store = SQLStore()
+        self.store.create_table(engine)
+        self.request = testing.DummyRequest()
+        self.request.dbsession = sessionmaker(bind=engine)()
+
+    def tearDown(self):
+        self.request.dbsession.close()
+
+    def test_get_set(self):
+        self.store.set('key', {'val': 1}, self.request)
+        assert self.store.get('key', self.request) == {'val': 1}
+        assert self.store.get('missing', self.request) is None
+
+    def test_timeout(self):
+        self.store.set('key', {'val': 1}, self.request, timeout=-1)
+        assert self.store.get('key', self.request) is None
+        self.store.set('key', {'val': 2}, self.request)
+        assert self.store.get('key', self.request) == {'val': 2}
+
+    def test_rolled_back_with_request(self):
+        self.store.set('key', {'val': 1}, self.request)
+        self.request.dbsession.rollback()
+        assert self.store.get('key', self.request) is None
+
+    def test_add(self):
+        assert self.store.add('key', {'val': 1}, self.request)
+        assert not self.store.add('key', {'val': 2}, self.request)
+        self.store.set('key', {'val': 3}, self.request)
+        assert self.store.get('key', self.request) == {'val': 3}
+        self.store.delete('key', self.request)
+        assert self.store.add('key', {'val': 4}, self.request, timeout=-1)
+        assert self.store.add('key', {'val': 5}, self.request)
+        assert self.store.get('key', self.request) == {'val': 5}
+
+
+class IdempotencyKeysTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+
+    def setUp(self):
+        self.keys = OrderIdempotencyKeys()
+        self.view = mock.Mock()
+        self.dbsession = sessionmaker(bind=engine)()
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def get_request(self, body, key):
+        return get_request(body, key=key, dbsession=self.dbsession)
+
+    def test_key(self):
+        key = self.keys.get_key(get_request('{}'), self.view)
+        assert key == self.keys.get_key(get_request('{"other": 1}'), self.view)
+        assert key != self.keys.get_key(get_request('{}', key='def'), self.view)
+        assert self.keys.get_key(get_request('{}', key=None), self.view) is None
+
+        with mock.patch.object(OrderIdempotencyKeys, 'get_user_scope', return_value=5):
+            assert key != self.keys.get_key(get_request('{}'), self.view)
+
+    def test_key_too_long(self):
+        self.assertRaises(HTTPBadRequest, self.keys.get_key, get_request('{}', key='a' * 256), self.view)
+
+    def test_replay(self):
+        response = Response(json={'id': 1}, status=201)
+        self.keys.set(self.get_request('{"item": "a"}', 'replay'), self.view, response)
+        self.dbsession.commit()
+        replayed = self.keys.get(self.get_request('{"item": "a"}', 'replay'), self.view)
+        assert replayed.status_code == 201
+        assert replayed.json_body == {'id': 1}
+        assert replayed.headers['Idempotent-Replayed'] == 'true'
+
+    def test_different_body(self):
+        self.keys.set(self.get_request('{"item": "a"}', 'body'), self.view, Response(json={'id': 1}, status=201))
+        self.dbsession.commit()
+        request = self.get_request('{"item": "b"}', 'body')
+        self.assertRaises(HTTPUnprocessableEntity, self.keys.get, request, self.view)
+
+    def test_server_errors_not_stored(self):
+        assert self.keys.reserve(self.get_request('{}', 'error'), self.view) is None
+        self.keys.set(self.get_request('{}', 'error'), self.view, Response(status=503))
+        self.dbsession.commit()
+        assert self.keys.reserve(self.get_request('{}', 'error'), self.view) is None
+
+    def test_in_flight(self):
+        assert self.keys.reserve(self.get_request('{}', 'flight'), self.view) is None
+        self.assertRaises(HTTPConflict, self.keys.reserve, self.get_request('{}', 'flight'), self.view)
+        self.assertRaises(HTTPUnprocessableEntity, self.keys.reserve, self.get_request('{"a": 1}', 'flight'), self.view)
+
+        self.keys.set(self.get_request('{}', 'flight'), self.view, Response(json={'id': 1}, status=201))
+        self.assertRaises(HTTPConflict, self.keys.reserve, self.get_request('{}', 'flight'), self.view)
+
+        self.dbsession.commit()
+        assert self.keys.reserve(self.get_request('{}', 'flight'), self.view).json_body == {'id': 1}
+
+    def test_released_on_rollback(self):
+        assert self.keys.reserve(self.get_request('{}', 'rollback'), self.view) is None
+        self.keys.set(self.get_request('{}', 'rollback'), self.view, Response(json={'id': 1}, status=201))
+        self.dbsession.rollback()
+        assert self.keys.reserve(self.get_request('{}', 'rollback'), self.view) is None
+
+    def test_released_when_finished_without_commit(self):
+        request = self.get_request('{}', 'finished')
+        assert self.keys.reserve(request, self.view) is None
+        self.keys.set(request, self.view, Response(json={'id': 1}, status=201))
+        request._process_finished_callbacks()
+        assert self.keys.reserve(self.get_request('{}', 'finished'), self.view) is None
+
+    def test_kept_when_finished_after_commit(self):
+        request = self.get_request('{}', 'committed')
+        assert self.keys.reserve(request, self.view) is None
+        self.keys.set(request, self.view, Response(json={'id': 1}, status=201))
+        self.dbsession.commit()
+        request._process_finished_callbacks()
+        assert self.keys.reserve(self.get_request('{}', 'committed'), self.view).json_body == {'id': 1}
+
+    def test_release(self):
+        assert self.keys.reserve(self.get_request('{}', 'release'), self.view) is None
+        self.keys.release(self.get_request('{}', 'release'), self.view)
+        assert self.keys.reserve(self.get_request('{}', 'release'), self.view) is None
+
+
+class IdempotentCreateTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+
+    def setUp(self):
+        self.dbsession = sessionmaker(bind=engine)()
+
+    def tearDown(self):
+        self.dbsession.rollback()
+        self.dbsession.query(Order).delete()
+        self.dbsession.commit()
+        self.dbsession.close()
+
+    def create(self, body, key='create'):
+        request = get_request(body, key=key)
+        request.json_body = {'item': 'a'}
+        request.dbsession = self.dbsession
+        view = OrderView()
+        view.request = request
+        return view.create(request)
+
+    def test_retry_replayed(self):
+        response = self.create('{"item": "a"}')
+        assert response.status_code == 201
+        self.dbsession.commit()
+
+        with mock.patch.object(OrderView, 'perform_create') as perform_create:
+            replayed = self.create('{"item": "a"}')
+
+        assert not perform_create.called
+        assert replayed.json_body == response.json_body
+        assert self.dbsession.query(Order).count() == 1
+
+    def test_without_key(self):
+        self.create('{"item": "a"}', key=None)
+        self.create('{"item": "a"}', key=None)
+        assert self.dbsession.query(Order).count() == 2
+
+    def test_retry_in_flight(self):
+        self.create('{"item": "a"}', key='in-flight')
+        self.assertRaises(HTTPConflict, self.create, '{"item": "a"}', key='in-flight')
+
+    def test_failed_create_released(self):
+        with mock.patch.object(OrderView, 'perform_create', side_effect=ValueError):
+            self.assertRaises(ValueError, self.create, '{"item": "a"}', key='failed')
+
+        assert self.create('{"item": "a"}', key='failed').status_code == 201
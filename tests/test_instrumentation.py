@@ -0,0 +1,173 @@
+from unittest import TestCase, mock
+
+from pyramid.config import Configurator
+
+from webtest import TestApp
+
+from sqlalchemy import create_engine, Column, String, Integer, ForeignKey
+from sqlalchemy.orm import sessionmaker, relationship, joinedload
+from sqlalchemy.ext.declarative import declarative_base
+
+from marshmallow import Schema, fields
+
+from pyramid_restful.exceptions import NPlusOneError
+from pyramid_restful.instrumentation import RequestProfile, NPlusOneDetector, get_current_profile, normalize_statement
+from pyramid_restful.routers import ViewSetRouter
+from pyramid_restful.settings import reload_api_settings
+from pyramid_restful.viewsets import ModelCRUDViewSet
+
+engine = create_engine('sqlite://')
+Session = sessionmaker(bind=engine)
+Base = declarative_base()
+
+
+class Book(Base):
+    __tablename__ = 'book'
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String)
+
+
+class Chapter(Base):
+    __tablename__ = 'chapter'
+
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey('book.id'))
+    book = relationship(Book)
+
+
+class BookSchema(Schema):
+    id = fields.Integer()
+    title = fields.String()
+
+
+class ChapterSchema(Schema):
+    id = fields.Integer()
+    book = fields.Nested(BookSchema)
+
+
+class StrictDetector(NPlusOneDetector):
+    raise_errors = True
+
+
+class BookViewSet(ModelCRUDViewSet):
+    model = Book
+    schema_class = BookSchema
+    pagination_class = None
+    profile_class = RequestProfile
+
+
+class DefaultProfileViewSet(ModelCRUDViewSet):
+    model = Book
+    schema_class = BookSchema
+    pagination_class = None
+
+
+class ChapterViewSet(ModelCRUDViewSet):
+    model = Chapter
+    schema_class = ChapterSchema
+    pagination_class = None
+    profile_class = StrictDetector
+
+
+class JoinedChapterViewSet(ChapterViewSet):
+    def get_query(self):
+        return super().get_query().options(joinedload(Chapter.book))
+
+
+class RequestProfileTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        dbsession = Session()
+        dbsession.add(Book(id=1, title='testing'))
+        dbsession.add(Book(id=2, title='testing 2'))
+        dbsession.add(Chapter(id=1, book_id=1))
+        dbsession.add(Chapter(id=2, book_id=2))
+        dbsession.commit()
+        dbsession.close()
+
+    def setUp(self):
+        self.dbsession = Session()
+        config = Configurator()
+        config.add_request_method(lambda request: self.dbsession, 'dbsession', reify=True)
+        router = ViewSetRouter(config)
+        router.register('books', BookViewSet, 'book')
+        router.register('chapters', ChapterViewSet, 'chapter')
+        router.register('joined-chapters', JoinedChapterViewSet, 'joined-chapter')
+        self.app = TestApp(config.make_wsgi_app())
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def test_server_timing(self):
+        response = self.app.get('/books/')
+        metrics = [metric.split(';')[0] for metric in response.headers['Server-Timing'].split(', ')]
+        assert metrics == ['initial', 'filter', 'query', 'serialize', 'render', 'sql', 'total']
+        assert 'desc="1 queries"' in response.headers['Server-Timing']
+
+    def test_log_record(self):
+        with self.assertLogs('restful_pyramid', 'INFO') as logs:
+            self.app.get('/books/1/')
+
+        data = logs.records[0].restful_profile
+        assert data['route'] == 'book-detail'
+        assert data['action'] == 'retrieve'
+        assert data['status'] == 200
+        assert data['sql_count'] == 1
+        assert get_current_profile() is None
+
+    def test_statements(self):
+        profile = RequestProfile(None, None)
+
+        with profile:
+            with profile.phase('query'):
+                self.dbsession.query(Book).all()
+
+        self.dbsession.query(Book).all()
+        assert profile.sql_count == 1
+        assert profile.statements[0]['phase'] == 'query'
+        assert profile.statements[0]['statement'].startswith('SELECT')
+
+    def test_n_plus_one(self):
+        self.assertRaises(NPlusOneError, self.app.get, '/chapters/')
+        assert len(self.app.get('/joined-chapters/').json) == 2
+
+        with mock.patch.object(StrictDetector, 'raise_errors', False):
+            with self.assertLogs('restful_pyramid', 'WARNING') as logs:
+                self.app.get('/chapters/')
+
+        assert '2 times: SELECT book.id' in logs.output[0]
+
+    def test_n_plus_one_phases(self):
+        detector = StrictDetector(None, None)
+
+        with detector:
+            with detector.phase('query'):
+                self.dbsession.query(Book).get(1)
+                self.dbsession.query(Book).get(2)
+
+        assert detector.get_repeated_statements() == {}
+
+        with mock.patch.object(StrictDetector, 'detect_phases', ('query',)):
+            assert list(detector.get_repeated_statements().values()) == [2]
+
+    def test_normalize_statement(self):
+        statement = "SELECT a.id FROM a\nWHERE a.id IN (?, ?, ?) AND a.name = 'x' LIMIT 10"
+        assert normalize_statement(statement) == 'SELECT a.id FROM a WHERE a.id IN (...) AND a.name = ? LIMIT ?'
+
+    def test_default_profile_class(self):
+        settings = {'restful.default_profile_class': 'pyramid_restful.instrumentation.RequestProfile'}
+        config = Configurator(settings=settings)
+        config.add_request_method(lambda request: self.dbsession, 'dbsession', reify=True)
+        config.include('pyramid_restful')
+        ViewSetRouter(config).register('books', DefaultProfileViewSet, 'book')
+
+        try:
+            app = TestApp(config.make_wsgi_app())
+            assert 'Server-Timing' in app.get('/books/').headers
+        finally:
+            reload_api_settings({})
+
+        assert 'Server-Timing' not in app.get('/books/').headers
@@ -0,0 +1,132 @@
+import threading
+
+from unittest import TestCase
+
+from pyramid import testing
+from pyramid.config import Configurator
+from pyramid.httpexceptions import HTTPForbidden
+
+from webtest import TestApp
+
+from sqlalchemy import create_engine, Column, String, Integer
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+
+from marshmallow import Schema, fields
+
+from pyramid_restful.metrics import MetricsRegistry, MetricsProfile, MetricsView
+from pyramid_restful.routers import ViewSetRouter
+from pyramid_restful.viewsets import ModelCRUDViewSet
+
+engine = create_engine('sqlite://')
+Session = sessionmaker(bind=engine)
+Base = declarative_base()
+test_registry = MetricsRegistry()
+
+
+class Song(Base):
+    __tablename__ = 'song'
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String)
+
+
+class SongSchema(Schema):
+    id = fields.Integer()
+    title = fields.String()
+
+
+class SongProfile(MetricsProfile):
+    registry = test_registry
+
+
+class SongViewSet(ModelCRUDViewSet):
+    model = Song
+    schema_class = SongSchema
+    pagination_class = None
+    profile_class = SongProfile
+
+
+class MetricsRegistryTests(TestCase):
+
+    def test_render(self):
+        registry = MetricsRegistry()
+        registry.buckets = {'request_queries': (1, 5)}
+        labels = (('route', 'user-list'), ('action', 'list'))
+        registry.observe('request_queries', 1, labels)
+        registry.observe('request_queries', 3, labels)
+        registry.observe('request_queries', 8, labels)
+
+        assert registry.render() == (
+            '# HELP restful_request_queries Number of SQL statements executed per request.\n'
+            '# TYPE restful_request_queries histogram\n'
+            'restful_request_queries_bucket{route="user-list",action="list",le="1"} 1\n'
+            'restful_request_queries_bucket{route="user-list",action="list",le="5"} 2\n'
+            'restful_request_queries_bucket{route="user-list",action="list",le="+Inf"} 3\n'
+            'restful_request_queries_sum{route="user-list",action="list"} 12\n'
+            'restful_request_queries_count{route="user-list",action="list"} 3\n'
+        )
+
+    def test_threads_merged(self):
+        registry = MetricsRegistry()
+
+        def observe():
+            for i in range(100):
+                registry.observe('response_rows', 1)
+
+        threads = [threading.Thread(target=observe) for i in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        series = registry.collect()[('response_rows', ())]
+        assert sum(series[:-1]) == 400
+        assert series[-1] == 400
+
+
+class MetricsProfileTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        dbsession = Session()
+        dbsession.add(Song(id=1, title='testing'))
+        dbsession.add(Song(id=2, title='testing 2'))
+        dbsession.commit()
+        dbsession.close()
+
+    def setUp(self):
+        test_registry.clear()
+        self.dbsession = Session()
+        config = Configurator()
+        config.add_request_method(lambda request: self.dbsession, 'dbsession', reify=True)
+        ViewSetRouter(config).register('songs', SongViewSet, 'song')
+        self.app = TestApp(config.make_wsgi_app())
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def test_record(self):
+        self.app.get('/songs/')
+        self.app.get('/songs/')
+        self.app.get('/songs/1/')
+
+        metrics = test_registry.collect()
+        labels = (('route', 'song-list'), ('action', 'list'))
+        assert sum(metrics[('request_duration_seconds', labels)][:-1]) == 2
+        assert metrics[('request_queries', labels)][-1] == 2
+        assert metrics[('response_rows', labels)][-1] == 4
+        assert ('response_bytes', (('route', 'song-detail'), ('action', 'retrieve'))) in metrics
+
+    def test_view(self):
+        self.app.get('/songs/')
+        request = testing.DummyRequest(remote_addr='127.0.0.1')
+        response = MetricsView(registry=test_registry).get(request)
+        assert response.content_type == 'text/plain'
+        assert 'restful_response_rows_count{route="song-list",action="list"} 1' in response.text
+
+        request.remote_addr = '10.0.0.1'
+        self.assertRaises(HTTPForbidden, MetricsView().get, request)
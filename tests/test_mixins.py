@@ -19,6 +19,7 @@ class MockAPIView:
         return instance
 
     model = mock.Mock(side_effect=model_side_effect)
+    request = testing.DummyRequest()
     dataset = [
         {'name': 'testing', 'id': 1},
         {'name': 'testing 2', 'id': 2}
@@ -45,14 +46,83 @@ class MockAPIView:
     def filter_query(self, query):
         return query
 
+    def bake_query(self, query, *args):
+        return query
+
+    def get_cached_response(self):
+        return None
+
+    def cache_response(self, response):
+        return response
+
+    def invalidate_cache(self):
+        pass
+
+    def coalesce(self, func):
+        return func()
+
+    def get_parent_values(self):
+        return {}
+
+    profile = None
+
+    def timed(self, name):
+        return mock.MagicMock()
+
+    def check_parent_exists(self):
+        pass
+
+    def get_idempotent_response(self):
+        return None
+
+    def store_idempotent_response(self, response):
+        return response
+
+    load_free_writes = False
+
+    def prefers_minimal_return(self):
+        return False
+
+    def get_write_query(self):
+        return None
+
+    etag_field = None
+    paginator = None
+
+    def get_object_version(self):
+        return None
+
+    def get_list_version(self, query, data=None):
+        return None
+
+    def get_validators(self, version=None, body=None):
+        return {}
+
+    def get_not_modified_response(self, validators):
+        return None
+
     def get_schema(self, *args, **kwargs):
+        def serialize(obj):
+            if isinstance(obj, dict):
+                return {'id': obj['id'], 'name': obj['name']}
+
+            return {'id': obj.id, 'name': obj.name}
+
         def dump(data, many=False, **kwargs):
             if many:
-                return [{'id': i.id, 'name': i.name} for i in data], ''
+                return [serialize(i) for i in data], ''
+
+            return serialize(data), ''
+
+        def load(data, partial=False, many=False):
+            if many:
+                errors = {i: {'id': ['invalid value.']} for i, item in enumerate(data) if item['id'] == 4}
+
+                if errors:
+                    raise ma.ValidationError(message=errors)
 
-            return {'id': data.id, 'name': data.name}, ''
+                return data, ''
 
-        def load(data, partial=False):
             if not partial and data['id'] == 4:
                 raise ma.ValidationError(message={'id': ['invalid value.']})
             return data, ''
@@ -119,6 +189,17 @@ class ModelMixinUnitTests(TestCase):
             {"id": 1, "name": "testing"}, {"id": 2, "name": "testing 2"}
         ]
 
+    def test_list_mixin_parallel_count(self):
+        class ListViewTest(mixins.ListModelMixin, MockAPIView):
+            paginator = mock.Mock(parallel_count=True)
+
+        view = ListViewTest()
+        view.bake_query = mock.Mock()
+        view.paginate_query = mock.Mock(side_effect=lambda query: [query[1]])
+        response = view.list(self.request)
+        assert json.loads(response.body.decode('utf-8')) == [{"id": 2, "name": "testing 2"}]
+        view.bake_query.assert_not_called()
+
     def test_retrieve_mixin(self):
         class RetrieveViewTest(mixins.RetrieveModelMixin, MockAPIView):
             pass
@@ -151,6 +232,56 @@ class ModelMixinUnitTests(TestCase):
         assert response.status_code == 400
         assert json.loads(response.body.decode('utf-8')) == {"id": ["invalid value."]}
 
+    def test_bulk_create(self):
+        class CreateViewTest(mixins.CreateModelMixin, MockAPIView):
+            allow_bulk_create = True
+            bulk_create_batch_size = 2
+
+            def get_primary_key_names(self):
+                return ['id']
+
+            def get_created_instances(self, keys):
+                loaded.append(keys)
+                return [self.model(**item) for item in self.request.json_body]
+
+        loaded = []
+        view = CreateViewTest()
+        view.request = self.request
+        self.request.json_body = [{'id': 3, 'name': 'testing 3'}, {'id': 5, 'name': 'testing 5'}, {'id': 6, 'name': '6'}]
+        response = view.create(self.request)
+        assert response.status_code == 201
+        assert json.loads(response.body.decode('utf-8')) == self.request.json_body
+        assert loaded == [[{'id': 3}, {'id': 5}, {'id': 6}]]
+        assert self.request.dbsession.bulk_insert_mappings.call_count == 2
+        assert self.request.dbsession.add.call_count == 0
+
+    def test_bad_bulk_create(self):
+        class CreateViewTest(mixins.CreateModelMixin, MockAPIView):
+            allow_bulk_create = True
+
+        view = CreateViewTest()
+        view.request = self.request
+        self.request.json_body = [{'id': 3, 'name': 'testing 3'}, {'id': 4, 'name': 'testing 4'}]
+        response = view.create(self.request)
+        assert response.status_code == 400
+        assert json.loads(response.body.decode('utf-8')) == {'1': {'id': ['invalid value.']}}
+        assert self.request.dbsession.bulk_insert_mappings.call_count == 0
+
+    def test_bulk_create_custom_perform_create(self):
+        class CreateViewTest(mixins.CreateModelMixin, MockAPIView):
+            allow_bulk_create = True
+
+            def perform_create(self, data):
+                data['name'] = data['name'].upper()
+                return self.model(**data)
+
+        view = CreateViewTest()
+        view.request = self.request
+        self.request.json_body = [{'id': 3, 'name': 'testing 3'}]
+        response = view.create(self.request)
+        assert json.loads(response.body.decode('utf-8')) == [{'id': 3, 'name': 'TESTING 3'}]
+        assert self.request.dbsession.bulk_insert_mappings.call_count == 0
+
     def test_update(self):
         class UpdateViewTest(mixins.UpdateModelMixin, MockAPIView):
             pass
@@ -1,7 +1,14 @@
+import threading
+
 from unittest import TestCase, mock
 
 import pytest
 
+from sqlalchemy import create_engine, event, Column, Integer
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
 from pyramid import testing
 from pyramid.httpexceptions import HTTPNotFound
 
@@ -350,6 +357,111 @@ class TestPageNumberPagination(TestCase):
         self.assertRaises(HTTPNotFound, self.paginate_queryset, request)
 
 
+engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+Base = declarative_base()
+
+
+class Number(Base):
+    __tablename__ = 'number'
+
+    id = Column(Integer, primary_key=True)
+
+
+class TestParallelCountPagination(TestCase):
+    """
+    Unit tests for `pagination.PageNumberPagination` with ``parallel_count``.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        engine.execute(Number.__table__.insert(), [{'id': i} for i in range(1, 101)])
+
+    @classmethod
+    def tearDownClass(cls):
+        Base.metadata.drop_all(engine)
+
+    def setUp(self):
+        class ExamplePagination(pagination.PageNumberPagination):
+            page_size = 5
+            parallel_count = True
+
+        self.pagination = ExamplePagination()
+        self.dbsession = sessionmaker(bind=engine)()
+        self.statements = []
+        event.listen(engine, 'before_cursor_execute', self.record_statement)
+
+    def tearDown(self):
+        event.remove(engine, 'before_cursor_execute', self.record_statement)
+        self.dbsession.close()
+
+    def record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, threading.get_ident()))
+
+    def paginate_queryset(self, request, dbsession=None):
+        query = (dbsession or self.dbsession).query(Number).order_by(Number.id)
+        return [number.id for number in self.pagination.paginate_query(query, request)]
+
+    def get_paginated_content(self, queryset):
+        response = self.pagination.get_paginated_response(queryset)
+        return response.json_body   # todo, if renders are ever implemented this needs updated
+
+    def get_request(self, page=None):
+        request = testing.DummyRequest()
+        request.current_route_url = mock.Mock(return_value='http://testserver/')
+
+        if page is not None:
+            request.params['page'] = page
+
+        return request
+
+    def test_second_page(self):
+        queryset = self.paginate_queryset(self.get_request(2))
+        content = self.get_paginated_content(queryset)
+        assert queryset == [6, 7, 8, 9, 10]
+        assert content == {
+            'results': [6, 7, 8, 9, 10],
+            'previous': 'http://testserver/',
+            'next': 'http://testserver/?page=3',
+            'count': 100
+        }
+
+    def test_count_runs_on_another_thread(self):
+        self.paginate_queryset(self.get_request())
+        threads = {'count(*)' in statement: thread for statement, thread in self.statements}
+        assert len(self.statements) == 2
+        assert threads[False] == threading.get_ident()
+        assert threads[True] != threading.get_ident()
+
+    def test_last_page(self):
+        queryset = self.paginate_queryset(self.get_request('last'))
+        assert queryset == [96, 97, 98, 99, 100]
+        assert self.get_paginated_content(queryset)['next'] is None
+
+    def test_bound_to_connection(self):
+        with engine.connect() as connection:
+            dbsession = sessionmaker(bind=connection)()
+            queryset = self.paginate_queryset(self.get_request(3), dbsession)
+            dbsession.close()
+
+        assert queryset == [11, 12, 13, 14, 15]
+        assert self.get_paginated_content(queryset)['count'] == 100
+        assert {thread for statement, thread in self.statements} == {threading.get_ident()}
+
+    def test_invalid_page(self):
+        self.assertRaises(HTTPNotFound, self.paginate_queryset, self.get_request('invalid'))
+        self.assertRaises(HTTPNotFound, self.paginate_queryset, self.get_request(0))
+        assert self.statements == []
+
+    def test_page_out_of_range(self):
+        self.assertRaises(HTTPNotFound, self.paginate_queryset, self.get_request(21))
+
+    def test_empty_first_page(self):
+        query = self.dbsession.query(Number).filter(Number.id > 100)
+        assert self.pagination.paginate_query(query, self.get_request()) == []
+        assert self.get_paginated_content([])['count'] == 0
+
+
 class TestPageNumberPaginationOverride:
     """
     Unit tests for `pagination.PageNumberPagination`.
@@ -0,0 +1,136 @@
+import os
+import pstats
+import tempfile
+import time
+import tracemalloc
+
+from unittest import TestCase
+
+from pyramid import testing
+from pyramid.config import Configurator
+from pyramid.httpexceptions import HTTPForbidden, HTTPNotFound
+
+from webtest import TestApp
+
+from sqlalchemy import create_engine, Column, String, Integer
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+
+from marshmallow import Schema, fields
+
+from pyramid_restful.profiling import ProfileAggregates, SamplingProfile, ProfilerView, MemoryProfile
+from pyramid_restful.routers import ViewSetRouter
+from pyramid_restful.viewsets import ModelCRUDViewSet
+
+engine = create_engine('sqlite://')
+Session = sessionmaker(bind=engine)
+Base = declarative_base()
+test_aggregates = ProfileAggregates()
+
+
+class Track(Base):
+    __tablename__ = 'track'
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String)
+
+
+class TrackSchema(Schema):
+    id = fields.Integer()
+    title = fields.String()
+
+
+class AlwaysProfile(SamplingProfile):
+    sample_rate = 1
+    aggregates = test_aggregates
+
+
+class StackProfile(AlwaysProfile):
+    mode = 'stack'
+    interval = 0.001
+
+
+class NeverProfile(AlwaysProfile):
+    sample_rate = 0
+
+
+class TrackViewSet(ModelCRUDViewSet):
+    model = Track
+    schema_class = TrackSchema
+    pagination_class = None
+
+    def retrieve(self, request, *args, **kwargs):
+        time.sleep(0.05)
+        return super().retrieve(request, *args, **kwargs)
+
+
+class SamplingProfileTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        dbsession = Session()
+        dbsession.add(Track(id=1, title='testing'))
+        dbsession.commit()
+        dbsession.close()
+
+    def setUp(self):
+        test_aggregates.clear()
+        self.dbsession = Session()
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def get_app(self, profile_class):
+        config = Configurator()
+        config.add_request_method(lambda request: self.dbsession, 'dbsession', reify=True)
+        viewset = type('ProfiledTrackViewSet', (TrackViewSet,), {'profile_class': profile_class})
+        ViewSetRouter(config).register('tracks', viewset, 'track')
+        return TestApp(config.make_wsgi_app())
+
+    def get_profiles(self, **params):
+        request = testing.DummyRequest(params=params, remote_addr='127.0.0.1')
+        return ProfilerView(aggregates=test_aggregates).get(request)
+
+    def test_cprofile(self):
+        app = self.get_app(AlwaysProfile)
+        app.get('/tracks/')
+        app.get('/tracks/')
+
+        summary = self.get_profiles(route='track-list', action='list').text
+        assert 'mixins.py' in summary
+
+        filename = os.path.join(tempfile.mkdtemp(), 'track-list.pstats')
+
+        with open(filename, 'wb') as f:
+            f.write(self.get_profiles(route='track-list', action='list', format='pstats').body)
+
+        assert pstats.Stats(filename).total_calls > 0
+        self.assertRaises(HTTPNotFound, self.get_profiles, route='track-detail', action='retrieve')
+
+    def test_stack_sampler(self):
+        self.get_app(StackProfile).get('/tracks/1/')
+        stacks = self.get_profiles().text.splitlines()
+        assert stacks
+        assert all(stack.startswith('track-detail;retrieve;') for stack in stacks)
+        assert any('test_profiling.py:retrieve' in stack for stack in stacks)
+
+    def test_not_sampled(self):
+        self.get_app(NeverProfile).get('/tracks/')
+        assert test_aggregates.stats == {}
+
+    def test_local_only(self):
+        request = testing.DummyRequest(remote_addr='10.0.0.1')
+        self.assertRaises(HTTPForbidden, ProfilerView().get, request)
+
+    def test_memory(self):
+        with self.assertLogs('restful_pyramid', 'INFO') as logs:
+            self.get_app(MemoryProfile).get('/tracks/')
+
+        memory = logs.records[0].restful_memory
+        assert memory['peak'] > 0
+        assert memory['rows'] == 1
+        assert list(memory['phases']) == ['initial', 'filter', 'query', 'serialize', 'render']
+        assert 'orm' in memory['categories']
+        assert len(memory['sites']) <= MemoryProfile.max_sites
+        assert not tracemalloc.is_tracing()
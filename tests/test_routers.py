@@ -1,9 +1,12 @@
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, ANY
 
 from pyramid.config import Configurator
 
-from pyramid_restful.routers import ViewSetRouter, Route
+from pyramid.exceptions import ConfigurationConflictError
+
+from pyramid_restful.decorators import detail_route, list_route
+from pyramid_restful.routers import ViewSetRouter, NestedViewSetRouter, Route, get_decorated_methods
 from pyramid_restful.viewsets import ModelCRUDViewSet, APIViewSet
 from pyramid_restful.exceptions import ImproperlyConfigured
 
@@ -21,6 +24,31 @@ class ReadOnlyViewSet(APIViewSet):
         pass
 
 
+class OrderViewSet(ModelCRUDViewSet):
+    parent_lookups = {'user_id': None}
+
+
+class ItemViewSet(ModelCRUDViewSet):
+    parent_lookups = {'order_id': None}
+
+
+class DecoratedViewSet(ModelCRUDViewSet):
+
+    @detail_route(methods=['post'])
+    def lock(self, request, *args, **kwargs):
+        pass
+
+    @list_route()
+    def recent(self, request, *args, **kwargs):
+        pass
+
+
+class UndecoratedViewSet(DecoratedViewSet):
+
+    def lock(self, request, *args, **kwargs):
+        pass
+
+
 class ViewSetRouterTests(TestCase):
 
     def setUp(self):
@@ -50,8 +78,9 @@ class ViewSetRouterTests(TestCase):
         routes = self.router.get_routes(viewset)
 
         expected = [
-            Route(url='/{prefix}{trailing_slash}', mapping={'get': 'list', 'post': 'create'}, name='{basename}-list',
-                  initkwargs={}),
+            Route(url='/{prefix}{trailing_slash}',
+                  mapping={'get': 'list', 'post': 'create', 'patch': 'bulk_update', 'delete': 'bulk_destroy'},
+                  name='{basename}-list', initkwargs={}),
             Route(url='/{prefix}/list_route{trailing_slash}', mapping={'get': 'list_route'},
                   name='{basename}-list-route', initkwargs={}),
             Route(url='/{prefix}/{lookup}{trailing_slash}',
@@ -101,12 +130,20 @@ class ViewSetRouterTests(TestCase):
         mapping = self.router.get_method_map(viewset, {'get': 'list', 'post': 'create', 'put': 'update'})
         assert mapping == {'get': 'list'}
 
+    def test_get_method_map_bulk(self):
+        method_map = {'get': 'list', 'patch': 'bulk_update', 'delete': 'bulk_destroy'}
+        assert self.router.get_method_map(ModelCRUDViewSet(), method_map) == {'get': 'list'}
+
+        viewset = ModelCRUDViewSet()
+        viewset.allow_bulk_destroy = True
+        assert self.router.get_method_map(viewset, method_map) == {'get': 'list', 'delete': 'bulk_destroy'}
+
     def test_register(self):
         viewset = ModelCRUDViewSet()
         self.config.reset_mock()
         self.router.register('users', viewset, 'user')
-        self.config.add_route.assert_any_call('user-list', '/users/')
-        self.config.add_route.assert_any_call('user-detail', '/users/{id}/')
+        self.config.add_route.assert_any_call('user-list', '/users/', _info=ANY)
+        self.config.add_route.assert_any_call('user-detail', '/users/{id}/', _info=ANY)
         assert self.config.add_view.call_count == 2
 
     def test_empty_register(self):
@@ -115,3 +152,48 @@ class ViewSetRouterTests(TestCase):
         self.router.register('users', viewset, 'user')
         self.config.add_route.assert_not_called()
         self.config.add_route.assert_not_called()
+
+    def test_get_decorated_methods(self):
+        assert [name for name, method in get_decorated_methods(DecoratedViewSet)] == ['lock', 'recent']
+        assert get_decorated_methods(DecoratedViewSet) == get_decorated_methods(DecoratedViewSet())
+        assert [name for name, method in get_decorated_methods(UndecoratedViewSet)] == ['recent']
+
+    def test_register_conflict_reported_at_caller(self):
+        config = Configurator()
+        router = ViewSetRouter(config)
+        router.register('users', DecoratedViewSet, 'user')
+        router.register('people', DecoratedViewSet, 'user')
+
+        with self.assertRaises(ConfigurationConflictError) as context:
+            config.commit()
+
+        assert "router.register('people', DecoratedViewSet, 'user')" in str(context.exception)
+
+
+class NestedViewSetRouterTests(TestCase):
+
+    def setUp(self):
+        self.config = MagicMock(spec=Configurator)
+        self.router = ViewSetRouter(self.config)
+        self.nested_router = NestedViewSetRouter(self.router, 'users', 'user_id')
+
+    def test_register(self):
+        self.nested_router.register('orders', OrderViewSet, 'user-order')
+        self.config.add_route.assert_any_call('user-order-list', '/users/{user_id}/orders/', _info=ANY)
+        self.config.add_route.assert_any_call('user-order-detail', '/users/{user_id}/orders/{id}/', _info=ANY)
+
+    def test_register_nested_twice(self):
+        router = NestedViewSetRouter(self.nested_router, 'orders', 'order_id')
+        router.register('items', ItemViewSet, 'user-order-item')
+        self.config.add_route.assert_any_call(
+            'user-order-item-detail', '/users/{user_id}/orders/{order_id}/items/{id}/', _info=ANY
+        )
+
+    def test_missing_parent_lookup(self):
+        self.assertRaises(ImproperlyConfigured, self.nested_router.register, 'orders', ModelCRUDViewSet, 'order')
+
+    def test_conflicting_lookup(self):
+        class ConflictViewSet(OrderViewSet):
+            lookup_field = 'user_id'
+
+        self.assertRaises(ImproperlyConfigured, self.nested_router.register, 'orders', ConflictViewSet, 'order')
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+
+from unittest import TestCase, mock
+
+from pyramid.config import Configurator
+
+from webtest import TestApp
+
+from sqlalchemy import create_engine, Column, String, Integer
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+
+from marshmallow import Schema, fields
+
+from pyramid_restful.filters import FieldFilter
+from pyramid_restful.routers import ViewSetRouter
+from pyramid_restful.settings import APISettings, DEFAULTS, IMPORT_STRINGS
+from pyramid_restful.slowrequests import SlowRequestProfile
+from pyramid_restful.viewsets import ModelCRUDViewSet
+
+engine = create_engine('sqlite://')
+Session = sessionmaker(bind=engine)
+Base = declarative_base()
+
+
+class Movie(Base):
+    __tablename__ = 'movie'
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String)
+
+
+class MovieSchema(Schema):
+    id = fields.Integer()
+    title = fields.String()
+
+
+class MovieViewSet(ModelCRUDViewSet):
+    model = Movie
+    schema_class = MovieSchema
+    pagination_class = None
+    filter_classes = (FieldFilter,)
+    filter_fields = (Movie.title,)
+    profile_class = SlowRequestProfile
+
+
+class SlowRequestProfileTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        dbsession = Session()
+        dbsession.add(Movie(id=1, title='testing'))
+        dbsession.commit()
+        dbsession.close()
+
+    def setUp(self):
+        self.dbsession = Session()
+        config = Configurator()
+        config.add_request_method(lambda request: self.dbsession, 'dbsession', reify=True)
+        ViewSetRouter(config).register('movies', MovieViewSet, 'movie')
+        self.app = TestApp(config.make_wsgi_app())
+        self.filename = os.path.join(tempfile.mkdtemp(), 'slow.jsonl')
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def configure(self, **app_settings):
+        app_settings.setdefault('slow_request_file', self.filename)
+        api_settings = APISettings(app_settings, DEFAULTS, IMPORT_STRINGS)
+        return mock.patch('pyramid_restful.settings.api_settings', api_settings)
+
+    def read_records(self):
+        with open(self.filename) as f:
+            return [json.loads(line) for line in f]
+
+    def test_record(self):
+        with self.configure(slow_request_threshold='0', slow_request_explain='true'):
+            self.app.get('/movies/?filter[title]=testing&b=1')
+
+        record = self.read_records()[0]
+        assert record['route'] == 'movie-list'
+        assert record['action'] == 'list'
+        assert record['params'] == [['b', '1'], ['filter[title]', 'testing']]
+        assert record['statements'][0]['parameters'] == ['testing']
+        assert record['statements'][0]['explain'][0].endswith('SCAN movie')
+        assert 'query' in record['phases']
+
+    def test_fast_requests_ignored(self):
+        with self.configure(slow_request_threshold='60000'):
+            self.app.get('/movies/')
+
+        with self.configure():
+            self.app.get('/movies/')
+
+        assert not os.path.exists(self.filename)
+
+    def test_logged_without_file(self):
+        with self.configure(slow_request_threshold='0', slow_request_file=None):
+            with self.assertLogs('restful_pyramid.slow_requests', 'WARNING') as logs:
+                self.app.get('/movies/1/')
+
+        assert json.loads(logs.records[0].getMessage())['action'] == 'retrieve'
@@ -0,0 +1,136 @@
+from unittest import TestCase, mock
+
+from sqlalchemy import create_engine, Column, Integer
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+
+from pyramid_restful import tasks
+from pyramid_restful.settings import APISettings, DEFAULTS, IMPORT_STRINGS
+
+engine = create_engine('sqlite://')
+Base = declarative_base()
+
+
+class Hook(Base):
+    __tablename__ = 'hook'
+
+    id = Column(Integer, primary_key=True)
+
+
+class SynchronousExecutor:
+    def submit(self, func, *args, **kwargs):
+        func(*args, **kwargs)
+
+
+executor = SynchronousExecutor()
+
+
+class OnCommitTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+
+    def setUp(self):
+        self.dbsession = sessionmaker(bind=engine)()
+        self.calls = []
+        api_settings = APISettings({'post_commit_executor': 'tests.test_tasks.executor'}, DEFAULTS, IMPORT_STRINGS)
+        self.patch = mock.patch('pyramid_restful.settings.api_settings', api_settings)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.dbsession.close()
+
+    def test_runs_after_commit(self):
+        self.dbsession.add(Hook(id=1))
+        tasks.on_commit(self.dbsession, self.calls.append, 1)
+        self.dbsession.flush()
+        assert self.calls == []
+        self.dbsession.commit()
+        assert self.calls == [1]
+
+        # Each task runs once, only for the transaction it was queued in.
+        self.dbsession.delete(self.dbsession.query(Hook).get(1))
+        self.dbsession.commit()
+        assert self.calls == [1]
+
+    def test_discarded_on_rollback(self):
+        tasks.on_commit(self.dbsession, self.calls.append, 1)
+        self.dbsession.rollback()
+        self.dbsession.commit()
+        assert self.calls == []
+
+    def test_savepoints(self):
+        with self.dbsession.begin_nested():
+            tasks.on_commit(self.dbsession, self.calls.append, 1)
+
+        assert self.calls == []
+
+        savepoint = self.dbsession.begin_nested()
+        tasks.on_commit(self.dbsession, self.calls.append, 2)
+        savepoint.rollback()
+
+        self.dbsession.commit()
+        assert self.calls == [1]
+
+        with self.dbsession.begin_nested():
+            tasks.on_commit(self.dbsession, self.calls.append, 3)
+
+        self.dbsession.rollback()
+        self.dbsession.commit()
+        assert self.calls == [1]
+
+    def test_after_commit(self):
+        tasks.on_commit(self.dbsession, self.calls.append, 'task')
+        tasks.after_commit(self.dbsession, self.calls.append, 'callback')
+
+        with mock.patch('pyramid_restful.tasks.get_executor') as get_executor:
+            self.dbsession.commit()
+
+        assert self.calls == ['callback']
+        assert get_executor.return_value.submit.call_count == 1
+
+    def test_after_rollback(self):
+        tasks.after_rollback(self.dbsession, self.calls.append, 'committed')
+        self.dbsession.commit()
+        tasks.after_rollback(self.dbsession, self.calls.append, 'rolled back')
+        self.dbsession.rollback()
+        tasks.after_rollback(self.dbsession, self.calls.append, 'closed')
+        self.dbsession.close()
+        assert self.calls == ['rolled back', 'closed']
+
+    def test_after_rollback_savepoint(self):
+        tasks.after_rollback(self.dbsession, self.calls.append, 'outer')
+        self.dbsession.begin_nested()
+        tasks.after_rollback(self.dbsession, self.calls.append, 'released')
+        self.dbsession.commit()
+        self.dbsession.begin_nested()
+        tasks.after_rollback(self.dbsession, self.calls.append, 'savepoint')
+        self.dbsession.rollback()
+        assert self.calls == ['savepoint']
+
+        self.dbsession.rollback()
+        assert self.calls == ['savepoint', 'outer', 'released']
+
+    def test_failures_logged(self):
+        def fail():
+            raise ValueError()
+
+        tasks.on_commit(self.dbsession, fail)
+        tasks.on_commit(self.dbsession, self.calls.append, 2)
+
+        with self.assertLogs('restful_pyramid', 'ERROR'):
+            self.dbsession.commit()
+
+        assert self.calls == [2]
+
+    def test_default_executor(self):
+        self.patch.stop()
+
+        try:
+            future = tasks.get_executor().submit(sum, [1, 2])
+            assert future.result(timeout=5) == 3
+            assert tasks.get_executor() is tasks.get_executor()
+        finally:
+            self.patch.start()
@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from sqlalchemy import create_engine, Column, Integer
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+
+from pyramid_restful.instrumentation import RequestProfile
+from pyramid_restful.testing import assert_max_queries
+
+engine = create_engine('sqlite://')
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = 'item'
+
+    id = Column(Integer, primary_key=True)
+
+
+class AssertMaxQueriesTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+
+    def setUp(self):
+        self.dbsession = sessionmaker(bind=engine)()
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def test_within_limit(self):
+        with assert_max_queries(1) as profile:
+            self.dbsession.query(Item).all()
+
+        assert profile.sql_count == 1
+
+    def test_exceeded(self):
+        with self.assertRaises(AssertionError) as context:
+            with assert_max_queries(1):
+                self.dbsession.query(Item).all()
+                self.dbsession.query(Item).count()
+
+        assert '2 queries executed, expected at most 1' in str(context.exception)
+
+    def test_nested_profile(self):
+        with assert_max_queries(1) as profile:
+            with RequestProfile(None, None):
+                self.dbsession.query(Item).all()
+
+        assert profile.sql_count == 1
@@ -4,6 +4,7 @@ from pyramid.response import Response
 from unittest import TestCase
 
 from pyramid_restful.views import APIView
+from pyramid_restful.permissions import BasePermission
 
 
 class MyView(APIView):
@@ -62,4 +63,44 @@ class APIViewTests(TestCase):
     def test_options_request(self):
         self.request.method = 'OPTIONS'
         response = self.test_view(self.request)
-        assert response.headers.get('Allow') == "GET, POST, OPTIONS"
+        assert response.headers.get('Allow') == "GET, POST, HEAD, OPTIONS"
+
+    def test_options_short_circuit(self):
+        class DenyPermission(BasePermission):
+            def has_permission(self, request, view):
+                raise AssertionError('OPTIONS should not check permissions')
+
+        self.request.method = 'OPTIONS'
+        view = MyView.as_view(permission_classes=[DenyPermission])
+        response = view(self.request)
+        assert response.status_code == 200
+        assert response.headers['Allow'] == 'GET, POST, HEAD, OPTIONS'
+
+    def test_head_request(self):
+        self.request.method = 'HEAD'
+        response = self.test_view(self.request)
+        assert response.status_code == 200
+        assert response.body == {'method': 'GET'}
+
+    def test_has_object_permissions(self):
+        class ObjectPermission(BasePermission):
+            def has_object_permission(self, request, view, obj):
+                return False
+
+        view = MyView(permission_classes=[BasePermission])
+        assert view.has_object_permissions() is False
+        view.permission_classes = [BasePermission, ObjectPermission]
+        assert view.has_object_permissions() is True
+
+    def test_has_object_permissions_from_get_permissions(self):
+        class ObjectPermission(BasePermission):
+            def has_object_permission(self, request, view, obj):
+                return False
+
+        class PermissionsView(MyView):
+            permission_classes = []
+
+            def get_permissions(self):
+                return [ObjectPermission()]
+
+        assert PermissionsView().has_object_permissions() is True
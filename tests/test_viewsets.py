@@ -2,16 +2,27 @@ import json
 
 from pyramid import testing
 from pyramid.response import Response
+from pyramid.httpexceptions import HTTPForbidden, HTTPNotFound
 
 from unittest import TestCase, mock
 
-from sqlalchemy import create_engine, Column, String, Integer
+from pyramid.config import Configurator
+
+from webtest import TestApp
+
+from sqlalchemy import create_engine, Column, String, Integer, ForeignKey
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
 from marshmallow import Schema, fields
 
 from pyramid_restful import viewsets
+from pyramid_restful.filters import FieldFilter, SearchFilter, OrderFilter
+from pyramid_restful.pagination import LinkHeaderPagination
+from pyramid_restful.permissions import BasePermission
+from pyramid_restful.routers import ViewSetRouter, NestedViewSetRouter
+from pyramid_restful.testing import assert_max_queries
 
 
 class MyViewSet(viewsets.APIViewSet):
@@ -35,11 +46,91 @@ class UserSchema(Schema):
     name = fields.String()
 
 
+class Order(Base):
+    __tablename__ = 'order'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('user.id'))
+    item = Column(String)
+
+
+class Account(Base):
+    __tablename__ = 'account'
+
+    id = Column(Integer, primary_key=True)
+    email = Column(String, unique=True)
+    status = Column(String, server_default='active')
+
+
+class AccountSchema(Schema):
+    id = fields.Integer()
+    email = fields.String()
+    status = fields.String(dump_only=True)
+
+
+class OrderSchema(Schema):
+    id = fields.Integer()
+    user_id = fields.Integer(dump_only=True)
+    item = fields.String()
+
+
+class OrderPagination(LinkHeaderPagination):
+    page_size = 1
+
+
 class UserViewSet(viewsets.ModelCRUPDViewSet):
     model = User
     schema_class = UserSchema
 
 
+class BulkUserViewSet(viewsets.ModelCRUDViewSet):
+    model = User
+    schema_class = UserSchema
+    filter_classes = (FieldFilter, SearchFilter, OrderFilter)
+    filter_fields = (User.name,)
+    search_fields = (User.name,)
+    order_fields = (User.id,)
+    allow_bulk_update = True
+    allow_bulk_destroy = True
+
+
+class BulkCreateUserViewSet(viewsets.ModelCRUDViewSet):
+    model = User
+    schema_class = UserSchema
+    allow_bulk_create = True
+
+
+class BulkCreateAccountViewSet(viewsets.ModelCRUDViewSet):
+    model = Account
+    schema_class = AccountSchema
+    allow_bulk_create = True
+
+
+class LoadFreeUserViewSet(viewsets.ModelCRUPDViewSet):
+    model = User
+    schema_class = UserSchema
+    load_free_writes = True
+
+
+class UpsertUserViewSet(viewsets.ModelCRUDViewSet):
+    model = User
+    schema_class = UserSchema
+    allow_upsert = True
+
+
+class UserOrderViewSet(viewsets.ModelCRUDViewSet):
+    model = Order
+    schema_class = OrderSchema
+    pagination_class = OrderPagination
+    parent_lookups = {'user_id': Order.user_id}
+    verify_parent = True
+
+
+class DenyObjectPermission(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return obj.id != 2
+
+
 def get_dbsession():
     Session = sessionmaker()
     Session.configure(bind=engine)
@@ -137,3 +228,520 @@ class ModelViewSetTests(TestCase):
         self.request.method = 'GET'
         response = self.detail_viewset(self.request)
         assert response.status_code == 404
+
+
+class BulkViewSetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        dbsession = get_dbsession()
+        dbsession.merge(User(id=1, name='testing'))
+        dbsession.merge(User(id=2, name='testing 2'))
+        dbsession.commit()
+
+    def setUp(self):
+        self.dbsession = get_dbsession()
+        self.request = testing.DummyRequest()
+        self.request.dbsession = self.dbsession
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def get_viewset(self, viewset=BulkUserViewSet, **initkwargs):
+        return viewset.as_view({'patch': 'bulk_update', 'delete': 'bulk_destroy'}, **initkwargs)
+
+    def test_bulk_update(self):
+        self.request.method = 'PATCH'
+        self.request.params = {'filter[name]': 'testing,testing 2'}
+        self.request.json_body = {'name': 'updated'}
+        response = self.get_viewset()(self.request)
+        assert response.status_code == 200
+        assert json.loads(response.body.decode('utf-8')) == {'count': 2}
+        assert self.dbsession.query(User).filter(User.name == 'updated').count() == 2
+
+    def test_bulk_update_disabled(self):
+        self.request.method = 'PATCH'
+        self.request.params = {'filter[name]': 'testing'}
+        self.request.json_body = {'name': 'updated'}
+        response = self.get_viewset(allow_bulk_update=False)(self.request)
+        assert response.status_code == 405
+
+    def test_bulk_update_requires_filter(self):
+        self.request.method = 'PATCH'
+        self.request.json_body = {'name': 'updated'}
+        response = self.get_viewset()(self.request)
+        assert response.status_code == 400
+        assert self.dbsession.query(User).filter(User.name == 'updated').count() == 0
+
+    def test_bulk_writes_require_where_clause(self):
+        self.request.json_body = {'name': 'updated'}
+
+        for params in ({'anything': '1'}, {'order[id]': 'desc'}, {'filter[unknown]': 'x'}):
+            self.request.params = params
+
+            for method in ('PATCH', 'DELETE'):
+                self.request.method = method
+                response = self.get_viewset()(self.request)
+                assert response.status_code == 400
+
+        assert self.dbsession.query(User).count() == 2
+        assert self.dbsession.query(User).filter(User.name == 'updated').count() == 0
+
+    def test_bulk_update_search(self):
+        self.request.method = 'PATCH'
+        self.request.params = {'search[name]': '2', 'order[id]': 'desc'}
+        self.request.json_body = {'name': 'updated'}
+        response = self.get_viewset()(self.request)
+        assert json.loads(response.body.decode('utf-8')) == {'count': 1}
+        assert self.dbsession.query(User).get(2).name == 'updated'
+
+    def test_bulk_update_object_permissions(self):
+        self.request.method = 'PATCH'
+        self.request.params = {'filter[name]': 'testing,testing 2'}
+        self.request.json_body = {'name': 'updated'}
+        response = self.get_viewset(permission_classes=[DenyObjectPermission])(self.request)
+        assert response.status_code == 403
+        assert self.dbsession.query(User).filter(User.name == 'updated').count() == 0
+
+        self.request.params = {'filter[name]': 'testing'}
+        response = self.get_viewset(permission_classes=[DenyObjectPermission])(self.request)
+        assert json.loads(response.body.decode('utf-8')) == {'count': 1}
+        assert self.dbsession.query(User).get(1).name == 'updated'
+
+    def test_bulk_update_custom_update_hook(self):
+        class HookViewSet(BulkUserViewSet):
+            def perform_update(self, data, instance):
+                instance.name = data['name'].upper()
+
+        self.request.method = 'PATCH'
+        self.request.params = {'filter[name]': 'testing'}
+        self.request.json_body = {'name': 'updated'}
+        response = self.get_viewset(HookViewSet)(self.request)
+        assert json.loads(response.body.decode('utf-8')) == {'count': 1}
+        assert self.dbsession.query(User).get(1).name == 'UPDATED'
+
+    def test_bulk_destroy(self):
+        self.request.method = 'DELETE'
+        self.request.params = {'filter[name]': 'testing 2'}
+        response = self.get_viewset()(self.request)
+        assert json.loads(response.body.decode('utf-8')) == {'count': 1}
+        assert self.dbsession.query(User).count() == 1
+
+    def test_bulk_destroy_custom_hook(self):
+        destroyed = []
+
+        class HookViewSet(BulkUserViewSet):
+            def perform_destroy(self, instance):
+                destroyed.append(instance.id)
+
+        self.request.method = 'DELETE'
+        self.request.params = {'filter[name]': 'testing'}
+        response = self.get_viewset(HookViewSet)(self.request)
+        assert json.loads(response.body.decode('utf-8')) == {'count': 1}
+        assert destroyed == [1]
+
+
+class BulkCreateTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+
+    def setUp(self):
+        self.dbsession = get_dbsession()
+        self.request = testing.DummyRequest()
+        self.request.dbsession = self.dbsession
+        self.request.method = 'POST'
+
+    def tearDown(self):
+        self.dbsession.rollback()
+        self.dbsession.close()
+
+    def create(self, body):
+        self.request.json_body = body
+        view = BulkCreateUserViewSet()
+        view.request = self.request
+        return view.create(self.request)
+
+    def test_supplied_keys_batched(self):
+        body = [{'id': i, 'name': 'user {}'.format(i)} for i in range(100, 200)]
+
+        with assert_max_queries(2):
+            response = self.create(body)
+
+        assert response.status_code == 201
+        assert json.loads(response.body.decode('utf-8')) == body
+        assert self.dbsession.query(User).filter(User.id >= 100).count() == 100
+
+    def test_generated_keys_without_returning(self):
+        # SQLite can not return generated keys from a multi-row insert, each row is inserted on its own.
+        with assert_max_queries(101) as profile:
+            response = self.create([{'name': 'user {}'.format(i)} for i in range(100)])
+
+        ids = [user['id'] for user in json.loads(response.body.decode('utf-8'))]
+        assert profile.sql_count == 101
+        assert len(set(ids)) == 100 and None not in ids
+        assert self.dbsession.query(User).get(ids[-1]).name == 'user 99'
+
+    def test_minimal_return_ids(self):
+        self.request.headers['Prefer'] = 'return=minimal'
+        response = self.create([{'id': 300, 'name': 'a'}, {'name': 'b'}])
+        ids = json.loads(response.body.decode('utf-8'))
+        assert response.status_code == 201
+        assert response.headers['Preference-Applied'] == 'return=minimal'
+        assert response.content_type == 'application/json'
+        assert ids[0] == {'id': 300}
+        assert self.dbsession.query(User).get(ids[1]['id']).name == 'b'
+
+    def test_insert_returning(self):
+        view = BulkCreateUserViewSet()
+        view.request = self.request
+        batch = [{'name': 'a'}, {'name': 'b'}]
+
+        with mock.patch.object(self.dbsession, 'execute', return_value=[(7,), (8,)]) as execute:
+            view.insert_returning(batch, ['id'])
+
+        sql = str(execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert execute.call_count == 1
+        assert 'VALUES (%(name_m0)s), (%(name_m1)s) RETURNING "user".id' in sql
+        assert batch == [{'name': 'a', 'id': 7}, {'name': 'b', 'id': 8}]
+
+    def test_insert_returning_unique(self):
+        view = BulkCreateUserViewSet()
+        view.model = Account
+        view.request = self.request
+        batch = [{'email': 'a'}, {'email': 'b'}]
+
+        with mock.patch.object(self.dbsession, 'execute', return_value=[(8, 'b'), (7, 'a')]) as execute:
+            view.insert_returning(batch, ['id'])
+
+        sql = str(execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert 'RETURNING account.id, account.email' in sql
+        assert batch == [{'email': 'a', 'id': 7}, {'email': 'b', 'id': 8}]
+
+    def test_defaults_rendered(self):
+        self.request.json_body = [{'id': 1, 'email': 'a'}, {'email': 'b'}]
+        view = BulkCreateAccountViewSet()
+        view.request = self.request
+        response = view.create(self.request)
+        accounts = json.loads(response.body.decode('utf-8'))
+        assert [account['email'] for account in accounts] == ['a', 'b']
+        assert [account['status'] for account in accounts] == ['active', 'active']
+
+
+class LoadFreeWriteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        dbsession = get_dbsession()
+        dbsession.merge(User(id=1, name='testing'))
+        dbsession.commit()
+
+    def setUp(self):
+        self.dbsession = get_dbsession()
+        self.request = testing.DummyRequest()
+        self.request.dbsession = self.dbsession
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def get_view(self, action, id=1, viewset=LoadFreeUserViewSet, **initkwargs):
+        view = viewset(**initkwargs)
+        view.request = self.request
+        view.action = action
+        view.lookup_url_kwargs = {'id': id}
+        return view
+
+    def test_partial_update(self):
+        self.request.json_body = {'name': 'updated'}
+        view = self.get_view('partial_update')
+        view.get_object = None  # Must not be called
+        response = view.partial_update(self.request)
+        assert json.loads(response.body.decode('utf-8')) == {'id': 1, 'name': 'updated'}
+        assert self.dbsession.query(User.name).filter(User.id == 1).scalar() == 'updated'
+
+    def test_update_not_found(self):
+        self.request.json_body = {'name': 'updated'}
+        view = self.get_view('update', id=5)
+        self.assertRaises(HTTPNotFound, view.update, self.request)
+
+    def test_destroy(self):
+        view = self.get_view('destroy')
+        view.get_object = None  # Must not be called
+        assert view.destroy(self.request).status_code == 204
+        assert self.dbsession.query(User).get(1) is None
+        self.assertRaises(HTTPNotFound, self.get_view('destroy').destroy, self.request)
+
+    def test_object_permissions_load_object(self):
+        view = self.get_view('destroy', permission_classes=[DenyObjectPermission])
+        assert view.get_write_query() is None
+
+    def test_get_permissions_load_object(self):
+        class PermissionsViewSet(LoadFreeUserViewSet):
+            def get_permissions(self):
+                return [DenyObjectPermission()]
+
+        assert self.get_view('destroy', viewset=PermissionsViewSet).get_write_query() is None
+        self.request.json_body = {'name': 'updated'}
+        view = self.get_view('partial_update', id=2, viewset=PermissionsViewSet)
+        self.dbsession.merge(User(id=2, name='testing 2'))
+        self.assertRaises(HTTPForbidden, view.partial_update, self.request)
+
+    def test_custom_hook_loads_object(self):
+        class HookViewSet(LoadFreeUserViewSet):
+            def perform_update(self, data, instance):
+                instance.name = data['name'].upper()
+
+        self.request.json_body = {'name': 'updated'}
+        response = self.get_view('update', viewset=HookViewSet).update(self.request)
+        assert json.loads(response.body.decode('utf-8'))['name'] == 'UPDATED'
+
+
+class UpsertTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        dbsession = get_dbsession()
+        dbsession.merge(User(id=1, name='testing'))
+        dbsession.commit()
+
+    def setUp(self):
+        self.dbsession = get_dbsession()
+        self.request = testing.DummyRequest()
+        self.request.dbsession = self.dbsession
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def get_view(self, id, viewset=UpsertUserViewSet):
+        view = viewset()
+        view.request = self.request
+        view.action = 'update'
+        view.lookup_url_kwargs = {'id': id}
+        return view
+
+    def test_create(self):
+        self.request.json_body = {'id': 99, 'name': 'created'}
+        view = self.get_view('10')
+        view.get_object = None  # Must not be called
+        response = view.update(self.request)
+        assert response.status_code == 201
+        assert json.loads(response.body.decode('utf-8')) == {'id': 10, 'name': 'created'}
+        assert self.dbsession.query(User).get(10).name == 'created'
+        assert self.dbsession.query(User).get(99) is None
+
+    def test_update(self):
+        self.request.json_body = {'name': 'updated'}
+        response = self.get_view('1').update(self.request)
+        assert response.status_code == 200
+        assert self.dbsession.query(User.name).filter(User.id == 1).scalar() == 'updated'
+
+    def test_excluded_row_not_found(self):
+        class ScopedViewSet(UpsertUserViewSet):
+            def get_query(self):
+                return super().get_query().filter(User.name != 'testing')
+
+        self.request.json_body = {'name': 'updated'}
+        self.assertRaises(HTTPNotFound, self.get_view('1', ScopedViewSet).update, self.request)
+        assert self.dbsession.query(User.name).filter(User.id == 1).scalar() == 'testing'
+
+    def test_minimal_return(self):
+        config = testing.setUp()
+        config.add_route('user-detail', '/users/{id}/')
+        self.request.headers['Prefer'] = 'return=minimal'
+        self.request.json_body = {'name': 'created'}
+        view = self.get_view('12')
+        view.basename = 'user'
+
+        try:
+            response = view.update(self.request)
+        finally:
+            testing.tearDown()
+
+        assert response.status_code == 201
+        assert response.location == 'http://example.com/users/12/'
+        assert response.body == b''
+        assert self.get_view('12').update(self.request).status_code == 204
+
+    def test_custom_hook_loads_object(self):
+        class HookViewSet(UpsertUserViewSet):
+            def perform_create(self, data):
+                data['name'] = data['name'].upper()
+                return super().perform_create(data)
+
+        self.request.json_body = {'name': 'created'}
+        response = self.get_view('11', HookViewSet).update(self.request)
+        assert response.status_code == 201
+        assert json.loads(response.body.decode('utf-8')) == {'id': 11, 'name': 'CREATED'}
+
+        response = self.get_view('11', HookViewSet).update(self.request)
+        assert response.status_code == 200
+
+    def test_custom_hook_excluded_row_not_found(self):
+        class ScopedHookViewSet(UpsertUserViewSet):
+            def get_query(self):
+                return super().get_query().filter(User.name != 'testing')
+
+            def perform_update(self, data, instance):
+                instance.name = data['name'].upper()
+
+        self.request.json_body = {'name': 'updated'}
+        self.assertRaises(HTTPNotFound, self.get_view('1', ScopedHookViewSet).update, self.request)
+        assert self.dbsession.query(User.name).filter(User.id == 1).scalar() == 'testing'
+
+    def test_custom_hook_concurrent_create_updated(self):
+        class HookViewSet(UpsertUserViewSet):
+            def perform_update(self, data, instance):
+                instance.name = data['name'].upper()
+
+        self.request.json_body = {'name': 'updated'}
+        view = self.get_view('1', HookViewSet)
+        lookups = [HTTPNotFound(), view.get_object]
+
+        def get_object():
+            # The row is inserted by another request between the first lookup and the insert.
+            lookup = lookups.pop(0)
+
+            if isinstance(lookup, Exception):
+                raise lookup
+
+            return lookup()
+
+        view.get_object = get_object
+        response = view.update(self.request)
+        assert response.status_code == 200
+        assert self.dbsession.query(User.name).filter(User.id == 1).scalar() == 'UPDATED'
+
+    def test_postgresql_statement(self):
+        view = self.get_view('1')
+        bind = mock.Mock()
+        bind.dialect.name = 'postgresql'
+
+        with mock.patch.object(self.dbsession, 'get_bind', return_value=bind), \
+                mock.patch.object(self.dbsession, 'execute') as execute:
+            execute.return_value.first.return_value = (False,)
+            assert view.perform_upsert({'id': 1, 'name': 'updated'}, view.get_write_query()) is False
+
+        sql = str(execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert 'ON CONFLICT (id) DO UPDATE SET' in sql
+        assert 'RETURNING xmax = 0' in sql
+
+
+class NestedViewSetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        dbsession = get_dbsession()
+        dbsession.merge(User(id=1, name='testing'))
+        dbsession.merge(User(id=2, name='testing 2'))
+        dbsession.merge(Order(id=1, user_id=1, item='a'))
+        dbsession.merge(Order(id=2, user_id=1, item='b'))
+        dbsession.merge(Order(id=3, user_id=2, item='c'))
+        dbsession.commit()
+
+    def setUp(self):
+        self.dbsession = get_dbsession()
+        config = Configurator()
+        config.add_request_method(lambda request: self.dbsession, 'dbsession', reify=True)
+        router = ViewSetRouter(config)
+        router.register('users', UserViewSet, 'user')
+        NestedViewSetRouter(router, 'users', 'user_id').register('orders', UserOrderViewSet, 'user-order')
+        self.app = TestApp(config.make_wsgi_app())
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def test_list(self):
+        response = self.app.get('/users/1/orders/')
+        assert response.json == [{'id': 1, 'user_id': 1, 'item': 'a'}]
+        assert response.headers['X-Total-Count'] == '2'
+        assert '<http://localhost/users/1/orders/?page=2>; rel="next"' in response.headers['Link']
+
+    def test_retrieve(self):
+        assert self.app.get('/users/2/orders/3/').json['item'] == 'c'
+        self.app.get('/users/1/orders/3/', status=404)
+
+    def test_create(self):
+        response = self.app.post_json('/users/2/orders/', {'item': 'd'}, status=201)
+        assert response.json['user_id'] == 2
+
+        response = self.app.post_json('/users/2/orders/', {'item': 'e'}, headers={'Prefer': 'return=minimal'})
+        assert response.location.startswith('http://localhost/users/2/orders/')
+
+    def test_statement_cache_flat_and_nested(self):
+        class CachedOrderViewSet(viewsets.ModelCRUDViewSet):
+            model = Order
+            schema_class = OrderSchema
+            pagination_class = None
+            parent_lookups = {'user_id': Order.user_id}
+            cache_statements = True
+
+        config = Configurator()
+        config.add_request_method(lambda request: self.dbsession, 'dbsession', reify=True)
+        router = ViewSetRouter(config)
+        router.register('users', UserViewSet, 'user')
+        router.register('orders', CachedOrderViewSet, 'order')
+        NestedViewSetRouter(router, 'users', 'user_id').register('orders', CachedOrderViewSet, 'user-order')
+        app = TestApp(config.make_wsgi_app())
+
+        for _ in range(2):
+            assert [order['id'] for order in app.get('/orders/').json] == [1, 2, 3]
+            assert [order['id'] for order in app.get('/users/1/orders/').json] == [1, 2]
+            assert [order['id'] for order in app.get('/users/2/orders/').json] == [3]
+            assert [order['id'] for order in app.get('/orders/').json] == [1, 2, 3]
+
+    def test_verify_parent(self):
+        self.app.get('/users/5/orders/', status=404)
+        self.app.post_json('/users/5/orders/', {'item': 'd'}, status=404)
+
+        self.dbsession.query(Order).filter(Order.user_id == 2).delete()
+        assert self.app.get('/users/2/orders/').json == []
+
+
+class HeadOptionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        dbsession = get_dbsession()
+        dbsession.merge(User(id=3, name='testing 3'))
+        dbsession.merge(Order(id=4, user_id=3, item='a'))
+        dbsession.merge(Order(id=5, user_id=3, item='b'))
+        dbsession.commit()
+
+    def setUp(self):
+        self.dbsession = get_dbsession()
+        config = Configurator()
+        config.add_request_method(lambda request: self.dbsession, 'dbsession', reify=True)
+        router = ViewSetRouter(config)
+        router.register('users', UserViewSet, 'user')
+        NestedViewSetRouter(router, 'users', 'user_id').register('orders', UserOrderViewSet, 'user-order')
+        self.app = TestApp(config.make_wsgi_app())
+
+    def tearDown(self):
+        self.dbsession.close()
+
+    def test_options(self):
+        with mock.patch.object(UserOrderViewSet, 'initial') as initial:
+            response = self.app.options('/users/3/orders/4/')
+
+        assert not initial.called
+        assert response.headers['Allow'] == 'GET, PUT, DELETE, HEAD, OPTIONS'
+        assert self.app.options('/users/').headers['Allow'] == 'GET, POST, HEAD, OPTIONS'
+        self.app.patch_json('/users/', {'name': 'updated'}, status=405)
+
+    def test_head_list(self):
+        with mock.patch.object(OrderSchema, 'dump') as dump:
+            response = self.app.head('/users/3/orders/')
+
+        assert not dump.called
+        assert response.body == b''
+        assert response.headers['X-Total-Count'] == '2'
+        assert '<http://localhost/users/3/orders/?page=2>; rel="next"' in response.headers['Link']
+        self.app.head('/users/6/orders/', status=404)
+
+    def test_head_retrieve(self):
+        with mock.patch.object(OrderSchema, 'dump') as dump:
+            response = self.app.head('/users/3/orders/4/')
+
+        assert not dump.called
+        assert response.content_type == 'application/json'
+        self.app.head('/users/3/orders/6/', status=404)